@@ -4,6 +4,8 @@
 # SPDX-License-Identifier: BSD-3-Clause
 
 import builtins
+import collections.abc
+import contextlib
 import functools
 
 
@@ -21,6 +23,163 @@ def deferrable(func):
     return _deferred
 
 
+class _EvaluationMemo:
+    '''The memoized results of the deferred expressions evaluated in an
+    evaluation context.
+
+    The memo may be shared by threads evaluating expressions concurrently,
+    in which case an expression that is evaluated by multiple threads at the
+    same time may be evaluated more than once.
+    '''
+
+    def __init__(self):
+        self.results = {}
+
+    def __rfm_json_encode__(self):
+        # The memoized results are only meaningful during the evaluation
+        return None
+
+
+# The results of the active evaluation context; `None` if there is none
+_eval_memo = None
+
+
+@contextlib.contextmanager
+def _evaluation_context(memo=None):
+    '''Memoize the results of the deferred expressions evaluated inside this
+    context.
+
+    While the context is active, each deferred expression is evaluated at
+    most once and subsequent evaluations of the same expression object,
+    e.g., when it is shared by the sanity function and multiple performance
+    variables, return the memoized result. Results that are iterators are
+    never memoized, since they can only be consumed once.
+
+    :arg memo: The :class:`_EvaluationMemo` to store the results in. Passing
+        the same memo to multiple contexts extends the memoization across all
+        of them. If ``None``, a new memo is used.
+
+    Nested contexts share the memo of the outermost one.
+    '''
+    global _eval_memo
+
+    if _eval_memo is not None:
+        yield
+        return
+
+    _eval_memo = (memo or _EvaluationMemo()).results
+    try:
+        yield
+    finally:
+        _eval_memo = None
+
+
+def _lookup(expr):
+    '''Return a tuple with the previously computed result of ``expr`` or an
+    empty tuple if there is none.'''
+
+    if expr._return_cached:
+        return expr._cached
+
+    if _eval_memo is not None:
+        try:
+            return (_eval_memo[id(expr)][1],)
+        except KeyError:
+            pass
+
+    return ()
+
+
+def _memoize(expr, value):
+    expr._cached = (value,)
+    if (_eval_memo is not None and
+        not isinstance(value, collections.abc.Iterator)):
+        # Store also the expression, so that its id is not reused while it
+        # is in the memo
+        _eval_memo[id(expr)] = (expr, value)
+
+
+class _EvalFrame:
+    '''A pending evaluation of a deferred expression.'''
+
+    __slots__ = ('exprs', 'args', 'kwargs', 'pending', 'dest')
+
+    def __init__(self, expr, dest):
+        # The expressions whose result will be the result of this frame;
+        # this is more than one if a deferred function returns another
+        # deferred expression
+        self.exprs = [expr]
+        self.args = builtins.list(expr._args)
+        self.kwargs = builtins.dict(expr._kwargs)
+
+        # Where to store the result: a `(container, key)` tuple or `None`
+        self.dest = dest
+
+        # Deferred arguments to be evaluated, stored in reverse order, so
+        # that they are evaluated from left to right
+        self.pending = []
+        for i, v in enumerate(self.args):
+            if isinstance(v, _DeferredExpression):
+                self.pending.append((self.args, i, v))
+
+        for k, v in self.kwargs.items():
+            if isinstance(v, _DeferredExpression):
+                self.pending.append((self.kwargs, k, v))
+
+        self.pending.reverse()
+
+    def reset(self, expr):
+        '''Continue this frame with the evaluation of ``expr``.'''
+
+        exprs, dest = self.exprs, self.dest
+        self.__init__(expr, dest)
+        self.exprs = exprs + self.exprs
+
+
+def _evaluate(expr):
+    '''Evaluate ``expr`` iteratively.
+
+    The expression tree is traversed using an explicit stack instead of
+    recursion, so that arbitrarily deep expressions can be evaluated.
+    '''
+
+    ret = None
+    stack = [_EvalFrame(expr, None)]
+    while stack:
+        frame = stack[-1]
+        if frame.pending:
+            container, key, arg = frame.pending.pop()
+            cached = _lookup(arg)
+            if cached:
+                container[key] = cached[0]
+            else:
+                stack.append(_EvalFrame(arg, (container, key)))
+
+            continue
+
+        value = frame.exprs[-1]._fn(*frame.args, **frame.kwargs)
+        if isinstance(value, _DeferredExpression):
+            # Evaluate the returned deferred expression in place
+            cached = _lookup(value)
+            if not cached:
+                frame.reset(value)
+                continue
+
+            value = cached[0]
+
+        for e in frame.exprs:
+            _memoize(e, value)
+
+        stack.pop()
+        if frame.dest is None:
+            ret = value
+        else:
+            container, key = frame.dest
+            container[key] = value
+
+    return ret
+
+
 class _DeferredExpression:
     '''Represents an expression whose evaluation has been deferred.
 
@@ -53,33 +212,17 @@ class _DeferredExpression:
 
     def evaluate(self, cache=False):
         # Return the cached value (if any)
-        if self._return_cached and not cache:
-            return self._cached[0]
-        elif cache:
+        if cache:
             self._return_cached = cache
-
-        fn_args = []
-        for arg in self._args:
-            fn_args.append(
-                arg.evaluate() if isinstance(arg, _DeferredExpression) else arg
-            )
-
-        fn_kwargs = {}
-        for k, v in self._kwargs.items():
-            fn_kwargs[k] = (
-                v.evaluate() if isinstance(v, _DeferredExpression) else v
-            )
-
-        ret = self._fn(*fn_args, **fn_kwargs)
-
-        # Evaluate the return for as long as a deferred expression returns
-        # another deferred expression.
-        while isinstance(ret, _DeferredExpression):
-            ret = ret.evaluate()
-
-        # Cache the results for any subsequent evaluate calls.
-        self._cached = (ret,)
-        return ret
+        else:
+            cached = _lookup(self)
+            if cached:
+                return cached[0]
+
+        # Evaluate the arguments and the return value for as long as a
+        # deferred expression returns another deferred expression. The
+        # results are cached for any subsequent evaluate calls.
+        return _evaluate(self)
 
     def __bool__(self):
         '''The truthy value of a deferred expression.
@@ -4,15 +4,21 @@
 # SPDX-License-Identifier: BSD-3-Clause
 
 import abc
+import atexit
+import collections
+import copy
+import functools
 import logging
 import logging.handlers
 import numbers
 import os
+import queue
 import re
 import requests
 import shutil
 import socket
 import sys
+import threading
 import time
 import urllib
 
@@ -156,15 +162,26 @@ class MultiFileHandler(logging.FileHandler):
     '''
 
     def __init__(self, prefix, mode='a', encoding=None, fmt=None,
-                 perffmt=None, ignore_keys=None):
+                 perffmt=None, ignore_keys=None, compress=None,
+                 max_open_files=None):
         super().__init__(prefix, mode, encoding, delay=True)
 
         # Reset FileHandler's filename
         self.baseFilename = None
         self._prefix = prefix
 
-        # Associates filenames with open streams
-        self.__streams = {}
+        # Suffix of the compressed log files
+        self._suffix = osext.compression_suffix(compress)
+
+        # Associates filenames with open streams; the least recently used
+        # streams are closed if more than `max_open_files` are open
+        self.__streams = collections.OrderedDict()
+        self._max_open_files = max_open_files
+
+        # Files that have been opened by the handler and the directories
+        # that it has created
+        self.__files = set()
+        self.__dirs = set()
 
         # Format specifiers
         self.__fmt = fmt
@@ -214,43 +231,67 @@ class MultiFileHandler(logging.FileHandler):
         return header
 
     def _emit_header(self, record):
-        if self.baseFilename in self.__streams:
-            return
-
         record_header = self.__generate_header(record)
 
         # We are opening a file for the first time;
         # check if the header has changed
         try:
             header = None
-            with open(self.baseFilename) as fp:
+            with osext.open_compressed(self.baseFilename) as fp:
                 header = fp.readline().strip()
         except FileNotFoundError:
-            return
+            pass
         else:
-            if header == record_header:
-                return
+            if header != record_header:
+                # Header changed; move the old file keeping its suffix
+                basename = self.baseFilename[:-len(self._suffix) or None]
+                hcnt = 0
+                while os.path.exists(f'{basename}.h{hcnt}{self._suffix}'):
+                    hcnt += 1
+                    continue
+
+                os.rename(self.baseFilename,
+                          f'{basename}.h{hcnt}{self._suffix}')
+
+        # Open the file for writing and write the header; compressed files
+        # are compressed as they are written
+        fp = osext.open_compressed(self.baseFilename,
+                                   mode=self.mode, encoding=self.encoding)
+        if record_header != header:
+            fp.write(f'{record_header}\n')
+
+        return fp
+
+    def _get_stream(self, record):
+        try:
+            self.__streams.move_to_end(self.baseFilename)
+            return self.__streams[self.baseFilename]
+        except KeyError:
+            pass
 
-            # Header changed; move the old file
-            hcnt = 0
-            while os.path.exists(self.baseFilename + f'.h{hcnt}'):
-                hcnt += 1
-                continue
+        if self.baseFilename in self.__files:
+            # The file was closed, because too many files were open; the
+            # compressed streams are appended as new members of the file
+            fp = osext.open_compressed(self.baseFilename, mode='a',
+                                       encoding=self.encoding)
+        else:
+            fp = self._emit_header(record)
+            self.__files.add(self.baseFilename)
 
-            os.rename(self.baseFilename, self.baseFilename + f'.h{hcnt}')
-        finally:
-            # Open the file for writing and write the header
-            fp = open(self.baseFilename,
-                      mode=self.mode, encoding=self.encoding)
-            if record_header != header:
-                fp.write(f'{record_header}\n')
+        if (self._max_open_files and
+            len(self.__streams) >= self._max_open_files):
+            _, lru_stream = self.__streams.popitem(last=False)
+            lru_stream.close()
 
-            self.__streams[self.baseFilename] = fp
+        self.__streams[self.baseFilename] = fp
+        return fp
 
     def emit(self, record):
         try:
             dirname = self._prefix % record.__dict__
-            os.makedirs(dirname, exist_ok=True)
+            if dirname not in self.__dirs:
+                os.makedirs(dirname, exist_ok=True)
+                self.__dirs.add(dirname)
         except KeyError as e:
             raise LoggingError(f'logging failed: unknown placeholder in '
                                f'filename pattern: {e}') from None
@@ -258,16 +299,41 @@ class MultiFileHandler(logging.FileHandler):
             raise LoggingError('logging failed') from e
 
         check_basename = type(record.__rfm_check__).variant_name()
-        self.baseFilename = os.path.join(dirname, f'{check_basename}.log')
-        self._emit_header(record)
-        self.stream = self.__streams[self.baseFilename]
-        super().emit(record)
+        self.baseFilename = os.path.join(
+            dirname, f'{check_basename}.log{self._suffix}'
+        )
+        self.stream = self._get_stream(record)
+
+        # Same as `logging.StreamHandler.emit()`, but the stream is not
+        # flushed; the records are flushed with `flush()`
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        self.acquire()
+        try:
+            for s in self.__streams.values():
+                s.flush()
+        finally:
+            self.release()
 
     def close(self):
-        # Close all open streams
-        for s in self.__streams.values():
-            self.stream = s
+        self.acquire()
+        try:
+            # Close all open streams; we remove each stream from the pool
+            # before closing it, so that it is not flushed after it is closed
+            while self.__streams:
+                _, s = self.__streams.popitem(last=False)
+                s.close()
+
+            self.stream = None
             super().close()
+        finally:
+            self.release()
 
 
 def _format_time_rfc3339(timestamp, datefmt):
@@ -303,24 +369,46 @@ class CheckFieldFormatter(logging.Formatter):
 
         self.__fmt = fmt
         self.__fmtperf = perffmt[:-1] if perffmt else ''
-        self.__specs = re.findall(r'\%\((\S+?)\)s', fmt)
         self.__delim = perffmt[-1] if perffmt else ''
         self.__expand_vars = '%(check_#ALL)s' in self.__fmt
-        self.__expanded = False
         self.__ignore_keys = set(ignore_keys) if ignore_keys else set()
+        self.__fields = None
+        if not self.__expand_vars:
+            self.__fields = self._compile_fmt(self.__fmt)
 
     def _expand_fmt(self, attrs):
-        if not self.__expand_vars or self.__expanded:
+        if not self.__expand_vars or self.__fields is not None:
             return self.__fmt
 
         delim = _guess_delim(self.__fmt)
         self.__fmt = self.__fmt.replace(
-            '%(check_#ALL)s', delim.join(f'%({x})s' for x in attrs
+            '%(check_#ALL)s', delim.join(f'%({x})s' for x in sorted(attrs)
                                          if x not in self.__ignore_keys)
         )
-        self.__expanded = True
+        self.__fields = self._compile_fmt(self.__fmt)
+        return self.__fmt
+
+    def _compile_fmt(self, fmt):
+        '''Return the record attributes used in ``fmt`` along with the
+        functions for converting their values.'''
+
+        fields = []
+        for name in set(re.findall(r'\%\((.*?)\)', fmt)):
+            if name == 'check_perfvalues':
+                conv = self._format_perf
+            elif name.startswith('check_'):
+                conv = _xfmt
+            else:
+                conv = None
+
+            fields.append((name, conv))
+
+        return fields
 
     def _format_perf(self, perfvars):
+        if perfvars is None:
+            return _xfmt(perfvars)
+
         chunks = []
         for var, info in perfvars.items():
             val, ref, lower, upper, unit = info
@@ -341,25 +429,24 @@ class CheckFieldFormatter(logging.Formatter):
         return self.__delim.join(chunks)
 
     def formatMessage(self, record):
-        self._expand_fmt(sorted(record.__rfm_loggable_attrs__))
-        for s in self.__specs:
-            if not hasattr(record, s):
-                setattr(record, s, None)
-
-        record_proxy = dict(record.__dict__)
-        for k, v in record_proxy.items():
-            if k == 'check_perfvalues':
-                record_proxy[k] = self._format_perf(v)
-            elif k.startswith('check_'):
-                record_proxy[k] = _xfmt(v)
+        self._expand_fmt(record.__rfm_loggable_attrs__)
+
+        # Convert only the attributes used in the format; missing attributes
+        # are formatted as `None`
+        attrs = record.__dict__
+        record_proxy = {}
+        for name, conv in self.__fields:
+            val = attrs.get(name)
+            record_proxy[name] = conv(val) if conv else val
 
         # Now format `check_job_completion_time` according to `datefmt`
-        datefmt = self.datefmt or self.default_time_format
-        ct = record.check_job_completion_time_unix
-        if ct is not None:
-            record_proxy['check_job_completion_time'] = _format_time_rfc3339(
-                time.localtime(ct), datefmt
-            )
+        if 'check_job_completion_time' in record_proxy:
+            ct = attrs.get('check_job_completion_time_unix')
+            if ct is not None:
+                datefmt = self.datefmt or self.default_time_format
+                record_proxy['check_job_completion_time'] = (
+                    _format_time_rfc3339(time.localtime(ct), datefmt)
+                )
 
         try:
             return self.__fmt % record_proxy
@@ -378,6 +465,101 @@ class RFC3339Formatter(CheckFieldFormatter):
             return _format_time_rfc3339(timestamp, datefmt)
 
 
+class _AsyncHandler(logging.handlers.QueueHandler):
+    '''A handler that passes the log records to a set of handlers that
+    emit them in a background thread.
+
+    :arg handlers: The handlers to emit the records.
+    :arg queue_size: The maximum number of records waiting to be emitted;
+        if ``0``, the number of records is not bounded.
+    :arg overflow: What to do if the queue of records is full:
+        ``'block'`` until there is space in the queue or ``'drop'`` the
+        record.
+    '''
+
+    def __init__(self, handlers, queue_size=0, overflow='block'):
+        super().__init__(queue.Queue(queue_size))
+        self._overflow = overflow
+        self.num_dropped = 0
+        self.listener = _AsyncListener(self.queue, *handlers,
+                                       respect_handler_level=True)
+        self.listener.start()
+
+    def prepare(self, record):
+        # Merge the arguments to the message, since they might change until
+        # the record is emitted, but leave the formatting to the handlers
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        if self._overflow == 'block':
+            self.queue.put(record)
+            return
+
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.num_dropped += 1
+
+    def flush(self):
+        '''Wait until all the queued records are emitted.'''
+        if self.listener._thread is not None:
+            self.queue.join()
+
+        for h in self.listener.handlers:
+            h.flush()
+
+    def close(self):
+        self.stop()
+        super().close()
+
+    def stop(self):
+        '''Emit all the queued records and stop the background thread.'''
+
+        if self.listener._thread is None:
+            return
+
+        self.listener.stop()
+        for h in self.listener.handlers:
+            h.flush()
+
+        if self.num_dropped:
+            sys.stderr.write(f'WARNING: {self.num_dropped} log record(s) '
+                             f'were dropped, because the log queue was '
+                             f'full\n')
+
+
+class _AsyncListener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self):
+        # The queue may be full, so wait for the pending records instead of
+        # failing
+        self.queue.put(self._sentinel)
+
+    def handle(self, record):
+        # Make sure that the listener keeps running even if a handler fails
+        for handler in self.handlers:
+            if record.levelno >= handler.level:
+                try:
+                    handler.handle(record)
+                except Exception:
+                    handler.handleError(record)
+
+
+# All the asynchronous handlers, so that their records are emitted at exit
+_async_handlers = []
+
+
+def _stop_async_handlers():
+    while _async_handlers:
+        _async_handlers.pop().stop()
+
+
+# This runs before `logging.shutdown()`, which is registered earlier
+atexit.register(_stop_async_handlers)
+
+
 def _create_logger(site_config, *handlers_groups):
     level = site_config.get('logging/0/level')
     logger = Logger('reframe')
@@ -393,6 +575,8 @@ def _create_logger(site_config, *handlers_groups):
         else:
             return None
 
+    use_async = site_config.get('logging/0/async_handlers')
+    async_handlers = []
     stream_kinds = []
     for hgrp in handlers_groups:
         for handler in _extract_handlers(site_config, hgrp):
@@ -403,11 +587,37 @@ def _create_logger(site_config, *handlers_groups):
             if kind:
                 stream_kinds.append(kind)
 
-            logger.addHandler(handler)
+            if use_async and handler._rfm_type != 'stream':
+                # Stream handlers print the output of ReFrame, which we
+                # always want to see immediately
+                async_handlers.append(handler)
+            else:
+                logger.addHandler(handler)
+
+    if async_handlers:
+        handler = _AsyncHandler(
+            async_handlers,
+            queue_size=site_config.get('logging/0/async_queue_size'),
+            overflow=site_config.get('logging/0/async_overflow')
+        )
+        handler._rfm_type = 'async'
+        logger.addHandler(handler)
+        _async_handlers.append(handler)
 
     return logger
 
 
+def _handlers(logger):
+    '''Return the handlers of ``logger``, including the handlers that emit
+    records asynchronously.'''
+
+    for h in logger.handlers:
+        if isinstance(h, _AsyncHandler):
+            yield from h.listener.handlers
+        else:
+            yield h
+
+
 def _create_file_handler(site_config, config_prefix):
     filename = os.path.expandvars(site_config.get(f'{config_prefix}/name'))
     if not filename:
@@ -434,9 +644,12 @@ def _create_filelog_handler(site_config, config_prefix):
     format = site_config.get(f'{config_prefix}/format')
     format_perf = site_config.get(f'{config_prefix}/format_perfvars')
     ignore_keys = site_config.get(f'{config_prefix}/ignore_keys')
+    compress = site_config.get(f'{config_prefix}/compress')
+    max_open_files = site_config.get(f'{config_prefix}/max_open_files')
     return MultiFileHandler(filename_patt, mode='a+' if append else 'w+',
                             fmt=format, perffmt=format_perf,
-                            ignore_keys=ignore_keys)
+                            ignore_keys=ignore_keys, compress=compress,
+                            max_open_files=max_open_files)
 
 
 def _create_syslog_handler(site_config, config_prefix):
@@ -527,6 +740,13 @@ def _create_httpjson_handler(site_config, config_prefix):
     json_formatter = site_config.get(f'{config_prefix}/json_formatter')
     extra_headers = site_config.get(f'{config_prefix}/extra_headers')
     debug = site_config.get(f'{config_prefix}/debug')
+    batch_size = site_config.get(f'{config_prefix}/batch_size')
+    batch_timeout = site_config.get(f'{config_prefix}/batch_timeout')
+    retries = site_config.get(f'{config_prefix}/retries')
+    retry_backoff = site_config.get(f'{config_prefix}/retry_backoff')
+    spool_file = site_config.get(f'{config_prefix}/spool_file')
+    if spool_file:
+        spool_file = os.path.abspath(os.path.expandvars(spool_file))
 
     parsed_url = urllib.parse.urlparse(url)
     if parsed_url.scheme not in {'http', 'https'}:
@@ -560,7 +780,10 @@ def _create_httpjson_handler(site_config, config_prefix):
             f'httpjson: could not connect to server '
             f'{parsed_url.hostname}:{port}: {e}'
         )
-        if not debug:
+        if spool_file:
+            getlogger().warning(f'httpjson: log records will be spooled '
+                                f'to {spool_file!r}')
+        elif not debug:
             return None
 
     if debug:
@@ -568,7 +791,8 @@ def _create_httpjson_handler(site_config, config_prefix):
                             'no data will be sent to the server')
 
     return HTTPJSONHandler(url, extras, ignore_keys, json_formatter,
-                           extra_headers, debug)
+                           extra_headers, debug, batch_size, batch_timeout,
+                           retries, retry_backoff, spool_file)
 
 
 def _record_to_json(record, extras, ignore_keys):
@@ -618,7 +842,8 @@ class HTTPJSONHandler(logging.Handler):
 
     def __init__(self, url, extras=None, ignore_keys=None,
                  json_formatter=None, extra_headers=None,
-                 debug=False):
+                 debug=False, batch_size=1, batch_timeout=None,
+                 retries=0, retry_backoff=1, spool_file=None):
         super().__init__()
         self._url = url
         self._extras = extras
@@ -642,6 +867,17 @@ class HTTPJSONHandler(logging.Handler):
             self._headers.update(extra_headers)
 
         self._debug = debug
+        self._batch_size = max(int(batch_size), 1)
+        self._batch_timeout = batch_timeout
+        self._retries = retries
+        self._retry_backoff = retry_backoff
+        self._spool_file = spool_file
+        self._batch = []
+        self._timer = None
+
+        # Reuse the connections to the server across requests
+        self._session = requests.Session()
+        self._session.headers.update(self._headers)
 
     def emit(self, record):
         # Convert tags to a list to make them JSON friendly
@@ -653,7 +889,6 @@ class HTTPJSONHandler(logging.Handler):
             return
 
         if self._debug:
-            import time
             ts = int(time.time() * 1_000)
             dump_file = f'httpjson_record_{ts}.json'
             with open(dump_file, 'w') as fp:
@@ -661,13 +896,110 @@ class HTTPJSONHandler(logging.Handler):
 
             return
 
+        self._batch.append(json_record)
+        if len(self._batch) >= self._batch_size:
+            self._send_batch()
+        elif self._batch_timeout and self._timer is None:
+            self._timer = threading.Timer(self._batch_timeout,
+                                          self._batch_expired)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        self.acquire()
         try:
-            requests.post(
-                self._url, data=json_record,
-                headers=self._headers
+            self._send_batch()
+        except LoggingError as err:
+            _report_httpjson_error(err)
+        finally:
+            self.release()
+
+    def close(self):
+        self.flush()
+        self._session.close()
+        super().close()
+
+    def _batch_expired(self):
+        self.acquire()
+        try:
+            self._timer = None
+            self._send_batch()
+        except LoggingError as err:
+            _report_httpjson_error(err)
+        finally:
+            self.release()
+
+    def _send_batch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._batch = self._batch, []
+        if not batch:
+            return
+
+        try:
+            self._replay_spool()
+            self._post(batch)
+        except LoggingError:
+            if self._spool_file is None:
+                raise
+
+            with open(self._spool_file, 'a') as fp:
+                fp.writelines(f'{r}\n' for r in batch)
+
+    def _replay_spool(self):
+        if self._spool_file is None or not os.path.exists(self._spool_file):
+            return
+
+        with open(self._spool_file) as fp:
+            records = fp.read().splitlines()
+
+        for i in range(0, len(records), self._batch_size):
+            try:
+                self._post(records[i:i+self._batch_size])
+            except LoggingError:
+                # Keep only the records that were not sent
+                with open(self._spool_file, 'w') as fp:
+                    fp.writelines(f'{r}\n' for r in records[i:])
+
+                raise
+
+        os.remove(self._spool_file)
+
+    def _post(self, records):
+        if self._batch_size == 1:
+            data, headers = records[0], None
+        else:
+            data = ''.join(f'{r}\n' for r in records)
+            headers = {'Content-type': 'application/x-ndjson'}
+
+        for attempt in range(self._retries + 1):
+            if attempt:
+                time.sleep(self._retry_backoff * 2**(attempt - 1))
+
+            try:
+                response = self._session.post(self._url, data=data,
+                                              headers=headers)
+            except requests.exceptions.RequestException as e:
+                error = e
+                continue
+
+            # Retry only if the server is unavailable or overloaded
+            if response.status_code < 500 and response.status_code != 429:
+                return
+
+            error = requests.exceptions.HTTPError(
+                f'{response.status_code} {response.reason}',
+                response=response
             )
-        except requests.exceptions.RequestException as e:
-            raise LoggingError('logging failed') from e
+
+        raise LoggingError('logging failed') from error
+
+
+def _report_httpjson_error(err):
+    # We may not be able to log the error, so we simply print it
+    sys.stderr.write(f'WARNING: httpjson: {err}: {err.__cause__}\n')
 
 
 def _extract_handlers(site_config, handlers_group):
@@ -779,6 +1111,15 @@ class Logger(logging.Logger):
 _WARN_ONCE = set()
 
 
+@functools.lru_cache(maxsize=None)
+def _loggable_attrs(check_type):
+    '''Return the loggable attributes of a test class along with their
+    names in the log records.'''
+
+    return [(attr, f'check_{alt_name or attr}')
+            for attr, alt_name in check_type.loggable_attrs()]
+
+
 class LoggerAdapter(logging.LoggerAdapter):
     def __init__(self, logger=None, check=None):
         super().__init__(
@@ -806,6 +1147,7 @@ class LoggerAdapter(logging.LoggerAdapter):
         )
         self.check = check
         self.colorize = False
+        self._check_extras_valid = False
 
     def setLevel(self, level):
         if self.logger:
@@ -819,15 +1161,20 @@ class LoggerAdapter(logging.LoggerAdapter):
             return []
 
     def _update_check_extras(self):
-        '''Return a dictionary with all the check-specific information.'''
+        '''Add all the check-specific information to the extras.
+
+        The information is computed on the first log call and it is then
+        reused, until it is invalidated. A new adapter is created for each
+        stage of a test, so the information is up to date with the last
+        stage.
+        '''
 
-        if self.check is None:
+        if self.check is None or self._check_extras_valid:
             return
 
         check_type = type(self.check)
-        for attr, alt_name in check_type.loggable_attrs():
-            extra_name  = alt_name or attr
-
+        loggable_attrs = _loggable_attrs(check_type)
+        for attr, key in loggable_attrs:
             with suppress_deprecations():
                 # In case of AttributeError, i.e., the variable is undefined,
                 # we set the value to None
@@ -837,21 +1184,27 @@ class LoggerAdapter(logging.LoggerAdapter):
                 # Attribute is parameter, so format it
                 val = check_type.raw_params[attr].format(val)
 
-            key = f'check_{extra_name}'
-            self.extra['__rfm_loggable_attrs__'].append(key)
             self.extra[key] = val
 
+        self.extra['__rfm_loggable_attrs__'] = [
+            key for _, key in loggable_attrs
+        ]
+
         # Add special extras
         self.extra['check_info'] = self.check.info()
         self.extra['check_job_completion_time'] = _format_time_rfc3339(
             time.localtime(self.extra['check_job_completion_time_unix']),
             '%FT%T%:z'
         )
+        self._check_extras_valid = True
 
     def log_performance(self, level, task, msg=None, multiline=False):
         if self.check is None or not self.check.is_performance_check():
             return
 
+        # Performance is logged after the test has finished, so make sure to
+        # log its final state
+        self._check_extras_valid = False
         self.extra['check_partition'] = task.testcase.partition.name
         self.extra['check_environ'] = task.testcase.environ.name
         self.extra['check_result'] = 'pass' if task.succeeded else 'fail'
@@ -872,6 +1225,12 @@ class LoggerAdapter(logging.LoggerAdapter):
         else:
             self.log(level, msg)
 
+        # Write out the buffered performance records of the test
+        if self.logger:
+            for h in _handlers(self.logger):
+                if isinstance(h, MultiFileHandler):
+                    h.flush()
+
     def process(self, msg, kwargs):
         # Setup dynamic fields of the check
         self._update_check_extras()
@@ -967,6 +1326,8 @@ class logging_context:
 def configure_logging(site_config):
     global _logger, _context_logger, _perf_logger
 
+    # Emit any pending records of the previous configuration
+    _stop_async_handlers()
     if site_config is None:
         _logger = None
         _context_logger = null_logger
@@ -978,11 +1339,25 @@ def configure_logging(site_config):
 
 
 def log_files():
-    return [hdlr.baseFilename for hdlr in _logger.handlers
+    return [hdlr.baseFilename for hdlr in _handlers(_logger)
             if isinstance(hdlr, logging.FileHandler)]
 
 
+def flush_logs():
+    '''Wait until the records of the asynchronous log handlers have been
+    emitted.
+
+    .. versionadded:: 4.6
+    '''
+
+    for logger in (_logger, _perf_logger):
+        if logger is not None:
+            for h in logger.handlers:
+                h.flush()
+
+
 def save_log_files(dest):
+    flush_logs()
     os.makedirs(dest, exist_ok=True)
     return [shutil.copy(logfile, dest, follow_symlinks=True)
             for logfile in log_files()]
@@ -13,6 +13,8 @@ __all__ = [
 ]
 
 
+import concurrent.futures
+import contextlib
 import glob
 import hashlib
 import inspect
@@ -35,7 +37,8 @@ from reframe.core.backends import getlauncher, getscheduler
 from reframe.core.buildsystems import BuildSystemField
 from reframe.core.containers import (ContainerPlatform, ContainerPlatformField)
 from reframe.core.deferrable import (_DeferredExpression,
-                                     _DeferredPerformanceExpression)
+                                     _DeferredPerformanceExpression,
+                                     _EvaluationMemo, _evaluation_context)
 from reframe.core.environments import Environment
 from reframe.core.exceptions import (BuildError, DependencyError,
                                      PerformanceError, PipelineError,
@@ -756,6 +759,27 @@ class RegressionTest(RegressionMixin, jsonext.JSONSerializable):
     #:       The default value has changed from ``None`` to ``required``.
     sanity_patterns = variable(_DeferredExpression, loggable=False)
 
+    #: Regex patterns that must not be found in the output of the test.
+    #:
+    #: These patterns are checked while the test's job is running, every
+    #: time that ReFrame polls the job. Only the output produced since the
+    #: last poll is checked, by following the standard output and standard
+    #: error of the job. As soon as any of the patterns is found, the job is
+    #: cancelled and the test fails with a :class:`SanityError` as soon as
+    #: its job finishes, regardless of whether the sanity checking stage is
+    #: skipped. Any output that was not checked while polling the job is
+    #: checked at this point, too. This allows long-running tests to fail
+    #: fast, e.g., by setting this to ``[r'ERROR|Segmentation fault']``.
+    #:
+    #: The patterns are searched line by line, so that they may not match
+    #: text spanning multiple lines.
+    #:
+    #: :type: :class:`List[str]`
+    #: :default: ``[]``
+    #:
+    #: .. versionadded:: 4.6
+    live_sanity_patterns = variable(typ.List[str], value=[], loggable=False)
+
     #: Patterns for verifying the performance of this test.
     #:
     #: If set to :class:`None`, no performance checking will be performed.
@@ -812,6 +836,25 @@ class RegressionTest(RegressionMixin, jsonext.JSONSerializable):
     perf_variables = variable(typ.Dict[str, _DeferredPerformanceExpression],
                               value={}, loggable=False)
 
+    #: The maximum number of threads to use for evaluating the
+    #: :attr:`perf_variables` concurrently.
+    #:
+    #: If greater than ``1``, the performance variables are evaluated
+    #: concurrently, so that tests extracting their metrics from separate
+    #: large files may overlap their I/O.
+    #: In this case, the working directory of the process is not changed to
+    #: the stage directory during the evaluation.
+    #: Relative paths passed to the :doc:`sanity functions
+    #: </deferrable_functions_reference>` are still resolved against the
+    #: stage directory, but performance functions that access files directly
+    #: must use absolute paths.
+    #:
+    #: :type: :class:`int`
+    #: :default: ``1``
+    #:
+    #: .. versionadded:: 4.6
+    perf_eval_workers = variable(int, value=1, loggable=False)
+
     #: List of modules to be loaded before running this test.
     #:
     #: These modules will be loaded during the :func:`setup` phase.
@@ -1071,6 +1114,16 @@ class RegressionTest(RegressionMixin, jsonext.JSONSerializable):
     def __rfm_init__(self, prefix=None):
         self._perfvalues = {}
 
+        # Memoized results of the deferred expressions evaluated during the
+        # sanity and performance stages
+        self._eval_memo = None
+
+        # State of the live sanity checking: the offsets up to which the
+        # output files of the job have been checked and the failure that
+        # caused the job to be cancelled, if any
+        self._live_sanity_offsets = {}
+        self._live_sanity_failure = None
+
         # Static directories of the regression check
         self._prefix = os.path.abspath(prefix)
         if (self.sourcesdir == 'src' and
@@ -2023,6 +2076,8 @@ class RegressionTest(RegressionMixin, jsonext.JSONSerializable):
                 raise PipelineError('failed to prepare run job') from e
 
             if not self.is_dry_run():
+                self._live_sanity_offsets = {}
+                self._live_sanity_failure = None
                 self._job.submit()
                 self.logger.debug(f'Spawned run job (id={self.job.jobid})')
 
@@ -2081,7 +2136,52 @@ class RegressionTest(RegressionMixin, jsonext.JSONSerializable):
         if not self._job or self.is_dry_run():
             return True
 
-        return self._job.finished()
+        if self._job.finished():
+            return True
+
+        self._check_live_sanity()
+        return False
+
+    def _check_live_sanity(self, final=False):
+        '''Check the output of the job produced since the last check against
+        the :attr:`live_sanity_patterns`.
+
+        The job is cancelled as soon as any of the patterns is found, unless
+        this is the final check.
+        '''
+        if (not self.live_sanity_patterns or self._job is None or
+            self._live_sanity_failure):
+            return
+
+        for name in (self._job.stdout, self._job.stderr):
+            offset = self._live_sanity_offsets.get(name, 0)
+            try:
+                with open(os.path.join(self._stagedir, name), 'rb') as fp:
+                    fp.seek(offset)
+                    data = fp.read()
+            except OSError:
+                # The job may not have started yet
+                continue
+
+            if not final:
+                # Leave any incomplete line to be checked the next time
+                data = data[:data.rfind(b'\n') + 1]
+
+            self._live_sanity_offsets[name] = offset + len(data)
+            text = data.decode(errors='replace')
+            for patt in self.live_sanity_patterns:
+                if sn._compile(patt).search(text):
+                    self._live_sanity_failure = (
+                        f'pattern {patt!r} found in {name!r}'
+                    )
+                    if not final:
+                        self.logger.debug(
+                            f'Cancelling job (id={self._job.jobid}): '
+                            f'{self._live_sanity_failure}'
+                        )
+                        self._job.cancel()
+
+                    return
 
     @final
     def run_wait(self):
@@ -2106,6 +2206,11 @@ class RegressionTest(RegressionMixin, jsonext.JSONSerializable):
 
         self._job.wait()
 
+        # Check any output that was produced after the last poll of the job
+        self._check_live_sanity(final=True)
+        if self._live_sanity_failure:
+            raise SanityError(self._live_sanity_failure)
+
     @final
     def sanity(self):
         self.check_sanity()
@@ -2168,15 +2273,49 @@ class RegressionTest(RegressionMixin, jsonext.JSONSerializable):
         if self.is_dry_run():
             return
 
-        with osext.change_dir(self._stagedir):
-            success = sn.evaluate(self.sanity_patterns)
-            if not success:
-                raise SanityError()
+        # Expressions shared between the sanity and the performance functions
+        # will be evaluated only once
+        self._eval_memo = _EvaluationMemo()
+        try:
+            stagedir = self._stagedir
+            with osext.change_dir(stagedir), sn._working_dir(stagedir):
+                with sn._file_cache(), _evaluation_context(self._eval_memo):
+                    success = sn.evaluate(self.sanity_patterns)
+
+                if not success:
+                    raise SanityError()
+        except BaseException:
+            # The performance stage will not follow
+            self._eval_memo = None
+            raise
 
     def is_performance_check(self):
         '''Return :obj:`True` if the test is a performance test.'''
         return self.perf_variables or hasattr(self, 'perf_patterns')
 
+    def _evaluate_perf_variables(self):
+        '''Evaluate the performance variables of the test.
+
+        Returns a dictionary mapping each performance variable to a tuple of
+        its value and the exception raised while evaluating it, if any.
+        '''
+
+        def _evaluate(expr):
+            try:
+                return expr.evaluate(), None
+            except Exception as e:
+                return None, e
+
+        exprs = list(self.perf_variables.values())
+        num_workers = min(self.perf_eval_workers, len(exprs))
+        if num_workers > 1:
+            with concurrent.futures.ThreadPoolExecutor(num_workers) as pool:
+                results = list(pool.map(_evaluate, exprs))
+        else:
+            results = [_evaluate(expr) for expr in exprs]
+
+        return dict(zip(self.perf_variables.keys(), results))
+
     @final
     def check_performance(self):
         '''The performance checking phase of the regression test pipeline.
@@ -2199,6 +2338,8 @@ class RegressionTest(RegressionMixin, jsonext.JSONSerializable):
 
         '''
 
+        # Release the memoized results of the sanity stage in any case
+        eval_memo, self._eval_memo = self._eval_memo, None
         if not self.is_performance_check():
             return
 
@@ -2209,16 +2350,19 @@ class RegressionTest(RegressionMixin, jsonext.JSONSerializable):
                 f"you cannot mix 'perf_patterns' and 'perf_variables' syntax"
             )
 
+        # Resolve the references of the current partition once for all the
+        # performance variables
+        references = self.reference.scope(self._current_partition.fullname)
+
         # Convert `perf_patterns` to `perf_variables`
         if perf_patterns:
             for var, expr in self.perf_patterns.items():
                 # Retrieve the unit from the reference tuple
-                key = f'{self._current_partition.fullname}:{var}'
                 try:
-                    unit = self.reference[key][3]
+                    unit = references[var][3]
                     if unit is None:
                         unit = ''
-                except KeyError:
+                except (KeyError, IndexError):
                     unit = ''
 
                 self.perf_variables[var] = sn.make_performance_function(expr,
@@ -2227,22 +2371,29 @@ class RegressionTest(RegressionMixin, jsonext.JSONSerializable):
         if self.is_dry_run():
             return
 
-        # Evaluate the performance function and retrieve the metrics
-        with osext.change_dir(self._stagedir):
+        # Evaluate the performance functions and retrieve the metrics
+        eval_memo = eval_memo or _EvaluationMemo()
+        with contextlib.ExitStack() as stack:
+            if self.perf_eval_workers <= 1:
+                stack.enter_context(osext.change_dir(self._stagedir))
+
+            stack.enter_context(sn._working_dir(self._stagedir))
+            stack.enter_context(sn._file_cache())
+            stack.enter_context(_evaluation_context(eval_memo))
+            results = self._evaluate_perf_variables()
             for tag, expr in self.perf_variables.items():
-                try:
-                    value = expr.evaluate()
-                    unit = expr.unit
-                except Exception as e:
+                value, err = results[tag]
+                if err is not None:
                     logging.getlogger().warning(
                         f'skipping evaluation of performance variable '
-                        f'{tag!r}: {e}'
+                        f'{tag!r}: {err}'
                     )
                     continue
 
+                unit = expr.unit
                 key = f'{self._current_partition.fullname}:{tag}'
                 try:
-                    ref = self.reference[key]
+                    ref = references[tag]
 
                     # If units are also provided in the reference, raise
                     # a warning if they match with the units provided by
@@ -2271,7 +2422,9 @@ class RegressionTest(RegressionMixin, jsonext.JSONSerializable):
 
                 self._perfvalues[key] = (value, *ref, unit)
 
-            # Check the performance variables against their references.
+            # Check the performance variables against their references. All
+            # of them are checked and any failures are reported together.
+            failures = []
             for key, values in self._perfvalues.items():
                 val, ref, low_thres, high_thres, *_ = values
 
@@ -2284,14 +2437,18 @@ class RegressionTest(RegressionMixin, jsonext.JSONSerializable):
 
                 tag = key.split(':')[-1]
                 try:
-                    sn.evaluate(
-                        sn.assert_reference(
-                            val, ref, low_thres, high_thres,
-                            msg=('failed to meet reference: %s={0}, '
-                                 'expected {1} (l={2}, u={3})' % tag))
-                    )
+                    lower, upper = sn._reference_bounds(ref, low_thres,
+                                                        high_thres)
                 except SanityError as e:
-                    raise PerformanceError(e) from None
+                    failures.append(f'{tag}: {e}')
+                    continue
+
+                if not (val >= lower and val <= upper):
+                    failures.append(f'failed to meet reference: {tag}={val}, '
+                                    f'expected {ref} (l={lower}, u={upper})')
+
+            if failures:
+                raise PerformanceError('; '.join(failures))
 
     def _copy_job_files(self, job, dst):
         if job is None:
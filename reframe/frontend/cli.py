@@ -10,6 +10,7 @@ import os
 import random
 import shlex
 import socket
+import sqlite3
 import sys
 import time
 import traceback
@@ -23,10 +24,12 @@ import reframe.frontend.autodetect as autodetect
 import reframe.frontend.ci as ci
 import reframe.frontend.dependencies as dependencies
 import reframe.frontend.filters as filters
+import reframe.frontend.resultsdb as resultsdb
 import reframe.frontend.runreport as runreport
 import reframe.utility as util
 import reframe.utility.jsonext as jsonext
 import reframe.utility.osext as osext
+import reframe.utility.sanity as sn
 import reframe.utility.typecheck as typ
 
 from reframe.frontend.testgenerators import (distribute_tests,
@@ -37,6 +40,8 @@ from reframe.frontend.executors.policies import (SerialExecutionPolicy,
 from reframe.frontend.executors import Runner, generate_testcases
 from reframe.frontend.loader import RegressionCheckLoader
 from reframe.frontend.printer import PrettyPrinter
+from reframe.frontend.statistics import (performance_compare_report,
+                                         performance_shifts_report)
 
 
 def format_env(envvars):
@@ -190,6 +195,152 @@ def list_tags(testcases, printer):
     printer.info(f'Found {len(tags)} tag(s)\n')
 
 
+def _results_database(site_config):
+    filename = site_config.get('general/0/results_database')
+    if not filename:
+        return None
+
+    return resultsdb.ResultsDB(osext.expandvars(filename))
+
+
+def _parse_period(spec):
+    '''Parse a period of the form ``FROM[..TO]``.'''
+
+    if not spec:
+        return None, None
+
+    # We don't split on `:`, since it is part of the ISO 8601 times
+    time_from, _, time_to = spec.partition('..')
+    return (resultsdb.parse_time(time_from) if time_from else None,
+            resultsdb.parse_time(time_to) if time_to else None)
+
+
+def _parse_testcase_query(spec):
+    '''Parse a test case query of the form ``KEY=VAL[,KEY=VAL]*``.'''
+
+    query = {}
+    for item in spec.split(','):
+        key, sep, val = item.partition('=')
+        key = key.strip()
+        if not sep or key not in ('name', 'system', 'partition',
+                                  'environment', 'result', 'session',
+                                  'period'):
+            raise ValueError(f'invalid test case query: {item!r}')
+
+        if key == 'period':
+            query['time_from'], query['time_to'] = _parse_period(val)
+        elif key == 'session':
+            query['session_id'] = int(val)
+        else:
+            query[key] = val
+
+    return query
+
+
+def _fmt_time(timestamp):
+    if timestamp is None:
+        return '<unknown>'
+
+    return time.strftime('%FT%T%z', time.localtime(timestamp))
+
+
+def list_stored_sessions(db, period, printer):
+    printer.info(f'[List of stored sessions in {db.filename!r}]')
+    sessions = db.sessions(*_parse_period(period))
+    for s in sessions:
+        printer.info(f"- session {s['id']}: {_fmt_time(s['time_start'])}, "
+                     f"{s['num_cases']} case(s), "
+                     f"{s['num_failures']} failure(s), "
+                     f"{s['user'] or '<unknown>'}@{s['hostname']}")
+        printer.info(f"    {s['cmdline']}")
+
+    printer.info(f'Found {len(sessions)} session(s)\n')
+
+
+def _parse_compare_spec(spec):
+    '''Parse a performance comparison spec of the form
+    ``BASELINE[/AGGR][/TARGET]``.
+
+    Return a tuple of the target session, a description of the baseline and
+    the keyword arguments to :func:`ResultsDB.compare`.
+    '''
+
+    parts = spec.split('/')
+    if len(parts) > 3:
+        raise ValueError(f'invalid performance comparison: {spec!r}')
+
+    baseline, aggr, target = parts + (3 - len(parts))*['']
+    aggr = aggr or 'median'
+    kwargs = {'aggr': aggr}
+    key, sep, val = baseline.partition('=')
+    if key == 'last' and sep:
+        kwargs['last'] = int(val)
+        descr = f'{aggr} of the last {val} run(s)'
+    elif key == 'session' and sep:
+        kwargs['session_id'] = int(val)
+        descr = f'{aggr} of session {val}'
+    elif not sep:
+        kwargs['time_from'], kwargs['time_to'] = _parse_period(baseline)
+        descr = f'{aggr} of period {baseline!r}' if baseline else aggr
+    else:
+        raise ValueError(f'invalid performance baseline: {baseline!r}')
+
+    # Validate the aggregation
+    resultsdb._percentile(aggr)
+    if target:
+        key, sep, val = target.partition('=')
+        if key != 'session' or not sep:
+            raise ValueError(f'invalid performance comparison target: '
+                             f'{target!r}')
+
+        target = int(val)
+    else:
+        target = None
+
+    return target, descr, kwargs
+
+
+def _parse_shifts_spec(spec):
+    '''Parse a performance shift detection spec of the form
+    ``[KEY=VAL[,KEY=VAL]*]``.
+
+    Return a tuple of the window size, the number of MADs and the test case
+    query.
+    '''
+
+    window, k, query = 10, 3.0, []
+    for item in filter(None, spec.split(',')):
+        key, sep, val = item.partition('=')
+        if key.strip() == 'window' and sep:
+            window = int(val)
+            if window <= 0:
+                raise ValueError(f'invalid window size: {window}')
+        elif key.strip() == 'k' and sep:
+            k = float(val)
+        else:
+            query.append(item)
+
+    return window, k, _parse_testcase_query(','.join(query)) if query else {}
+
+
+def list_stored_testcases(db, query, printer):
+    printer.info(f'[List of stored test cases in {db.filename!r}]')
+    testcases = db.testcases(**_parse_testcase_query(query))
+    for tc in testcases:
+        system = tc['system']
+        if tc['partition']:
+            system += f":{tc['partition']}"
+
+        printer.info(f"- {tc['unique_name']} @{system}+{tc['environment']} "
+                     f"[session {tc['session_id']}, "
+                     f"{_fmt_time(tc['timestamp'])}]: {tc['result']}")
+        for pv in tc['perfvars']:
+            printer.info(f"    {pv['name']}: {pv['value']} {pv['unit']} "
+                         f"(ref={pv['reference']})")
+
+    printer.info(f'Found {len(testcases)} test case(s)\n')
+
+
 def logfiles_message():
     log_files = logging.log_files()
     msg = 'Log file(s) saved in '
@@ -278,6 +429,19 @@ def main():
         envvar='RFM_REPORT_JUNIT',
         configvar='general/report_junit'
     )
+    output_options.add_argument(
+        '--report-junit-stdout', action='store', metavar='NUM', type=int,
+        help=('Include the last NUM lines of the standard output '
+              'of each test in the JUnit report'),
+        envvar='RFM_REPORT_JUNIT_STDOUT',
+        configvar='general/report_junit_stdout'
+    )
+    output_options.add_argument(
+        '--results-database', action='store', metavar='FILE',
+        help='Store the results of the session in the database FILE',
+        envvar='RFM_RESULTS_DATABASE',
+        configvar='general/results_database'
+    )
     output_options.add_argument(
         '-s', '--stage', action='store', metavar='DIR',
         help='Set stage directory prefix to DIR',
@@ -388,6 +552,16 @@ def main():
         '--list-tags', action='store_true',
         help='List the unique tags found in the selected tests and exit'
     )
+    action_options.add_argument(
+        '--list-stored-sessions', nargs='?', const='', metavar='PERIOD',
+        help=('List the sessions stored in the results database '
+              'that started within PERIOD and exit')
+    )
+    action_options.add_argument(
+        '--list-stored-testcases', action='store', metavar='QUERY',
+        help=('List the test cases stored in the results database '
+              'that match QUERY and exit')
+    )
     action_options.add_argument(
         '-r', '--run', action='store_true',
         help='Run the selected checks'
@@ -552,6 +726,17 @@ def main():
         '--performance-report', action='store_true',
         help='Print a report for performance tests'
     )
+    misc_options.add_argument(
+        '--performance-compare', action='store', metavar='SPEC',
+        help=('Compare the performance of the session against a baseline '
+              'of past sessions')
+    )
+    misc_options.add_argument(
+        '--detect-perf-shifts', nargs='?', const='', metavar='SPEC',
+        help=('Detect statistically significant shifts in the performance '
+              'of the session or, if no tests are run, in the stored '
+              'results')
+    )
     misc_options.add_argument(
         '--show-config', action='store', nargs='?', const='all',
         metavar='PARAM',
@@ -682,6 +867,14 @@ def main():
         configvar='logging/handlers_perflog/syslog_address',
         help='Syslog server address'
     )
+    argparser.add_argument(
+        dest='testcase_snapshot',
+        envvar='RFM_TESTCASE_SNAPSHOT',
+        configvar='general/testcase_snapshot',
+        action='store',
+        type=typ.Str[r'json|none'],
+        help='Format of the test case snapshots used for restoring them'
+    )
     argparser.add_argument(
         dest='trap_job_errors',
         envvar='RFM_TRAP_JOB_ERRORS',
@@ -710,7 +903,9 @@ def main():
         '''
 
         if (options.show_config or
-            options.detect_host_topology or options.describe):
+            options.detect_host_topology or options.describe or
+            options.list_stored_sessions is not None or
+            options.list_stored_testcases):
             logging.getlogger().setLevel(logging.ERROR)
             return True
         else:
@@ -900,6 +1095,89 @@ def main():
 
         sys.exit(0)
 
+    if (options.list_stored_sessions is not None or
+        options.list_stored_testcases):
+        # Restore logging level
+        printer.setLevel(logging.INFO)
+        try:
+            db = _results_database(site_config)
+            if db is None:
+                printer.error('no results database is configured')
+                sys.exit(1)
+
+            with db:
+                if options.list_stored_sessions is not None:
+                    list_stored_sessions(db, options.list_stored_sessions,
+                                         printer)
+
+                if options.list_stored_testcases:
+                    list_stored_testcases(db, options.list_stored_testcases,
+                                          printer)
+        except (errors.ReframeError, ValueError) as e:
+            printer.error(f'could not query the results database: {e}')
+            sys.exit(1)
+
+        sys.exit(0)
+
+    if options.performance_compare:
+        try:
+            compare_target, compare_descr, compare_args = _parse_compare_spec(
+                options.performance_compare
+            )
+        except ValueError as e:
+            printer.error(f'invalid --performance-compare option: {e}')
+            sys.exit(1)
+
+        if compare_target is not None:
+            # Compare a stored session
+            printer.setLevel(logging.INFO)
+            try:
+                db = _results_database(site_config)
+                if db is None:
+                    printer.error('no results database is configured')
+                    sys.exit(1)
+
+                with db:
+                    printer.info(performance_compare_report(
+                        db.compare(compare_target, **compare_args),
+                        compare_descr
+                    ))
+            except (errors.ReframeError, sqlite3.Error) as e:
+                printer.error(f'could not query the results database: {e}')
+                sys.exit(1)
+
+            sys.exit(0)
+
+    if options.detect_perf_shifts is not None:
+        try:
+            shifts_window, shifts_k, shifts_query = _parse_shifts_spec(
+                options.detect_perf_shifts
+            )
+        except ValueError as e:
+            printer.error(f'invalid --detect-perf-shifts option: {e}')
+            sys.exit(1)
+
+        if not options.run and not options.dry_run:
+            # Examine the stored results
+            printer.setLevel(logging.INFO)
+            try:
+                db = _results_database(site_config)
+                if db is None:
+                    printer.error('no results database is configured')
+                    sys.exit(1)
+
+                with db:
+                    printer.info(performance_shifts_report(
+                        db.performance_shifts(shifts_window, shifts_k,
+                                              **shifts_query),
+                        shifts_window, shifts_k
+                    ))
+            except (errors.ReframeError, sqlite3.Error) as e:
+                printer.error(f'could not query the results database: {e}')
+                sys.exit(1)
+
+            sys.exit(0)
+
     autodetect.detect_topology()
     printer.debug(format_env(options.env_vars))
 
@@ -1363,6 +1641,11 @@ def main():
         exec_policy.keep_stage_files = site_config.get(
             'general/0/keep_stage_files'
         )
+        testcase_snapshot = site_config.get('general/0/testcase_snapshot')
+        if testcase_snapshot == 'none':
+            testcase_snapshot = None
+
+        exec_policy.testcase_snapshot = testcase_snapshot
         exec_policy.dry_run_mode = options.dry_run
         try:
             errmsg = "invalid option for --flex-alloc-nodes: '{0}'"
@@ -1392,13 +1675,42 @@ def main():
                 f"'--reruns' should be a non-negative integer: {options.reruns}"
             )
 
+        # Reserve the report file of this session and journal the report
+        # while the tests run
+        report_file = os.path.normpath(
+            osext.expandvars(rt.get_option('general/0/report_file'))
+        )
+        basedir = os.path.dirname(report_file)
+        if basedir:
+            os.makedirs(basedir, exist_ok=True)
+
+        report_file = runreport.next_report_filename(report_file)
         runner = Runner(exec_policy, printer, options.max_retries,
                         options.maxfail, options.reruns, options.duration)
+        try:
+            journal = runreport.RunReportJournal(
+                runreport.journal_filename(report_file), runner.stats
+            )
+        except OSError as e:
+            printer.warning(f'could not create the run report journal: {e}')
+            journal = None
+        else:
+            # Add the journal first, so that it records every test case,
+            # even if any other listener raises
+            exec_policy.task_listeners.insert(0, journal)
+
         try:
             time_start = time.time()
             session_info['time_start'] = time.strftime(
                 '%FT%T%z', time.localtime(time_start),
             )
+            if journal:
+                journal.write_session_info(session_info)
+                if options.restore_session is not None:
+                    journal.write_restored_cases(
+                        [report.case(*c) for c in restored_cases]
+                    )
+
             runner.runall(testcases, restored_cases)
         finally:
             time_end = time.time()
@@ -1427,15 +1739,12 @@ def main():
             if options.performance_report:
                 printer.info(runner.stats.performance_report())
 
-            # Generate the report for this session
-            report_file = os.path.normpath(
-                osext.expandvars(rt.get_option('general/0/report_file'))
-            )
-            basedir = os.path.dirname(report_file)
-            if basedir:
-                os.makedirs(basedir, exist_ok=True)
+            # Build final JSON report; the journal is used only to recover
+            # the report of sessions that did not finish, since its entries
+            # are recorded before the cleanup of the test cases
+            if journal:
+                journal.close()
 
-            # Build final JSON report
             run_stats = runner.stats.json()
             session_info.update({
                 'num_cases': run_stats[0]['num_cases'],
@@ -1450,7 +1759,6 @@ def main():
                 for c in restored_cases:
                     json_report['restored_cases'].append(report.case(*c))
 
-            report_file = runreport.next_report_filename(report_file)
             default_loc = os.path.dirname(
                 osext.expandvars(rt.get_default('general/report_file'))
             )
@@ -1463,17 +1771,52 @@ def main():
                 printer.warning(
                     f'failed to generate report in {report_file!r}: {e}'
                 )
+            else:
+                # The journal is not needed after the report is written
+                if journal:
+                    os.remove(journal.filename)
+
+            # Store the results of the session in the results database
+            if not options.dry_run:
+                try:
+                    db = _results_database(site_config)
+                    if db is not None:
+                        with db:
+                            session_id = db.store(json_report, report_file)
+                            if options.performance_compare:
+                                printer.info(performance_compare_report(
+                                    db.compare(session_id, **compare_args),
+                                    compare_descr
+                                ))
+
+                            if options.detect_perf_shifts is not None:
+                                printer.info(performance_shifts_report(
+                                    db.performance_shifts(
+                                        shifts_window, shifts_k,
+                                        target_id=session_id, **shifts_query
+                                    ),
+                                    shifts_window, shifts_k
+                                ))
+                    elif (options.performance_compare or
+                          options.detect_perf_shifts is not None):
+                        printer.warning('no results database is configured; '
+                                        'skipping the performance analysis')
+                except (errors.ReframeError, sqlite3.Error) as e:
+                    printer.warning(
+                        f'failed to access the results database: {e}'
+                    )
 
             # Generate the junit xml report for this session
             junit_report_file = rt.get_option('general/0/report_junit')
             if junit_report_file:
                 # Expand variables in filename
                 junit_report_file = osext.expandvars(junit_report_file)
-                junit_xml = runreport.junit_xml_report(json_report)
                 try:
-                    with open(junit_report_file, 'w') as fp:
-                        runreport.junit_dump(junit_xml, fp)
-                except OSError as e:
+                    runreport.junit_write(
+                        json_report, junit_report_file,
+                        rt.get_option('general/0/report_junit_stdout')
+                    )
+                except (OSError, ValueError) as e:
                     printer.warning(
                         f'failed to generate report in {junit_report_file!r}: '
                         f'{e}'
@@ -1515,4 +1858,7 @@ def main():
                 printer.info(logfiles_message())
 
             logging.getprofiler().exit_region()     # region: 'main'
+            logging.getprofiler().register_counters(
+                'sanity regex cache', sn._regex_cache_stats
+            )
             logging.getprofiler().print_report(printer.debug)
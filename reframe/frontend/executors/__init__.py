@@ -142,10 +142,17 @@ def clone_testcases(cases):
 
 class RegressionTask:
     '''A class representing a :class:`RegressionTest` through the regression
-    pipeline.'''
+    pipeline.
 
-    def __init__(self, case, listeners=None, timeout=None):
+    :arg snapshot: The format of the snapshot of the test that is saved in
+        its stage directory when it finishes successfully, so that it can be
+        restored later with ``--restore-session``. If :obj:`None`, no
+        snapshot is saved.
+    '''
+
+    def __init__(self, case, listeners=None, timeout=None, snapshot='json'):
         self._case = case
+        self._snapshot = snapshot
         self._failed_stage = None
         self._current_stage = 'startup'
         self._exc_info = (None, None, None)
@@ -379,17 +386,23 @@ class RegressionTask:
         self._perflogger = logging.getperflogger(self.check)
         self._safe_call(self.check.performance)
 
-    @logging.time_function
-    def finalize(self):
+    def _save_snapshot(self):
+        if self._snapshot is None:
+            return
+
         try:
             jsonfile = os.path.join(self.check.stagedir, '.rfm_testcase.json')
             with open(jsonfile, 'w') as fp:
-                jsonext.dump(self.check, fp, indent=2)
+                jsonext.dump(self.check, fp, separators=(',', ':'))
         except OSError as e:
             logging.getlogger().warning(
                 f'could not dump test case {self.testcase}: {e}'
             )
 
+    @logging.time_function
+    def finalize(self):
+        self._save_snapshot()
+
         self._current_stage = 'finalize'
         self._notify_listeners('on_task_success')
         self._perflogger.log_performance(logging.INFO, self,
@@ -502,6 +515,7 @@ class Runner:
 
         self._stats = TestStats()
         self._policy.stats = self._stats
+        self._policy.task_listeners.insert(0, self._stats)
         self._policy.printer = self._printer
         self._policy.max_failures = max_failures
 
@@ -559,11 +573,8 @@ class Runner:
         finally:
             # Print the summary line
             runid = None if self._global_stats else -1
-            num_aborted = len(self._stats.aborted(runid))
-            num_failures = len(self._stats.failed(runid))
-            num_completed = len(self._stats.completed(runid))
-            num_skipped = len(self._stats.skipped(runid))
-            num_tasks = self._stats.num_cases(runid)
+            num_aborted = self._stats.num_results('aborted', runid)
+            num_failures = self._stats.num_results('failure', runid)
             if num_failures > 0:
                 status = 'FAILED'
             elif num_aborted > 0:
@@ -573,8 +584,9 @@ class Runner:
 
             runid = None if self._global_stats else 0
             total_run = self._stats.num_cases(runid)
-            total_completed = len(self._stats.completed(runid))
-            total_skipped = len(self._stats.skipped(runid))
+            total_completed = (self._stats.num_results('success', runid) +
+                               self._stats.num_results('failure', runid))
+            total_skipped = self._stats.num_results('skipped', runid)
             self._printer.status(
                 status,
                 f'Ran {total_completed}/{total_run}'
@@ -649,6 +661,9 @@ class ExecutionPolicy(abc.ABC):
         self.task_listeners = []
         self.stats = None
 
+        # Format of the test case snapshots; `None` disables them
+        self.testcase_snapshot = 'json'
+
         # Expiration time
         self._t_expire = None
 
@@ -664,6 +679,20 @@ class ExecutionPolicy(abc.ABC):
     def enter(self):
         self._num_failed_tasks = 0
 
+    def _snapshot_format(self, case):
+        '''Return the format of the snapshot of the test case ``case``.
+
+        Snapshots are needed only for test cases that can be restored later,
+        i.e., test cases whose stage directory is kept after they finish.
+        This is the case if other test cases depend on them or if the stage
+        files are kept explicitly.
+        '''
+
+        if self.keep_stage_files or case.num_dependents:
+            return self.testcase_snapshot
+
+        return None
+
     def exit(self):
         pass
 
@@ -100,7 +100,8 @@ class SerialExecutionPolicy(ExecutionPolicy, TaskEventListener):
     def runcase(self, case):
         super().runcase(case)
         check, partition, _ = case
-        task = RegressionTask(case, self.task_listeners)
+        task = RegressionTask(case, self.task_listeners,
+                              snapshot=self._snapshot_format(case))
         if check.is_dry_run():
             self.printer.status('DRY', task.info())
         else:
@@ -326,7 +327,8 @@ class AsynchronousExecutionPolicy(ExecutionPolicy, TaskEventListener):
         self._partition_tasks.setdefault(partition.fullname, util.OrderedSet())
         self._max_jobs.setdefault(partition.fullname, partition.max_jobs)
 
-        task = RegressionTask(case, self.task_listeners)
+        task = RegressionTask(case, self.task_listeners,
+                              snapshot=self._snapshot_format(case))
         self._task_index[case] = task
         self.stats.add_task(task)
         getlogger().debug2(
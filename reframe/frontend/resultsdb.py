@@ -0,0 +1,697 @@
+# Copyright 2016-2023 Swiss National Supercomputing Centre (CSCS/ETH Zurich)
+# ReFrame Project Developers. See the top-level LICENSE file for details.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+import datetime
+import math
+import os
+import re
+import sqlite3
+import statistics
+import time
+
+import reframe.core.exceptions as errors
+
+
+# The version of the database schema; databases with a different version
+# are not compatible with this one
+SCHEMA_VERSION = 1
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS metadata (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    time_start REAL,
+    time_end REAL,
+    hostname TEXT,
+    user TEXT,
+    cmdline TEXT,
+    version TEXT,
+    report_file TEXT,
+    num_cases INTEGER,
+    num_failures INTEGER
+);
+CREATE TABLE IF NOT EXISTS testcases (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER REFERENCES sessions(id) ON DELETE CASCADE,
+    runid INTEGER,
+    name TEXT,
+    unique_name TEXT,
+    system TEXT,
+    partition TEXT,
+    environment TEXT,
+    result TEXT,
+    fail_phase TEXT,
+    fail_reason TEXT,
+    jobid TEXT,
+    time_total REAL,
+    timestamp REAL
+);
+CREATE TABLE IF NOT EXISTS perfvars (
+    testcase_id INTEGER REFERENCES testcases(id) ON DELETE CASCADE,
+    name TEXT,
+    value REAL,
+    reference REAL,
+    thres_lower REAL,
+    thres_upper REAL,
+    unit TEXT
+);
+CREATE INDEX IF NOT EXISTS index_sessions_time ON sessions(time_start);
+CREATE INDEX IF NOT EXISTS index_testcases_name
+    ON testcases(name, system, partition, environment, timestamp);
+CREATE INDEX IF NOT EXISTS index_testcases_system
+    ON testcases(system, partition, environment, timestamp);
+CREATE INDEX IF NOT EXISTS index_testcases_time ON testcases(timestamp);
+CREATE INDEX IF NOT EXISTS index_testcases_session ON testcases(session_id);
+CREATE INDEX IF NOT EXISTS index_perfvars_testcase ON perfvars(testcase_id);
+'''
+
+
+def _timestamp(timestr):
+    '''Convert a timestamp of the run report to seconds since the epoch.'''
+
+    if timestr is None:
+        return None
+
+    return datetime.datetime.strptime(timestr,
+                                      '%Y-%m-%dT%H:%M:%S%z').timestamp()
+
+
+_TIME_UNITS = {'m': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+
+def parse_time(spec, now=None):
+    '''Convert a time specification to seconds since the epoch.
+
+    The specification can be either an absolute date in ISO 8601 format,
+    e.g., ``2023-06-01`` or ``2023-06-01T12:00:00``, or a time period before
+    ``now`` of the form ``<N><unit>``, where ``unit`` is one of ``m``
+    (minutes), ``h`` (hours), ``d`` (days) or ``w`` (weeks), e.g., ``7d``.
+
+    :arg spec: The time specification.
+    :arg now: The time in seconds since the epoch that relative
+        specifications refer to. If :obj:`None`, the current time is used.
+    :returns: The time in seconds since the epoch.
+    :raises ValueError: If the time specification is invalid.
+    '''
+
+    match = re.fullmatch(r'(\d+(?:\.\d+)?)([mhdw])', spec)
+    if match:
+        if now is None:
+            now = time.time()
+
+        return now - float(match.group(1))*_TIME_UNITS[match.group(2)]
+
+    for fmt in ('%Y-%m-%d', '%Y-%m-%dT%H:%M', '%Y-%m-%dT%H:%M:%S'):
+        try:
+            return datetime.datetime.strptime(spec, fmt).timestamp()
+        except ValueError:
+            pass
+
+    raise ValueError(f'invalid time specification: {spec!r}')
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        return None
+
+    return numpy
+
+
+def _percentile(aggr):
+    '''Return the percentile of the aggregation ``aggr`` or :obj:`None` if
+    it is not a percentile.'''
+
+    if aggr == 'median':
+        return 50.0
+
+    match = re.fullmatch(r'p(\d+(?:\.\d+)?)', aggr)
+    if match and float(match.group(1)) <= 100:
+        return float(match.group(1))
+
+    if aggr in ('mean', 'min', 'max'):
+        return None
+
+    raise ValueError(f'invalid aggregation: {aggr!r}')
+
+
+def _aggregate(starts, values, aggr, last=None):
+    '''Aggregate the groups of a column of values.
+
+    :arg starts: The start index of each group in ``values``; the values of
+        a group are ordered from the most recent to the oldest.
+    :arg values: The column of values.
+    :arg aggr: The aggregation.
+    :arg last: Aggregate only the ``last`` most recent values of each group.
+    :returns: A tuple of the aggregated values and the number of values
+        aggregated for each group.
+    '''
+
+    q = _percentile(aggr)
+    np = _numpy()
+    if np is None:
+        ret, counts = [], []
+        for lo, hi in zip(starts, starts[1:] + [len(values)]):
+            group = values[lo:hi][:last]
+            counts.append(len(group))
+            if aggr == 'mean':
+                ret.append(math.fsum(group) / len(group))
+            elif aggr == 'min':
+                ret.append(min(group))
+            elif aggr == 'max':
+                ret.append(max(group))
+            else:
+                group = sorted(group)
+                pos = (len(group) - 1)*q / 100
+                lo, hi = math.floor(pos), math.ceil(pos)
+                ret.append(group[lo] + (group[hi] - group[lo])*(pos - lo))
+
+        return ret, counts
+
+    values = np.asarray(values, dtype=float)
+    starts = np.asarray(starts, dtype=int)
+    counts = np.diff(np.append(starts, len(values)))
+    group_ids = np.repeat(np.arange(len(starts)), counts)
+    if last is not None:
+        # Keep only the `last` values of each group
+        keep = np.arange(len(values)) - starts[group_ids] < last
+        values, group_ids = values[keep], group_ids[keep]
+        counts = np.minimum(counts, last)
+        starts = np.cumsum(counts) - counts
+
+    if aggr == 'mean':
+        ret = np.add.reduceat(values, starts) / counts
+    elif aggr == 'min':
+        ret = np.minimum.reduceat(values, starts)
+    elif aggr == 'max':
+        ret = np.maximum.reduceat(values, starts)
+    else:
+        # Sort the values within their groups and interpolate linearly
+        # between the closest ranks of all groups at once
+        values = values[np.lexsort((values, group_ids))]
+        pos = starts + (counts - 1)*q / 100
+        lo, hi = np.floor(pos).astype(int), np.ceil(pos).astype(int)
+        ret = values[lo] + (values[hi] - values[lo])*(pos - lo)
+
+    return ret.tolist(), counts.tolist()
+
+
+# Scale factor of the median absolute deviation (MAD), so that it estimates
+# the standard deviation of normally distributed values
+_MAD_SCALE = 1.4826
+
+
+def detect_shifts(values, window=10, k=3.0):
+    '''Detect the values that deviate significantly from their history.
+
+    Each value is compared against the median of the ``window`` values
+    preceding it and it is flagged if it deviates from it by more than ``k``
+    times the median absolute deviation (MAD) of these values, scaled so as
+    to estimate their standard deviation.
+
+    :arg values: The values in chronological order.
+    :arg window: The number of preceding values to compare each value with.
+    :arg k: The number of scaled MADs that a value may deviate from the
+        median of its preceding values.
+    :returns: A list of tuples of the index of each flagged value, the
+        median of its preceding values and its deviation from it in scaled
+        MADs; the deviation is infinite if all the preceding values are
+        equal.
+
+    NumPy is used for computing the rolling statistics, if it is available.
+    '''
+
+    if window <= 0:
+        raise ValueError(f'invalid window size: {window}')
+
+    if len(values) <= window:
+        return []
+
+    np = _numpy()
+    if np is None:
+        ret = []
+        for i in range(window, len(values)):
+            preceding = values[i-window:i]
+            med = statistics.median(preceding)
+            scale = _MAD_SCALE*statistics.median(abs(v - med)
+                                                 for v in preceding)
+            dev = abs(values[i] - med)
+            if dev > k*scale:
+                ret.append((i, med, dev/scale if scale else math.inf))
+
+        return ret
+
+    values = np.asarray(values, dtype=float)
+    stride, = values.strides
+
+    # Row `i` of the view holds the `window` values preceding value
+    # `i + window`
+    preceding = np.lib.stride_tricks.as_strided(
+        values, shape=(len(values) - window, window),
+        strides=(stride, stride), writeable=False
+    )
+    med = np.median(preceding, axis=1)
+    scale = _MAD_SCALE*np.median(np.abs(preceding - med[:, None]), axis=1)
+    dev = np.abs(values[window:] - med)
+    flagged, = np.nonzero(dev > k*scale)
+    with np.errstate(divide='ignore'):
+        score = dev[flagged] / scale[flagged]
+
+    return list(zip((flagged + window).tolist(),
+                    med[flagged].tolist(), score.tolist()))
+
+
+def _testcase_conditions(time_from=None, time_to=None,
+                         exclude_session=None, **kwargs):
+    '''Return the SQL conditions and their parameters for selecting test
+    cases from the ``testcases`` table aliased as ``t``.'''
+
+    conditions, params = [], []
+    for column in ('name', 'system', 'partition',
+                   'environment', 'session_id', 'result'):
+        value = kwargs.get(column)
+        if value is not None:
+            conditions.append(f't.{column} = ?')
+            params.append(value)
+
+    if time_from is not None:
+        conditions.append('t.timestamp >= ?')
+        params.append(time_from)
+
+    if time_to is not None:
+        conditions.append('t.timestamp < ?')
+        params.append(time_to)
+
+    if exclude_session is not None:
+        conditions.append('t.session_id != ?')
+        params.append(exclude_session)
+
+    return conditions, params
+
+
+class ResultsDB:
+    '''A database of the results of past sessions.
+
+    The database stores the sessions, the test cases and their performance
+    variables, as these are recorded in the run reports, and is indexed by
+    test name, system, partition, environment and time, so that the history
+    of a test can be retrieved without loading the run reports.
+
+    The database may be used as a context manager, in which case it is
+    closed on exit.
+
+    :arg filename: The file of the database; it is created if it does not
+        exist.
+    :raises ReframeError: If the database cannot be opened or it has an
+        incompatible schema.
+
+    .. versionadded:: 4.6
+    '''
+
+    def __init__(self, filename):
+        self._filename = filename
+        dirname = os.path.dirname(filename)
+        try:
+            if dirname:
+                os.makedirs(dirname, exist_ok=True)
+
+            self._conn = sqlite3.connect(filename)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute('PRAGMA foreign_keys = ON')
+            with self._conn:
+                self._conn.executescript(_SCHEMA)
+                self._conn.execute(
+                    'INSERT OR IGNORE INTO metadata VALUES '
+                    "('schema_version', ?)", (str(SCHEMA_VERSION),)
+                )
+
+            version, = self._conn.execute(
+                "SELECT value FROM metadata WHERE key = 'schema_version'"
+            ).fetchone()
+        except (OSError, sqlite3.Error) as err:
+            raise errors.ReframeError(
+                f'could not open results database {filename!r}'
+            ) from err
+
+        if version != str(SCHEMA_VERSION):
+            self._conn.close()
+            raise errors.ReframeError(
+                f'incompatible results database {filename!r}: '
+                f'schema version {version} != {SCHEMA_VERSION}'
+            )
+
+    @property
+    def filename(self):
+        return self._filename
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def store(self, report, report_file=None):
+        '''Store a run report in the database.
+
+        All the runs of the session and its performance variables are
+        stored. Restored test cases are not stored, since they belong to the
+        session they were restored from.
+
+        :arg report: The run report as a :class:`dict`.
+        :arg report_file: The file where the run report is saved.
+        :returns: The id of the stored session.
+        '''
+
+        session_info = report['session_info']
+        time_start = _timestamp(session_info.get('time_start'))
+        with self._conn:
+            cursor = self._conn.execute(
+                'INSERT INTO sessions (time_start, time_end, hostname, user, '
+                'cmdline, version, report_file, num_cases, num_failures) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (time_start,
+                 _timestamp(session_info.get('time_end')),
+                 session_info.get('hostname'),
+                 session_info.get('user'),
+                 session_info.get('cmdline'),
+                 session_info.get('version'),
+                 report_file,
+                 session_info.get('num_cases'),
+                 session_info.get('num_failures'))
+            )
+            session_id = cursor.lastrowid
+            for run in report['runs']:
+                for tc in run['testcases']:
+                    system, _, partition = tc['system'].partition(':')
+                    cursor = self._conn.execute(
+                        'INSERT INTO testcases (session_id, runid, name, '
+                        'unique_name, system, partition, environment, '
+                        'result, fail_phase, fail_reason, jobid, time_total, '
+                        'timestamp) '
+                        'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                        (session_id, run['runid'], tc['name'],
+                         tc['unique_name'], system, partition or None,
+                         tc['environment'], tc['result'], tc['fail_phase'],
+                         tc['fail_reason'], tc['jobid'], tc['time_total'],
+                         time_start)
+                    )
+                    testcase_id = cursor.lastrowid
+                    self._conn.executemany(
+                        'INSERT INTO perfvars VALUES (?, ?, ?, ?, ?, ?, ?)',
+                        ((testcase_id, pv['name'], pv['value'],
+                          pv['reference'], pv['thres_lower'],
+                          pv['thres_upper'], pv['unit'])
+                         for pv in tc['perfvars'] or [])
+                    )
+
+        return session_id
+
+    def sessions(self, time_from=None, time_to=None):
+        '''Retrieve the stored sessions.
+
+        :arg time_from: Retrieve sessions started at or after this time in
+            seconds since the epoch.
+        :arg time_to: Retrieve sessions started before this time in seconds
+            since the epoch.
+        :returns: A list of :class:`dict` objects, one for each session,
+            ordered by their start time.
+        '''
+
+        conditions, params = [], []
+        if time_from is not None:
+            conditions.append('time_start >= ?')
+            params.append(time_from)
+
+        if time_to is not None:
+            conditions.append('time_start < ?')
+            params.append(time_to)
+
+        query = 'SELECT * FROM sessions'
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+
+        query += ' ORDER BY time_start, id'
+        return [dict(row) for row in self._conn.execute(query, params)]
+
+    def testcases(self, name=None, system=None, partition=None,
+                  environment=None, time_from=None, time_to=None,
+                  session_id=None, result=None):
+        '''Retrieve the stored test cases along with their performance
+        variables.
+
+        All the arguments are optional and narrow down the retrieved test
+        cases.
+
+        :arg name: The name of the test.
+        :arg system: The system the test case ran on.
+        :arg partition: The system partition the test case ran on.
+        :arg environment: The programming environment of the test case.
+        :arg time_from: Retrieve test cases of sessions started at or after
+            this time in seconds since the epoch.
+        :arg time_to: Retrieve test cases of sessions started before this
+            time in seconds since the epoch.
+        :arg session_id: Retrieve the test cases of this session only.
+        :arg result: The result of the test case, e.g., ``'success'``.
+        :returns: A list of :class:`dict` objects, one for each test case,
+            ordered by time. The performance variables of each test case are
+            stored in its ``perfvars`` key as a list of :class:`dict`
+            objects.
+        '''
+
+        conditions, params = _testcase_conditions(
+            name=name, system=system, partition=partition,
+            environment=environment, time_from=time_from, time_to=time_to,
+            session_id=session_id, result=result
+        )
+        query = 'SELECT * FROM testcases AS t'
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+
+        query += ' ORDER BY timestamp, id'
+        testcases = {}
+        for row in self._conn.execute(query, params):
+            tc = dict(row)
+            tc['perfvars'] = []
+            testcases[tc['id']] = tc
+
+        # Retrieve the performance variables of all the test cases at once
+        ids = list(testcases.keys())
+        chunk_size = 500
+        for i in range(0, len(ids), chunk_size):
+            chunk = ids[i:i+chunk_size]
+            placeholders = ', '.join('?' for _ in chunk)
+            query = ('SELECT * FROM perfvars '
+                     f'WHERE testcase_id IN ({placeholders})')
+            for row in self._conn.execute(query, chunk):
+                pv = dict(row)
+                testcases[pv.pop('testcase_id')]['perfvars'].append(pv)
+
+        return list(testcases.values())
+
+    def aggregate_perfvars(self, aggr='median', last=None, **kwargs):
+        '''Aggregate the history of the performance variables.
+
+        The values of each performance variable are aggregated separately
+        for each test, system, partition, environment and unit.
+
+        :arg aggr: The aggregation to apply; one of ``mean``, ``median``,
+            ``min``, ``max`` or ``pNN``, where ``NN`` is a percentile between
+            0 and 100, e.g., ``p90``.
+        :arg last: Aggregate only the ``last`` most recent values of each
+            performance variable.
+        :arg kwargs: Any additional arguments to narrow down the test cases
+            as in :func:`testcases`. The ``exclude_session`` argument
+            excludes the test cases of a session.
+        :returns: A :class:`dict` mapping the tuples ``(name, system,
+            partition, environment, perfvar, unit)`` to tuples of the
+            aggregated value and the number of values aggregated.
+        :raises ValueError: If the aggregation is invalid.
+
+        NumPy is used for the aggregation, if it is available.
+        '''
+
+        # Validate the aggregation before querying
+        _percentile(aggr)
+        if last is not None and last <= 0:
+            raise ValueError(f'invalid number of values: {last}')
+
+        conditions, params = _testcase_conditions(**kwargs)
+        conditions.append('p.value IS NOT NULL')
+        query = ('SELECT t.name, t.system, t.partition, t.environment, '
+                 'p.name, p.unit, p.value FROM testcases AS t '
+                 'JOIN perfvars AS p ON p.testcase_id = t.id '
+                 'WHERE ' + ' AND '.join(conditions) + ' '
+                 'ORDER BY t.name, t.system, t.partition, t.environment, '
+                 'p.name, p.unit, t.timestamp DESC, t.id DESC')
+        rows = self._conn.execute(query, params).fetchall()
+        if not rows:
+            return {}
+
+        # Split the rows into columns of keys and values
+        keys = [tuple(r[:6]) for r in rows]
+        values = [r[6] for r in rows]
+        starts = [0] + [i for i in range(1, len(keys))
+                        if keys[i] != keys[i-1]]
+        aggregated, counts = _aggregate(starts, values, aggr, last)
+        return {keys[i]: (val, cnt)
+                for i, val, cnt in zip(starts, aggregated, counts)}
+
+    def compare(self, target_id, aggr='median', last=None, **kwargs):
+        '''Compare the performance of a session against a baseline.
+
+        The baseline of each performance variable is the aggregation of its
+        values in the past sessions, excluding the session being compared.
+        A value is flagged as a regression if it lies outside the
+        thresholds of its reference when these are applied to the
+        baseline.
+
+        :arg target_id: The id of the session to compare.
+        :arg aggr: The aggregation of the baseline values as in
+            :func:`aggregate_perfvars`.
+        :arg last: Use only the ``last`` most recent values of each
+            performance variable for the baseline.
+        :arg kwargs: Any additional arguments to narrow down the test cases
+            of the baseline as in :func:`testcases`.
+        :returns: A list of :class:`dict` objects, one for each performance
+            variable of the session.
+        '''
+
+        baseline = self.aggregate_perfvars(aggr, last,
+                                           exclude_session=target_id,
+                                           **kwargs)
+        ret = []
+        for tc in self.testcases(session_id=target_id):
+            for pv in tc['perfvars']:
+                key = (tc['name'], tc['system'], tc['partition'],
+                       tc['environment'], pv['name'], pv['unit'])
+                base, count = baseline.get(key, (None, 0))
+                value, diff, regression = pv['value'], None, False
+                if base is not None and value is not None:
+                    if base != 0:
+                        diff = 100*(value - base) / abs(base)
+
+                    lower, upper = pv['thres_lower'], pv['thres_upper']
+                    regression = (
+                        (lower is not None and
+                         value < base + abs(base)*lower) or
+                        (upper is not None and value > base + abs(base)*upper)
+                    )
+
+                ret.append({
+                    'name': tc['name'],
+                    'system': tc['system'],
+                    'partition': tc['partition'],
+                    'environment': tc['environment'],
+                    'perfvar': pv['name'],
+                    'unit': pv['unit'],
+                    'value': value,
+                    'baseline': base,
+                    'count': count,
+                    'diff': diff,
+                    'regression': regression
+                })
+
+        return ret
+
+    def performance_shifts(self, window=10, k=3.0, target_id=None,
+                           **kwargs):
+        '''Detect statistically significant shifts in the history of the
+        performance variables.
+
+        The history of each performance variable is examined separately for
+        each test, system, partition, environment and unit using
+        :func:`detect_shifts`.
+
+        :arg window: The number of preceding values to compare each value
+            with.
+        :arg k: The number of scaled MADs that a value may deviate from the
+            median of its preceding values.
+        :arg target_id: Report only the shifts in the values of this
+            session. If :obj:`None`, all the shifts in the history are
+            reported.
+        :arg kwargs: Any additional arguments to narrow down the test cases
+            as in :func:`testcases`.
+        :returns: A list of :class:`dict` objects, one for each flagged
+            value, in chronological order for each performance variable.
+        '''
+
+        conditions, params = _testcase_conditions(**kwargs)
+        conditions.append('p.value IS NOT NULL')
+        query = ('SELECT t.name, t.system, t.partition, t.environment, '
+                 'p.name, p.unit, p.value, t.session_id, t.timestamp '
+                 'FROM testcases AS t '
+                 'JOIN perfvars AS p ON p.testcase_id = t.id '
+                 'WHERE ' + ' AND '.join(conditions) + ' '
+                 'ORDER BY t.name, t.system, t.partition, t.environment, '
+                 'p.name, p.unit, t.timestamp, t.id')
+        rows = self._conn.execute(query, params).fetchall()
+        keys = [tuple(r[:6]) for r in rows]
+        starts = [0] + [i for i in range(1, len(keys))
+                        if keys[i] != keys[i-1]]
+        ret = []
+        for lo, hi in zip(starts, starts[1:] + [len(rows)]):
+            group = rows[lo:hi]
+            if (target_id is not None and
+                not any(r[7] == target_id for r in group)):
+                continue
+
+            for i, median, score in detect_shifts([r[6] for r in group],
+                                                  window, k):
+                row = group[i]
+                if target_id is not None and row[7] != target_id:
+                    continue
+
+                ret.append({
+                    'name': row[0],
+                    'system': row[1],
+                    'partition': row[2],
+                    'environment': row[3],
+                    'perfvar': row[4],
+                    'unit': row[5],
+                    'value': row[6],
+                    'session_id': row[7],
+                    'timestamp': row[8],
+                    'median': median,
+                    'diff': (100*(row[6] - median) / abs(median)
+                             if median else None),
+                    'score': score
+                })
+
+        return ret
+
+    def perfvars(self, name, perfvar=None, **kwargs):
+        '''Retrieve the history of the performance variables of a test.
+
+        :arg name: The name of the test.
+        :arg perfvar: The name of the performance variable to retrieve. If
+            :obj:`None`, all the performance variables are retrieved.
+        :arg kwargs: Any additional arguments to narrow down the test cases
+            as in :func:`testcases`.
+        :returns: A list of :class:`dict` objects, one for each performance
+            variable value, ordered by time. Each entry contains also the
+            ``system``, ``partition``, ``environment``, ``session_id`` and
+            ``timestamp`` of its test case.
+        '''
+
+        ret = []
+        for tc in self.testcases(name, **kwargs):
+            for pv in tc['perfvars']:
+                if perfvar is not None and pv['name'] != perfvar:
+                    continue
+
+                entry = {k: tc[k] for k in ('system', 'partition',
+                                            'environment', 'session_id',
+                                            'timestamp')}
+                entry.update(pv)
+                ret.append(entry)
+
+        return ret
@@ -3,20 +3,27 @@
 #
 # SPDX-License-Identifier: BSD-3-Clause
 
+import collections
 import decimal
 import functools
+import hashlib
+import io
 import json
 import jsonschema
 import lxml.etree as etree
+import lzma
 import os
 import re
 
 import reframe as rfm
 import reframe.core.exceptions as errors
+import reframe.core.runtime as runtime
 import reframe.utility.jsonext as jsonext
 import reframe.utility.osext as osext
 from reframe.core.logging import getlogger
 from reframe.core.warnings import suppress_deprecations
+from reframe.frontend.executors import TaskEventListener
+from reframe.frontend.statistics import testcase_entry
 
 # The schema data version
 # Major version bumps are expected to break the validation of previous schemas
@@ -55,13 +62,20 @@ class _RunReport:
     def add_fallback(self, report):
         self._fallbacks.append(report)
 
+    def _lookup(self, key):
+        return self._cases_index.get(key)
+
+    def _last_run_cases(self, props):
+        return self._report['runs'][-1]['testcases']
+
     def slice(self, prop, when=None, unique=False):
         '''Slice the report on property ``prop``.'''
 
         if unique:
             returned = set()
 
-        for tc in self._report['runs'][-1]['testcases']:
+        props = {prop} if when is None else {prop, when[0]}
+        for tc in self._last_run_cases(props):
             val = tc[prop]
             if unique and val in returned:
                 continue
@@ -79,11 +93,11 @@ class _RunReport:
 
     def case(self, check, part, env):
         c, p, e = check.unique_name, part.fullname, env.name
-        ret = self._cases_index.get((c, p, e))
+        ret = self._lookup((c, p, e))
         if ret is None:
             # Look up the case in the fallback reports
             for rpt in self._fallbacks:
-                ret = rpt._cases_index.get((c, p, e))
+                ret = rpt._lookup((c, p, e))
                 if ret is not None:
                     break
 
@@ -121,6 +135,269 @@ class _RunReport:
                 f'could not restore testcase {testcase!r}') from e
 
 
+class _IndexedRunReport(_RunReport):
+    '''A run report whose test cases are read from the report file on
+    demand using the report index.
+
+    The full report is loaded only if it is accessed directly.
+    '''
+
+    def __init__(self, filename, index):
+        self._filename = filename
+        self._fallbacks = []
+        self._full_report = None
+        self._cases = {}
+
+        # Later entries take precedence as in the full report
+        self._cases_index = {(c, p, e): (offset, size)
+                             for c, p, e, offset, size in index['cases']}
+        self._last_run = index['last_run']
+
+    @property
+    def _report(self):
+        if self._full_report is None:
+            with osext.open_compressed(self._filename) as fp:
+                self._full_report = json.load(fp)
+
+        return self._full_report
+
+    def _read_case(self, offset, size):
+        try:
+            return self._cases[offset]
+        except KeyError:
+            pass
+
+        with osext.open_compressed(self._filename, 'rb') as fp:
+            fp.seek(offset)
+            tc = json.loads(fp.read(size).decode())
+
+        self._cases[offset] = tc
+        return tc
+
+    def _lookup(self, key):
+        try:
+            return self._read_case(*self._cases_index[key])
+        except KeyError:
+            return None
+
+    def _last_run_cases(self, props):
+        if props <= set(_INDEX_PROPS):
+            return (dict(zip(_INDEX_PROPS, values))
+                    for *_, values in self._last_run)
+
+        return (self._read_case(offset, size)
+                for offset, size, _ in self._last_run)
+
+
+# The version of the report index format
+_INDEX_VERSION = 1
+
+# The test case properties stored in the report index for the last run
+_INDEX_PROPS = ('environment', 'fail_phase', 'filename', 'name',
+                'result', 'system', 'unique_name')
+
+
+def index_filename(report_filename):
+    '''Return the name of the index of the run report
+    ``report_filename``.'''
+    return f'{report_filename}.index'
+
+
+_JSON_WS = re.compile(r'[ \t\n\r]*')
+
+
+class _ReportScanner:
+    '''Decode a run report recording the position of its test cases.'''
+
+    def __init__(self, text):
+        self._text = text
+        self._decoder = json.JSONDecoder()
+
+        # Tuples of the decoded test cases, whether they belong to the last
+        # run and their start and end positions in the text
+        self.cases = []
+
+    def _skip_ws(self, idx):
+        return _JSON_WS.match(self._text, idx).end()
+
+    def _error(self, msg, idx):
+        return json.JSONDecodeError(msg, self._text, idx)
+
+    def _sequence(self, idx, open_char, close_char, decode_item):
+        '''Decode the JSON object or array at ``idx`` using
+        ``decode_item(idx)`` to decode each item.'''
+
+        if self._text[idx:idx+1] != open_char:
+            raise self._error(f'expecting {open_char!r}', idx)
+
+        idx = self._skip_ws(idx + 1)
+        if self._text[idx:idx+1] == close_char:
+            return idx + 1
+
+        while True:
+            idx = self._skip_ws(decode_item(self._skip_ws(idx)))
+            char = self._text[idx:idx+1]
+            if char == close_char:
+                return idx + 1
+            elif char != ',':
+                raise self._error(f'expecting {close_char!r} or \',\'', idx)
+
+            idx += 1
+
+    def _object(self, idx, decode_member):
+        obj = {}
+
+        def _decode_item(idx):
+            if self._text[idx:idx+1] != '"':
+                raise self._error('expecting property name', idx)
+
+            key, idx = json.decoder.scanstring(self._text, idx + 1)
+            idx = self._skip_ws(idx)
+            if self._text[idx:idx+1] != ':':
+                raise self._error("expecting ':'", idx)
+
+            obj[key], idx = decode_member(key, self._skip_ws(idx + 1))
+            return idx
+
+        return obj, self._sequence(idx, '{', '}', _decode_item)
+
+    def _array(self, idx, decode_element):
+        array = []
+
+        def _decode_item(idx):
+            elem, idx = decode_element(idx)
+            array.append(elem)
+            return idx
+
+        return array, self._sequence(idx, '[', ']', _decode_item)
+
+    def _value(self, idx):
+        return self._decoder.raw_decode(self._text, idx)
+
+    def _testcases(self, idx, last_run):
+        def _decode_testcase(idx):
+            tc, end = self._value(idx)
+            self.cases.append((tc, last_run, idx, end))
+            return tc, end
+
+        return self._array(idx, _decode_testcase)
+
+    def decode(self):
+        runs = []
+
+        def _decode_run(key, idx):
+            if key == 'testcases':
+                return self._testcases(idx, False)
+
+            return self._value(idx)
+
+        def _decode_runs(idx):
+            run, idx = self._object(idx, _decode_run)
+            runs.append(run)
+            return run, idx
+
+        def _decode_report(key, idx):
+            if key == 'runs':
+                return self._array(idx, _decode_runs)
+            elif key == 'restored_cases':
+                return self._testcases(idx, False)
+
+            return self._value(idx)
+
+        report, idx = self._object(self._skip_ws(0), _decode_report)
+        if self._skip_ws(idx) != len(self._text):
+            raise self._error('extra data', idx)
+
+        # Mark the test cases of the last run
+        if runs and isinstance(runs[-1].get('testcases'), list):
+            last_run = {id(tc) for tc in runs[-1]['testcases']}
+            self.cases = [(tc, id(tc) in last_run, start, end)
+                          for tc, _, start, end in self.cases]
+
+        return report
+
+
+def _build_index(data, digest):
+    '''Decode the report ``data`` and build its index.
+
+    Return a tuple of the decoded report and its index.
+    '''
+
+    text = data.decode()
+    scanner = _ReportScanner(text)
+    report = scanner.decode()
+
+    # Convert the character positions to byte offsets, if needed
+    positions = sorted({pos for *_, start, end in scanner.cases
+                        for pos in (start, end)})
+    offsets = {}
+    if len(text) == len(data):
+        offsets = {pos: pos for pos in positions}
+    else:
+        nbytes, last_pos = 0, 0
+        for pos in positions:
+            nbytes += len(text[last_pos:pos].encode())
+            offsets[pos] = nbytes
+            last_pos = pos
+
+    index = {
+        'version': _INDEX_VERSION,
+        'hash': digest,
+        'cases': [],
+        'last_run': []
+    }
+    for tc, last_run, start, end in scanner.cases:
+        offset, size = offsets[start], offsets[end] - offsets[start]
+        if not isinstance(tc, dict):
+            # This is not a valid report; it will fail validation
+            continue
+
+        index['cases'].append([tc.get('unique_name'), tc.get('system'),
+                               tc.get('environment'), offset, size])
+        if last_run:
+            index['last_run'].append(
+                [offset, size, [tc.get(p) for p in _INDEX_PROPS]]
+            )
+
+    return report, index
+
+
+def _file_digest(filename):
+    h = hashlib.sha256()
+    with open(filename, 'rb') as fp:
+        for chunk in iter(functools.partial(fp.read, 1 << 20), b''):
+            h.update(chunk)
+
+    return h.hexdigest()
+
+
+def _load_index(filename, digest):
+    '''Load the index of the report ``filename`` or return :obj:`None` if
+    there is no valid index for its current contents.'''
+
+    try:
+        with open(index_filename(filename)) as fp:
+            index = json.load(fp)
+    except (OSError, ValueError):
+        return None
+
+    if (not isinstance(index, dict) or
+        index.get('version') != _INDEX_VERSION or
+        index.get('hash') != digest):
+        return None
+
+    return index
+
+
+def _save_index(filename, index):
+    index_file = index_filename(filename)
+    try:
+        with open(index_file, 'w') as fp:
+            json.dump(index, fp)
+    except OSError as e:
+        getlogger().debug(f'could not save report index {index_file!r}: {e}')
+
+
 def next_report_filename(filepatt, new=True):
     if '{sessionid}' not in filepatt:
         return filepatt
@@ -140,27 +417,168 @@ def next_report_filename(filepatt, new=True):
     return filepatt.format(sessionid=new_id)
 
 
-def _load_report(filename):
-    try:
-        with open(filename) as fp:
-            report = json.load(fp)
-    except OSError as e:
-        raise errors.ReframeError(
-            f'failed to load report file {filename!r}') from e
-    except json.JSONDecodeError as e:
-        raise errors.ReframeError(
-            f'report file {filename!r} is not a valid JSON file') from e
+class RunReportJournal(TaskEventListener):
+    '''An append-only journal of the run report of a session.
+
+    The journal is a file of JSON records, one per line. The session
+    information and the restored test cases are recorded when the session
+    starts and an entry is recorded for every test case as soon as it
+    finishes, so that the report of a session that was killed can still be
+    recovered. The run report is assembled from the journal using
+    :func:`load_journal`. The entries are recorded before the cleanup of the
+    test cases, so the report of a session that finished is built from its
+    statistics instead.
+
+    :arg filename: The journal file.
+    :arg stats: The :class:`~reframe.frontend.statistics.TestStats` of the
+        session to take the entries of the test cases from. If :obj:`None`,
+        the entries are generated by the journal.
+    '''
+
+    def __init__(self, filename, stats=None):
+        self._filename = filename
+        self._stats = stats
+        self._fp = open(filename, 'w')
+
+    @property
+    def filename(self):
+        return self._filename
+
+    def _write(self, record):
+        if self._fp.closed:
+            return
+
+        self._fp.write(jsonext.dumps(record) + '\n')
+
+        # Make sure that the record is written, in case we crash
+        self._fp.flush()
+
+    def write_session_info(self, session_info):
+        '''Record the session information.
+
+        The information of multiple records is merged.
+        '''
+        self._write({'session_info': session_info})
+
+    def write_restored_cases(self, restored_cases):
+        self._write({'restored_cases': restored_cases})
+
+    def close(self):
+        self._fp.close()
+
+    def _write_testcase(self, task):
+        if self._stats is not None:
+            entry = self._stats.testcase_entry(task)
+        else:
+            entry = testcase_entry(task)
+
+        self._write({
+            'runid': runtime.runtime().current_run,
+            'testcase': entry
+        })
+
+    def on_task_setup(self, task):
+        pass
+
+    def on_task_run(self, task):
+        pass
+
+    def on_task_compile(self, task):
+        pass
+
+    def on_task_exit(self, task):
+        pass
+
+    def on_task_compile_exit(self, task):
+        pass
+
+    def on_task_skip(self, task):
+        self._write_testcase(task)
+
+    def on_task_failure(self, task):
+        self._write_testcase(task)
+
+    def on_task_abort(self, task):
+        self._write_testcase(task)
+
+    def on_task_success(self, task):
+        self._write_testcase(task)
+
+
+def journal_filename(report_filename):
+    '''Return the name of the journal of the run report
+    ``report_filename``.'''
+    return f'{report_filename}.journal'
+
+
+def load_journal(filename):
+    '''Assemble the run report from the journal ``filename``.
+
+    If a test case has been recorded multiple times in a run, e.g., because
+    it failed during cleanup after it had succeeded, its last entry is used.
+    Records that cannot be decoded, e.g., the last record of a session that
+    was killed while writing it, are ignored.
+    '''
+
+    session_info = {}
+    restored_cases = []
+    runs = {}
+    with open(filename) as fp:
+        for lineno, line in enumerate(fp, start=1):
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                getlogger().warning(
+                    f'{filename}:{lineno}: ignoring invalid journal record'
+                )
+                continue
 
-    # Validate the report
+            if 'session_info' in record:
+                session_info.update(record['session_info'])
+            elif 'restored_cases' in record:
+                restored_cases += record['restored_cases']
+            elif 'testcase' in record:
+                tc = record['testcase']
+                key = (tc['unique_name'], tc['system'], tc['environment'])
+                runs.setdefault(record['runid'], {})[key] = tc
+
+    run_data = []
+    for runid in sorted(runs) or [0]:
+        testcases = list(runs.get(runid, {}).values())
+        results = [tc['result'] for tc in testcases]
+        run_data.append({
+            'num_cases': len(testcases),
+            'num_failures': results.count('failure'),
+            'num_aborted': results.count('aborted'),
+            'num_skipped': results.count('skipped'),
+            'runid': runid,
+            'testcases': testcases
+        })
+
+    session_info.update({
+        'num_cases': run_data[0]['num_cases'],
+        'num_failures': run_data[-1]['num_failures']
+    })
+    return {
+        'session_info': session_info,
+        'runs': run_data,
+        'restored_cases': restored_cases
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def _schema():
     with open(_SCHEMA) as fp:
-        schema = json.load(fp)
+        return json.load(fp)
 
+
+def _validate_report(report, filename):
     try:
-        jsonschema.validate(report, schema)
+        jsonschema.validate(report, _schema())
     except jsonschema.ValidationError as e:
         try:
             found_ver = report['session_info']['data_version']
-        except KeyError:
+        except (KeyError, TypeError):
             found_ver = 'n/a'
 
         raise errors.ReframeError(
@@ -168,6 +586,40 @@ def _load_report(filename):
             f'(required data version: {DATA_VERSION}), found: {found_ver})'
         ) from e
 
+
+def _load_report(filename):
+    filename = str(filename)
+    journal = journal_filename(filename)
+    if not os.path.exists(filename) and os.path.exists(journal):
+        # The session did not finish; restore its report from its journal
+        getlogger().debug(f'report file {filename!r} not found; '
+                          f'reading its journal')
+        filename = journal
+
+    try:
+        if filename.endswith('.journal'):
+            report = load_journal(filename)
+            _validate_report(report, filename)
+            return _RunReport(report)
+
+        # Reports that have been validated before have a valid index for
+        # their current contents
+        digest = _file_digest(filename)
+        index = _load_index(filename, digest)
+        if index is not None:
+            return _IndexedRunReport(filename, index)
+
+        with osext.open_compressed(filename, 'rb') as fp:
+            report, index = _build_index(fp.read(), digest)
+    except (OSError, EOFError, lzma.LZMAError) as e:
+        raise errors.ReframeError(
+            f'failed to load report file {filename!r}') from e
+    except ValueError as e:
+        raise errors.ReframeError(
+            f'report file {filename!r} is not a valid JSON file') from e
+
+    _validate_report(report, filename)
+    _save_index(filename, index)
     return _RunReport(report)
 
 
@@ -183,7 +635,20 @@ def load_report(*filenames):
 
 
 def write_report(report, filename, compress=False, link_to_last=False):
-    with open(filename, 'w') as fp:
+    '''Write the run report to ``filename``.
+
+    The report is gzip- or xz-compressed as it is written if ``filename``
+    ends in ``.gz`` or ``.xz``, respectively.
+
+    :arg report: The run report.
+    :arg filename: The file to write the report to.
+    :arg compress: Write the report without any indentation.
+    :arg link_to_last: Create a symlink named ``latest.json`` pointing to
+        the report in the same directory; the symlink has also the
+        compression suffix of the report, if any.
+    '''
+
+    with osext.open_compressed(filename, 'w') as fp:
         if compress:
             jsonext.dump(report, fp)
         else:
@@ -197,6 +662,9 @@ def write_report(report, filename, compress=False, link_to_last=False):
         basedir = os.path.dirname(filename)
         with osext.change_dir(basedir):
             link_name = 'latest.json'
+            for suffix in ('.gz', '.xz'):
+                if str(filename).endswith(suffix):
+                    link_name += suffix
             create_symlink = functools.partial(
                 os.symlink, os.path.basename(filename), link_name
             )
@@ -212,57 +680,122 @@ def write_report(report, filename, compress=False, link_to_last=False):
                                         'path exists and is not a symlink')
 
 
-def junit_xml_report(json_report):
-    '''Generate a JUnit report from a standard ReFrame JSON report.'''
+# Characters that are not allowed in XML documents
+_XML_INVALID_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def _junit_testcase_stdout(tc, num_lines):
+    '''Return the last ``num_lines`` lines of the standard output of a test
+    case or :obj:`None` if it is not available.'''
 
-    xml_testsuites = etree.Element('testsuites')
-    for run_id, rfm_run in enumerate(json_report['runs']):
-        xml_testsuite = etree.SubElement(
-            xml_testsuites, 'testsuite',
-            attrib={
-                'errors': '0',
-                'failures': str(rfm_run['num_failures']),
-                'hostname': json_report['session_info']['hostname'],
-                'id': str(run_id),
-                'name': f'ReFrame run {run_id}',
-                'package': 'reframe',
-                'tests': str(rfm_run['num_cases']),
-                'time': str(json_report['session_info']['time_elapsed']),
-
-                # XSD schema does not like the timezone format, so we remove it
-                'timestamp': json_report['session_info']['time_start'][:-5],
-            }
+    stdout = tc.get('job_stdout')
+    prefix = tc.get('outputdir') or tc.get('stagedir')
+    if not stdout or not prefix:
+        return None
+
+    try:
+        with open(os.path.join(prefix, stdout), errors='replace') as fp:
+            lines = collections.deque(fp, maxlen=num_lines)
+    except OSError:
+        return None
+
+    return _XML_INVALID_CHARS.sub('', ''.join(lines))
+
+
+def _junit_testcase(tc, stdout_lines=0):
+    casename = f"{tc['unique_name']}[{tc['system']}, {tc['environment']}]"
+    testcase = etree.Element(
+        'testcase',
+        attrib={
+            'classname': tc['filename'],
+            'name': casename,
+
+            # XSD schema does not like the exponential format and since
+            # we do not want to impose a fixed width, we pass it to
+            # `Decimal` to format it automatically.
+            'time': str(decimal.Decimal(tc['time_total'] or 0)),
+        }
+    )
+    if tc['result'] == 'failure':
+        testcase_msg = etree.SubElement(
+            testcase, 'failure', attrib={'type': 'failure',
+                                         'message': tc['fail_phase']}
         )
-        testsuite_properties = etree.SubElement(xml_testsuite, 'properties')
-        for tc in rfm_run['testcases']:
-            casename = (
-                f"{tc['unique_name']}[{tc['system']}, {tc['environment']}]"
-            )
-            testcase = etree.SubElement(
-                xml_testsuite, 'testcase',
-                attrib={
-                    'classname': tc['filename'],
-                    'name': casename,
-
-                    # XSD schema does not like the exponential format and since
-                    # we do not want to impose a fixed width, we pass it to
-                    # `Decimal` to format it automatically.
-                    'time': str(decimal.Decimal(tc['time_total'] or 0)),
+        testcase_msg.text = f"{tc['fail_phase']}: {tc['fail_reason']}"
+
+    if stdout_lines:
+        stdout = _junit_testcase_stdout(tc, stdout_lines)
+        if stdout is not None:
+            etree.SubElement(testcase, 'system-out').text = stdout
+
+    return testcase
+
+
+def _junit_write(json_report, fp, stdout_lines=0):
+    session_info = json_report['session_info']
+    with etree.xmlfile(fp, encoding='utf-8') as xf:
+        xf.write_declaration()
+        with xf.element('testsuites'):
+            xf.write('\n')
+            for run_id, rfm_run in enumerate(json_report['runs']):
+                attrib = {
+                    'errors': '0',
+                    'failures': str(rfm_run['num_failures']),
+                    'hostname': session_info['hostname'],
+                    'id': str(run_id),
+                    'name': f'ReFrame run {run_id}',
+                    'package': 'reframe',
+                    'tests': str(rfm_run['num_cases']),
+                    'time': str(session_info['time_elapsed']),
+
+                    # XSD schema does not like the timezone format, so we
+                    # remove it
+                    'timestamp': session_info['time_start'][:-5],
                 }
-            )
-            if tc['result'] == 'failure':
-                testcase_msg = etree.SubElement(
-                    testcase, 'failure', attrib={'type': 'failure',
-                                                 'message': tc['fail_phase']}
-                )
-                testcase_msg.text = f"{tc['fail_phase']}: {tc['fail_reason']}"
+                with xf.element('testsuite', attrib=attrib):
+                    xf.write('\n')
+                    xf.write(etree.Element('properties'), pretty_print=True)
+
+                    # Test cases are written one by one, so that the whole
+                    # XML tree is never held in memory
+                    for tc in rfm_run['testcases']:
+                        xf.write(_junit_testcase(tc, stdout_lines),
+                                 pretty_print=True)
+
+                    for name in ('system-out', 'system-err'):
+                        elem = etree.Element(name)
+                        elem.text = ''
+                        xf.write(elem, pretty_print=True)
+
+                xf.write('\n')
 
-        testsuite_stdout = etree.SubElement(xml_testsuite, 'system-out')
-        testsuite_stdout.text = ''
-        testsuite_stderr = etree.SubElement(xml_testsuite, 'system-err')
-        testsuite_stderr.text = ''
 
-    return xml_testsuites
+def junit_write(json_report, filename, stdout_lines=0):
+    '''Write a JUnit report from a standard ReFrame JSON report.
+
+    The report is generated incrementally, one test case at a time, and it
+    is compressed if ``filename`` ends in ``.gz`` or ``.xz``.
+
+    :arg json_report: The ReFrame JSON report.
+    :arg filename: The file to write the JUnit report to.
+    :arg stdout_lines: If non-zero, include up to that many of the last
+        lines of the standard output of each test case in its
+        ``system-out`` element. The output files are read only while the
+        test case is being written.
+
+    .. versionadded:: 4.6
+    '''
+
+    with osext.open_compressed(filename, 'wb') as fp:
+        _junit_write(json_report, fp, stdout_lines)
+
+
+def junit_xml_report(json_report):
+    '''Generate a JUnit report from a standard ReFrame JSON report.'''
+
+    buffer = io.BytesIO()
+    _junit_write(json_report, buffer)
+    return etree.fromstring(buffer.getvalue())
 
 
 def junit_dump(xml, fp):
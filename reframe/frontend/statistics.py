@@ -3,10 +3,12 @@
 #
 # SPDX-License-Identifier: BSD-3-Clause
 
+import collections
 import inspect
 import itertools
 import os
 import shutil
+import time
 import traceback
 
 import reframe.core.runtime as rt
@@ -20,13 +22,161 @@ def _getattr(obj, attr):
         return getattr(obj, attr)
 
 
+def testcase_entry(t):
+    '''Return the run report entry of task ``t``.'''
+
+    check = t.check
+    partition = check.current_partition
+    entry = {
+        'build_stderr': None,
+        'build_stdout': None,
+        'dependencies_actual': [
+            (d.check.unique_name,
+             d.partition.fullname, d.environ.name)
+            for d in t.testcase.deps
+        ],
+        'dependencies_conceptual': [
+            d[0] for d in t.check.user_deps()
+        ],
+        'description': check.descr,
+        'display_name': check.display_name,
+        'environment': None,
+        'fail_phase': None,
+        'fail_reason': None,
+        'filename': inspect.getfile(type(check)),
+        'fixture': check.is_fixture(),
+        'hash': check.hashcode,
+        'jobid': None,
+        'job_stderr': None,
+        'job_stdout': None,
+        'maintainers': check.maintainers,
+        'name': check.name,
+        'nodelist': [],
+        'outputdir': None,
+        'perfvars': None,
+        'prefix': check.prefix,
+        'result': None,
+        'stagedir': check.stagedir,
+        'scheduler': None,
+        'system': check.current_system.name,
+        'tags': list(check.tags),
+        'time_compile': t.duration('compile_complete'),
+        'time_performance': t.duration('performance'),
+        'time_run': t.duration('run_complete'),
+        'time_sanity': t.duration('sanity'),
+        'time_setup': t.duration('setup'),
+        'time_total': t.duration('total'),
+        'unique_name': check.unique_name
+    }
+
+    # We take partition and environment from the test case and not
+    # from the check, since if the test fails before `setup()`,
+    # these are not set inside the check.
+    partition = t.testcase.partition
+    environ = t.testcase.environ
+    entry['system'] = partition.fullname
+    entry['scheduler'] = partition.scheduler.registered_name
+    entry['environment'] = environ.name
+    if check.job:
+        entry['jobid'] = str(check.job.jobid)
+        entry['job_stderr'] = check.stderr.evaluate()
+        entry['job_stdout'] = check.stdout.evaluate()
+        entry['nodelist'] = check.job.nodelist or []
+
+    if check.build_job:
+        entry['build_stderr'] = check.build_stderr.evaluate()
+        entry['build_stdout'] = check.build_stdout.evaluate()
+
+    if t.failed:
+        entry['result'] = 'failure'
+    elif t.aborted:
+        entry['result'] = 'aborted'
+
+    if t.failed or t.aborted:
+        entry['fail_phase'] = t.failed_stage
+        if t.exc_info is not None:
+            entry['fail_reason'] = errors.what(*t.exc_info)
+            entry['fail_info'] = {
+                'exc_type':  t.exc_info[0],
+                'exc_value': t.exc_info[1],
+                'traceback': t.exc_info[2]
+            }
+            entry['fail_severe'] = errors.is_severe(*t.exc_info)
+    elif t.skipped:
+        entry['result'] = 'skipped'
+    else:
+        entry['result'] = 'success'
+        entry['outputdir'] = check.outputdir
+
+    if check.perfvalues:
+        # Record performance variables
+        entry['perfvars'] = []
+        for key, ref in check.perfvalues.items():
+            var = key.split(':')[-1]
+            val, ref, lower, upper, unit = ref
+            entry['perfvars'].append({
+                'name': var,
+                'reference': ref,
+                'thres_lower': lower,
+                'thres_upper': upper,
+                'unit': unit,
+                'value': val
+            })
+
+    # Add any loggable variables and parameters
+    entry['check_vars'] = {}
+    test_cls = type(check)
+    for name, var in test_cls.var_space.items():
+        if var.is_loggable():
+            try:
+                entry['check_vars'][name] = _getattr(check, name)
+            except AttributeError:
+                entry['check_vars'][name] = '<undefined>'
+
+    entry['check_params'] = {}
+    test_cls = type(check)
+    for name, param in test_cls.param_space.items():
+        if param.is_loggable():
+            entry['check_params'][name] = _getattr(check, name)
+
+    return entry
+
+
+def _task_result(t):
+    '''Return the result of task ``t`` as recorded in its report entry.'''
+
+    if t.failed:
+        return 'failure'
+    elif t.aborted:
+        return 'aborted'
+    elif t.skipped:
+        return 'skipped'
+    else:
+        return 'success'
+
+
 class TestStats:
-    '''Stores test case statistics.'''
+    '''Stores test case statistics.
+
+    The statistics listen to the events of the tasks, so that the report
+    entry of each task is generated once, as soon as the task finishes, and
+    the number of test cases per result is kept up to date.
+    '''
 
     def __init__(self):
         # Tasks per run stored as follows: [[run0_tasks], [run1_tasks], ...]
         self._alltasks = [[]]
 
+        # The run id of every task
+        self._task_runs = {}
+
+        # The report entries of the tasks, stored as `(state, entry)` tuples,
+        # where `state` is the state of the task when the entry was generated
+        self._entries = {}
+
+        # Number of test cases per result for each run
+        self._num_results = [collections.Counter()]
+
         # Data collected for all the runs of this session in JSON format
         self._run_data = []
 
@@ -34,8 +184,65 @@ class TestStats:
         current_run = rt.runtime().current_run
         if current_run == len(self._alltasks):
             self._alltasks.append([])
+            self._num_results.append(collections.Counter())
 
         self._alltasks[current_run].append(task)
+        self._task_runs[task] = current_run
+        self._run_data = []
+
+    def testcase_entry(self, task):
+        '''Return the run report entry of ``task``.
+
+        The entry is generated only if the task has changed state since its
+        last entry was generated, e.g., if it failed during its cleanup
+        after it had succeeded.
+        '''
+
+        state = (_task_result(task), task.failed_stage)
+        try:
+            entry_state, entry = self._entries[task]
+        except KeyError:
+            pass
+        else:
+            if entry_state == state:
+                return entry
+
+        entry = testcase_entry(task)
+        runid = self._task_runs.get(task, rt.runtime().current_run)
+        if task in self._entries:
+            self._num_results[runid][self._entries[task][0][0]] -= 1
+
+        self._num_results[runid][state[0]] += 1
+        self._entries[task] = (state, entry)
+        self._run_data = []
+        return entry
+
+    def on_task_setup(self, task):
+        pass
+
+    def on_task_run(self, task):
+        pass
+
+    def on_task_compile(self, task):
+        pass
+
+    def on_task_exit(self, task):
+        pass
+
+    def on_task_compile_exit(self, task):
+        pass
+
+    def on_task_skip(self, task):
+        self.testcase_entry(task)
+
+    def on_task_failure(self, task):
+        self.testcase_entry(task)
+
+    def on_task_abort(self, task):
+        self.testcase_entry(task)
+
+    def on_task_success(self, task):
+        self.testcase_entry(task)
 
     def tasks(self, run=-1):
         if run is None:
@@ -59,7 +266,31 @@ class TestStats:
         return [t for t in self.tasks(run) if t.completed]
 
     def num_cases(self, run=-1):
-        return sum(1 for _ in self.tasks(run))
+        if run is None:
+            return sum(len(tasks) for tasks in self._alltasks)
+
+        try:
+            return len(self._alltasks[run])
+        except IndexError:
+            raise errors.StatisticsError(f'no such run: {run}') from None
+
+    def num_results(self, result, run=-1):
+        '''Return the number of test cases of a run that have finished with
+        a specific result.
+
+        :arg result: The result of the test cases; one of ``'success'``,
+            ``'failure'``, ``'aborted'`` or ``'skipped'``.
+        :arg run: The run to count the test cases of; if :obj:`None`, the
+            test cases of all the runs are counted.
+        '''
+
+        if run is None:
+            return sum(counts[result] for counts in self._num_results)
+
+        try:
+            return self._num_results[run][result]
+        except IndexError:
+            raise errors.StatisticsError(f'no such run: {run}') from None
 
     @property
     def num_runs(self):
@@ -98,143 +329,44 @@ class TestStats:
         return '\n'.join(report)
 
     def json(self, force=False):
-        if not force and self._run_data:
+        '''Return the report of all the runs of the session.
+
+        :arg force: Regenerate the report entries of all the test cases.
+        '''
+
+        if force:
+            self._entries = {}
+            for counts in self._num_results:
+                counts.clear()
+        elif self._run_data:
+            # Account also for the cleanup of the tests, which takes place
+            # after their entries are generated
+            for run in self._alltasks:
+                for t in run:
+                    self._entries[t][1]['time_total'] = t.duration('total')
+
             return self._run_data
 
+        run_data = []
         for runid, run in enumerate(self._alltasks):
             testcases = []
-            num_failures = 0
-            num_aborted = 0
-            num_skipped = 0
             for t in run:
-                check = t.check
-                partition = check.current_partition
-                entry = {
-                    'build_stderr': None,
-                    'build_stdout': None,
-                    'dependencies_actual': [
-                        (d.check.unique_name,
-                         d.partition.fullname, d.environ.name)
-                        for d in t.testcase.deps
-                    ],
-                    'dependencies_conceptual': [
-                        d[0] for d in t.check.user_deps()
-                    ],
-                    'description': check.descr,
-                    'display_name': check.display_name,
-                    'environment': None,
-                    'fail_phase': None,
-                    'fail_reason': None,
-                    'filename': inspect.getfile(type(check)),
-                    'fixture': check.is_fixture(),
-                    'hash': check.hashcode,
-                    'jobid': None,
-                    'job_stderr': None,
-                    'job_stdout': None,
-                    'maintainers': check.maintainers,
-                    'name': check.name,
-                    'nodelist': [],
-                    'outputdir': None,
-                    'perfvars': None,
-                    'prefix': check.prefix,
-                    'result': None,
-                    'stagedir': check.stagedir,
-                    'scheduler': None,
-                    'system': check.current_system.name,
-                    'tags': list(check.tags),
-                    'time_compile': t.duration('compile_complete'),
-                    'time_performance': t.duration('performance'),
-                    'time_run': t.duration('run_complete'),
-                    'time_sanity': t.duration('sanity'),
-                    'time_setup': t.duration('setup'),
-                    'time_total': t.duration('total'),
-                    'unique_name': check.unique_name
-                }
-
-                # We take partition and environment from the test case and not
-                # from the check, since if the test fails before `setup()`,
-                # these are not set inside the check.
-                partition = t.testcase.partition
-                environ = t.testcase.environ
-                entry['system'] = partition.fullname
-                entry['scheduler'] = partition.scheduler.registered_name
-                entry['environment'] = environ.name
-                if check.job:
-                    entry['jobid'] = str(check.job.jobid)
-                    entry['job_stderr'] = check.stderr.evaluate()
-                    entry['job_stdout'] = check.stdout.evaluate()
-                    entry['nodelist'] = check.job.nodelist or []
-
-                if check.build_job:
-                    entry['build_stderr'] = check.build_stderr.evaluate()
-                    entry['build_stdout'] = check.build_stdout.evaluate()
-
-                if t.failed:
-                    num_failures += 1
-                    entry['result'] = 'failure'
-                elif t.aborted:
-                    entry['result'] = 'aborted'
-                    num_aborted += 1
-
-                if t.failed or t.aborted:
-                    entry['fail_phase'] = t.failed_stage
-                    if t.exc_info is not None:
-                        entry['fail_reason'] = errors.what(*t.exc_info)
-                        entry['fail_info'] = {
-                            'exc_type':  t.exc_info[0],
-                            'exc_value': t.exc_info[1],
-                            'traceback': t.exc_info[2]
-                        }
-                        entry['fail_severe'] = errors.is_severe(*t.exc_info)
-                elif t.skipped:
-                    entry['result'] = 'skipped'
-                    num_skipped += 1
-                else:
-                    entry['result'] = 'success'
-                    entry['outputdir'] = check.outputdir
-
-                if check.perfvalues:
-                    # Record performance variables
-                    entry['perfvars'] = []
-                    for key, ref in check.perfvalues.items():
-                        var = key.split(':')[-1]
-                        val, ref, lower, upper, unit = ref
-                        entry['perfvars'].append({
-                            'name': var,
-                            'reference': ref,
-                            'thres_lower': lower,
-                            'thres_upper': upper,
-                            'unit': unit,
-                            'value': val
-                        })
-
-                # Add any loggable variables and parameters
-                entry['check_vars'] = {}
-                test_cls = type(check)
-                for name, var in test_cls.var_space.items():
-                    if var.is_loggable():
-                        try:
-                            entry['check_vars'][name] = _getattr(check, name)
-                        except AttributeError:
-                            entry['check_vars'][name] = '<undefined>'
-
-                entry['check_params'] = {}
-                test_cls = type(check)
-                for name, param in test_cls.param_space.items():
-                    if param.is_loggable():
-                        entry['check_params'][name] = _getattr(check, name)
+                entry = self.testcase_entry(t)
 
+                # Account also for the cleanup of the test
+                entry['time_total'] = t.duration('total')
                 testcases.append(entry)
 
-            self._run_data.append({
+            run_data.append({
                 'num_cases': len(run),
-                'num_failures': num_failures,
-                'num_aborted': num_aborted,
-                'num_skipped': num_skipped,
+                'num_failures': self.num_results('failure', runid),
+                'num_aborted': self.num_results('aborted', runid),
+                'num_skipped': self.num_results('skipped', runid),
                 'runid': runid,
                 'testcases': testcases
             })
 
+        self._run_data = run_data
         return self._run_data
 
     def print_failure_report(self, printer, rerun_info=True,
@@ -427,3 +559,91 @@ class TestStats:
 
         lines.append(width*'-')
         return '\n'.join(lines)
+
+
+def _format_table(rows):
+    widths = [max(len(r[i]) for r in rows) for i in range(len(rows[0]))]
+    lines = ['  '.join(col.ljust(w) for col, w in zip(r, widths)).rstrip()
+             for r in rows]
+    lines.insert(1, '  '.join(w*'-' for w in widths).rstrip())
+    return lines
+
+
+def performance_compare_report(comparison, baseline):
+    '''Return a table of a performance comparison.
+
+    :arg comparison: The performance comparison as returned by
+        :func:`reframe.frontend.resultsdb.ResultsDB.compare`.
+    :arg baseline: A description of the baseline.
+    '''
+
+    width = shutil.get_terminal_size()[0]
+    lines = ['', width*'=', f'PERFORMANCE COMPARISON (baseline: {baseline})',
+             width*'-']
+    if not comparison:
+        lines += ['no performance variables to compare', width*'-']
+        return '\n'.join(lines)
+
+    rows = [('test', 'system', 'environment', 'variable',
+             'value', 'baseline', 'diff', 'runs', '')]
+    num_regressions = 0
+    for c in comparison:
+        system = c['system']
+        if c['partition']:
+            system += f":{c['partition']}"
+
+        unit = c['unit'] or ''
+        if c['baseline'] is None:
+            base, diff = 'n/a', 'n/a'
+        else:
+            base = f"{c['baseline']:.6g} {unit}"
+            diff = 'n/a' if c['diff'] is None else f"{c['diff']:+.2f}%"
+
+        num_regressions += c['regression']
+        rows.append((c['name'], system, c['environment'], c['perfvar'],
+                     f"{c['value']:.6g} {unit}" if c['value'] is not None
+                     else 'n/a', base, diff, str(c['count']),
+                     'REGRESSION' if c['regression'] else ''))
+
+    lines += _format_table(rows)
+    lines.append(width*'-')
+    lines.append(f'Found {num_regressions} regression(s)')
+    return '\n'.join(lines)
+
+
+def performance_shifts_report(shifts, window, k):
+    '''Return a table of the detected performance shifts.
+
+    :arg shifts: The detected shifts as returned by
+        :func:`reframe.frontend.resultsdb.ResultsDB.performance_shifts`.
+    :arg window: The window size of the detection.
+    :arg k: The number of scaled MADs of the detection.
+    '''
+
+    width = shutil.get_terminal_size()[0]
+    lines = ['', width*'=',
+             f'PERFORMANCE SHIFTS (rolling median of {window} '
+             f'value(s) \u00b1 {k:g} MAD)', width*'-']
+    if shifts:
+        rows = [('test', 'system', 'environment', 'variable', 'session',
+                 'time', 'value', 'median', 'diff', 'score')]
+        for r in shifts:
+            system = r['system']
+            if r['partition']:
+                system += f":{r['partition']}"
+
+            unit = r['unit'] or ''
+            rows.append((
+                r['name'], system, r['environment'], r['perfvar'],
+                str(r['session_id']),
+                time.strftime('%FT%T%z', time.localtime(r['timestamp'])),
+                f"{r['value']:.6g} {unit}", f"{r['median']:.6g} {unit}",
+                'n/a' if r['diff'] is None else f"{r['diff']:+.2f}%",
+                f"{r['score']:.2f}"
+            ))
+
+        lines += _format_table(rows)
+        lines.append(width*'-')
+
+    lines.append(f'Found {len(shifts)} shift(s)')
+    return '\n'.join(lines)
@@ -11,6 +11,8 @@ import collections.abc
 import errno
 import getpass
 import grp
+import gzip
+import lzma
 import os
 import re
 import semver
@@ -624,6 +626,74 @@ def mkstemp_path(*args, **kwargs):
     return path
 
 
+# The compressed file formats supported by `open_compressed()` along with
+# their file suffix and magic bytes
+_COMPRESSED_FORMATS = {
+    'gzip': (gzip, '.gz', b'\x1f\x8b'),
+    'xz': (lzma, '.xz', b'\xfd7zXZ\x00')
+}
+
+
+def compression_suffix(compression):
+    '''Return the file suffix of the compression format ``compression``.
+
+    :arg compression: One of ``'gzip'`` or ``'xz'``. If :obj:`None`, an
+        empty string is returned.
+    :raises ValueError: If the compression format is not supported.
+    '''
+
+    if compression is None:
+        return ''
+
+    try:
+        return _COMPRESSED_FORMATS[compression][1]
+    except KeyError:
+        raise ValueError(
+            f'unsupported compression format: {compression!r}'
+        ) from None
+
+
+def open_compressed(filename, mode='r', encoding=None):
+    '''Open a file that may be compressed.
+
+    Files opened for reading are decompressed transparently if they are
+    gzip- or xz-compressed, regardless of their name. Files opened for
+    writing or appending are compressed if their name ends in ``.gz`` or
+    ``.xz``, respectively; in this case, the data is compressed as it is
+    written.
+
+    :arg filename: The file to open.
+    :arg mode: The mode to open the file in as in :py:func:`open`.
+    :arg encoding: The encoding of the file in text mode.
+    :returns: A file object.
+
+    .. versionadded:: 4.6
+    '''
+
+    module = None
+    if 'r' in mode:
+        with open(filename, 'rb') as fp:
+            magic = fp.read(6)
+
+        for mod, _, magic_bytes in _COMPRESSED_FORMATS.values():
+            if magic.startswith(magic_bytes):
+                module = mod
+                break
+    else:
+        for mod, suffix, _ in _COMPRESSED_FORMATS.values():
+            if str(filename).endswith(suffix):
+                module = mod
+                break
+
+    if module is None:
+        return open(filename, mode, encoding=encoding)
+
+    if 'b' not in mode and 't' not in mode:
+        mode += 't'
+
+    return module.open(filename, mode.replace('+', ''), encoding=encoding)
+
+
 def force_remove_file(filename):
     '''Remove filename ignoring :py:class:`FileNotFoundError`.'''
     try:
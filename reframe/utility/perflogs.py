@@ -0,0 +1,575 @@
+# Copyright 2016-2023 Swiss National Supercomputing Centre (CSCS/ETH Zurich)
+# ReFrame Project Developers. See the top-level LICENSE file for details.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+'''Reading the performance logs of ReFrame.
+
+This module reads the performance logs generated by the ``filelog``
+performance log handler (see :attr:`~config.logging.handlers_perflog`) and
+loads their records into columns, so that they can be queried and plotted
+efficiently. Every performance variable of a log record is loaded as a
+separate row with the following columns:
+
+- ``test``: The name of the test.
+- ``system``: The system the test has run on.
+- ``partition``: The partition the test has run on.
+- ``environ``: The programming environment the test has run with.
+- ``perfvar``: The name of the performance variable.
+- ``value``: The value of the performance variable or ``nan`` if it is not
+  a number.
+- ``unit``: The unit of the performance variable.
+- ``result``: The result of the test.
+- ``timestamp``: The completion time of the job of the test in UTC.
+
+If NumPy is available, the columns are NumPy arrays, the ``value`` column
+has the ``float64`` type and the ``timestamp`` column has the
+``datetime64[us]`` type. Otherwise, the columns are lists and the timestamps
+are timezone-aware :class:`~datetime.datetime` objects. Missing values are
+``nan`` or ``NaT``, or :obj:`None` for the timestamps without NumPy.
+
+The log files may be compressed and the files of previous log formats,
+i.e., the ``.h0``, ``.h1`` etc. files, are read as well, since each one of
+them contains its own header.
+
+This module can also be used from the command line, in order to summarize
+the performance logs under a directory or to detect the statistically
+significant shifts in their values (see :func:`shifts`):
+
+.. code-block:: console
+
+   python -m reframe.utility.perflogs [-n NAME] [--perfvar VAR] DIR
+   python -m reframe.utility.perflogs --detect-shifts [--window=N] [-k K] DIR
+
+Run it with ``--help`` for all the available options.
+
+.. versionadded:: 4.6
+
+'''
+
+import argparse
+import concurrent.futures
+import datetime
+import math
+import os
+import re
+import statistics
+import sys
+
+import reframe.utility.osext as osext
+
+
+#: The columns of the loaded performance logs.
+COLUMNS = ('test', 'system', 'partition', 'environ', 'perfvar',
+           'value', 'unit', 'result', 'timestamp')
+
+#: The columns that identify a performance variable of a test.
+KEY_COLUMNS = ('test', 'system', 'partition', 'environ', 'perfvar')
+
+# Log files and files of previous log formats, possibly compressed
+_PERFLOG_FILE = re.compile(r'\.log(\.h\d+)?(\.gz|\.xz)?$')
+
+# Delimiters to try if no delimiter is specified
+_DELIMITERS = ('|', ',', ';', '\t')
+
+# Date formats of the `job_completion_time` column to try
+_TIME_FORMATS = ('%Y-%m-%dT%H:%M:%S%z', '%Y-%m-%dT%H:%M:%S',
+                 '%Y-%m-%d %H:%M:%S%z', '%Y-%m-%d %H:%M:%S')
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        return None
+
+    return numpy
+
+
+def find_perflogs(path):
+    '''Return the performance log files under ``path``.
+
+    :arg path: A directory to search recursively or a single log file.
+    :returns: A sorted list of file names.
+    '''
+
+    if not os.path.isdir(path):
+        return [path]
+
+    ret = []
+    for dirpath, _, filenames in os.walk(path):
+        ret += [os.path.join(dirpath, f)
+                for f in filenames if _PERFLOG_FILE.search(f)]
+
+    return sorted(ret)
+
+
+def _guess_delimiter(header):
+    counts = {d: header.count(d) for d in _DELIMITERS}
+    delim = max(counts, key=counts.get)
+    return delim if counts[delim] else '|'
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except ValueError:
+        return math.nan
+
+
+def _parse_time(timestr):
+    '''Parse the completion time of a job to a Unix timestamp.'''
+
+    if not timestr:
+        return math.nan
+
+    # Remove the colon from the timezone of RFC 3339 times, since `%z`
+    # accepts it only since Python 3.7
+    timestr = re.sub(r'([+-]\d\d):(\d\d)$', r'\1\2', timestr)
+    for fmt in _TIME_FORMATS:
+        try:
+            return datetime.datetime.strptime(timestr, fmt).timestamp()
+        except ValueError:
+            pass
+
+    return math.nan
+
+
+def _perfvars(columns):
+    '''Return the performance variables in the header ``columns``.
+
+    :returns: A list of ``(name, value_index, unit_index)`` tuples; the
+        index of the unit is :obj:`None` if it is not logged.
+    '''
+
+    ret = []
+    for i, col in enumerate(columns):
+        if col.endswith('_value'):
+            name = col[:-len('_value')]
+            try:
+                unit_index = columns.index(f'{name}_unit')
+            except ValueError:
+                unit_index = None
+
+            ret.append((name, i, unit_index))
+
+    return ret
+
+
+def read_perflog(filename, delimiter=None):
+    '''Read a single performance log file.
+
+    :arg filename: The log file; it may be compressed.
+    :arg delimiter: The delimiter of the log fields. If :obj:`None`, it is
+        guessed from the header of the file.
+    :returns: A dictionary of the :data:`COLUMNS` as lists; the timestamps
+        are Unix timestamps.
+    '''
+
+    data = {c: [] for c in COLUMNS}
+    with osext.open_compressed(filename) as fp:
+        header = fp.readline().rstrip('\n')
+        delim = delimiter or _guess_delimiter(header)
+        columns = header.split(delim)
+        perfvars = _perfvars(columns)
+        if not perfvars:
+            return data
+
+        # The system and partition default to the directories of the log
+        # file as in the default log file prefix
+        dirname = os.path.dirname(os.path.abspath(filename))
+        default_part = os.path.basename(dirname)
+        default_system = os.path.basename(os.path.dirname(dirname))
+        default_test = _PERFLOG_FILE.sub('', os.path.basename(filename))
+
+        def _index(*names):
+            for n in names:
+                if n in columns:
+                    return columns.index(n)
+
+        idx_test = _index('name', 'unique_name', 'short_name')
+        idx_system = _index('system')
+        idx_part = _index('partition')
+        idx_env = _index('environ')
+        idx_result = _index('result')
+        idx_time_unix = _index('job_completion_time_unix')
+        idx_time = _index('job_completion_time')
+        num_columns = len(columns)
+        for line in fp:
+            fields = line.rstrip('\n').split(delim)
+            if len(fields) != num_columns:
+                # Skip records that do not conform to the header
+                continue
+
+            if idx_time_unix is not None:
+                timestamp = _to_float(fields[idx_time_unix])
+            elif idx_time is not None:
+                timestamp = _parse_time(fields[idx_time])
+            else:
+                timestamp = math.nan
+
+            test = default_test if idx_test is None else fields[idx_test]
+            system = (default_system if idx_system is None
+                      else fields[idx_system])
+            part = default_part if idx_part is None else fields[idx_part]
+            env = '' if idx_env is None else fields[idx_env]
+            result = '' if idx_result is None else fields[idx_result]
+            for name, idx_value, idx_unit in perfvars:
+                data['test'].append(test)
+                data['system'].append(system)
+                data['partition'].append(part)
+                data['environ'].append(env)
+                data['perfvar'].append(name)
+                data['value'].append(_to_float(fields[idx_value]))
+                data['unit'].append('' if idx_unit is None
+                                    else fields[idx_unit])
+                data['result'].append(result)
+                data['timestamp'].append(timestamp)
+
+    return data
+
+
+def _to_datetime64(np, timestamps):
+    '''Convert Unix timestamps to UTC ``datetime64[us]`` values.'''
+
+    ret = np.full(len(timestamps), np.datetime64('NaT'), 'datetime64[us]')
+    valid = ~np.isnan(timestamps)
+    ret[valid] = np.round(timestamps[valid] * 1e6).astype(np.int64)
+    return ret
+
+
+def _read_perflog(args):
+    return read_perflog(*args)
+
+
+class PerflogData:
+    '''The records of a set of performance logs in columns.
+
+    This class is not meant to be instantiated by users; use :func:`load`
+    instead.
+    '''
+
+    def __init__(self, columns):
+        self._columns = columns
+
+    def __len__(self):
+        return len(self._columns['value'])
+
+    def __getitem__(self, column):
+        '''Return a column by name.'''
+        return self._columns[column]
+
+    @property
+    def columns(self):
+        '''The names of the columns.'''
+        return tuple(self._columns.keys())
+
+    def _take(self, indices):
+        np = _numpy()
+        if np:
+            return PerflogData({k: v[indices]
+                                for k, v in self._columns.items()})
+        else:
+            return PerflogData({k: [v[i] for i in indices]
+                                for k, v in self._columns.items()})
+
+    def filter(self, **patterns):
+        '''Select the records whose columns match regular expressions.
+
+        :arg patterns: The column names and the patterns they must match,
+            e.g., ``filter(test='stream', perfvar='triad')``; the patterns
+            are searched in the column values.
+        :returns: A new :class:`PerflogData` with the selected records.
+        '''
+
+        indices = range(len(self))
+        for column, patt in patterns.items():
+            regex = re.compile(patt)
+            values = self._columns[column]
+
+            # Match the distinct values only
+            matches = {v: bool(regex.search(v)) for v in set(values)}
+            indices = [i for i in indices if matches[values[i]]]
+
+        return self._take(list(indices))
+
+    def groups(self):
+        '''Group the records by performance variable.
+
+        :returns: A dictionary mapping the :data:`KEY_COLUMNS` values of
+            each performance variable to the indices of its records in time
+            order.
+        '''
+
+        np = _numpy()
+        keys = zip(*(self._columns[c] for c in KEY_COLUMNS))
+        if not len(self):
+            return {}
+
+        if not np:
+            ret = {}
+            for i, key in enumerate(keys):
+                ret.setdefault(key, []).append(i)
+
+            return ret
+
+        # Number the records of each group consecutively
+        codes = [np.unique(self._columns[c], return_inverse=True)[1]
+                 for c in reversed(KEY_COLUMNS)]
+        order = np.lexsort(codes)
+        group_codes = np.stack([c[order] for c in reversed(codes)], axis=1)
+        starts = np.flatnonzero(
+            np.any(np.diff(group_codes, axis=0), axis=1)
+        ) + 1
+        ret = {}
+        for indices in np.split(order, starts):
+            if len(indices):
+                key = tuple(str(self._columns[c][indices[0]])
+                            for c in KEY_COLUMNS)
+                ret[key] = indices
+
+        return ret
+
+
+def load(paths, delimiter=None, workers=None):
+    '''Load the performance logs under ``paths``.
+
+    The log files are read in parallel by multiple processes.
+
+    :arg paths: A directory or a log file or a list of them.
+    :arg delimiter: The delimiter of the log fields. If :obj:`None`, it is
+        guessed from the header of each log file.
+    :arg workers: The number of processes reading the log files. If
+        :obj:`None`, it is the number of the CPUs; if ``1``, the log files
+        are read by the calling process.
+    :returns: A :class:`PerflogData` with the records sorted by their
+        timestamp.
+    '''
+
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+
+    filenames = []
+    for p in paths:
+        filenames += find_perflogs(p)
+
+    args = [(f, delimiter) for f in filenames]
+    if workers == 1 or len(filenames) <= 1:
+        results = map(_read_perflog, args)
+    else:
+        with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+            results = list(pool.map(_read_perflog, args,
+                                    chunksize=max(1, len(args) // 64)))
+
+    data = {c: [] for c in COLUMNS}
+    for res in results:
+        for c in COLUMNS:
+            data[c] += res[c]
+
+    np = _numpy()
+    if not np:
+        order = sorted(range(len(data['timestamp'])),
+                       key=lambda i: (math.isnan(data['timestamp'][i]),
+                                      data['timestamp'][i]))
+        columns = {c: [data[c][i] for i in order] for c in COLUMNS}
+        columns['timestamp'] = [
+            None if math.isnan(t) else
+            datetime.datetime.fromtimestamp(t, datetime.timezone.utc)
+            for t in columns['timestamp']
+        ]
+        return PerflogData(columns)
+
+    timestamps = np.array(data['timestamp'], dtype=np.float64)
+    order = np.argsort(timestamps, kind='stable')
+    columns = {}
+    for c in COLUMNS:
+        if c == 'value':
+            columns[c] = np.array(data[c], dtype=np.float64)[order]
+        elif c != 'timestamp':
+            columns[c] = np.array(data[c], dtype=str)[order]
+
+    columns['timestamp'] = _to_datetime64(np, timestamps[order])
+    return PerflogData(columns)
+
+
+def summary(data):
+    '''Summarize the values of each performance variable.
+
+    :arg data: The :class:`PerflogData` to summarize.
+    :returns: A list of dictionaries with the :data:`KEY_COLUMNS` and the
+        ``count``, ``min``, ``median``, ``mean``, ``max``, ``last`` and
+        ``unit`` of the values of each performance variable; ``last`` is the
+        most recent value. Values that are not numbers are ignored.
+    '''
+
+    values, units = data['value'], data['unit']
+    ret = []
+    for key, indices in sorted(data.groups().items()):
+        group = [values[i] for i in indices if not math.isnan(values[i])]
+        row = dict(zip(KEY_COLUMNS, key))
+        row['count'] = len(group)
+        row['unit'] = units[indices[-1]]
+        if group:
+            row.update({
+                'min': min(group),
+                'median': statistics.median(group),
+                'mean': statistics.mean(group),
+                'max': max(group),
+                'last': group[-1]
+            })
+        else:
+            row.update(dict.fromkeys(('min', 'median', 'mean',
+                                      'max', 'last'), math.nan))
+
+        ret.append(row)
+
+    return ret
+
+
+def shifts(data, window=10, k=3.0):
+    '''Detect statistically significant shifts in the values of each
+    performance variable.
+
+    The values of each performance variable are examined in time order with
+    :func:`reframe.frontend.resultsdb.detect_shifts`, as the
+    ``--detect-perf-shifts`` option does for the results database. Values
+    that are not numbers are ignored.
+
+    :arg data: The :class:`PerflogData` to examine.
+    :arg window: The number of preceding values to compare each value with.
+    :arg k: The number of scaled MADs that a value may deviate from the
+        median of its preceding values.
+    :returns: A list of dictionaries with the :data:`KEY_COLUMNS` and the
+        ``value``, ``unit``, ``timestamp``, ``median``, ``diff`` and
+        ``score`` of each flagged value, in time order for each performance
+        variable; ``diff`` is the difference from the median as a
+        percentage or ``nan`` if the median is zero.
+    '''
+
+    # Imported here, so that reading the logs does not require the frontend
+    from reframe.frontend.resultsdb import detect_shifts
+
+    values, units, timestamps = (data['value'], data['unit'],
+                                 data['timestamp'])
+    ret = []
+    for key, indices in sorted(data.groups().items()):
+        indices = [i for i in indices if not math.isnan(values[i])]
+        for pos, median, score in detect_shifts(
+            [float(values[i]) for i in indices], window, k
+        ):
+            i = indices[pos]
+            row = dict(zip(KEY_COLUMNS, key))
+            row.update({
+                'value': float(values[i]),
+                'unit': str(units[i]),
+                'timestamp': timestamps[i],
+                'median': median,
+                'diff': (100*(values[i] - median) / abs(median)
+                         if median else math.nan),
+                'score': score
+            })
+            ret.append(row)
+
+    return ret
+
+
+def _format_table(rows):
+    widths = [max(len(r[i]) for r in rows) for i in range(len(rows[0]))]
+    return '\n'.join(
+        '  '.join(v.ljust(w) for v, w in zip(r, widths)).rstrip()
+        for r in rows
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m reframe.utility.perflogs',
+        description='Summarize the performance logs of ReFrame'
+    )
+    parser.add_argument('paths', metavar='PATH', nargs='+',
+                        help='Performance log directory or file')
+    parser.add_argument('-n', '--name', metavar='PATTERN',
+                        help='Select tests whose name matches PATTERN')
+    parser.add_argument('--system', metavar='PATTERN',
+                        help='Select systems matching PATTERN')
+    parser.add_argument('--partition', metavar='PATTERN',
+                        help='Select partitions matching PATTERN')
+    parser.add_argument('-p', '--prgenv', metavar='PATTERN',
+                        help='Select environments matching PATTERN')
+    parser.add_argument('--perfvar', metavar='PATTERN',
+                        help='Select performance variables matching PATTERN')
+    parser.add_argument('--delimiter', metavar='DELIM',
+                        help='Delimiter of the log fields (default: guess)')
+    parser.add_argument('--workers', metavar='NUM', type=int,
+                        help='Number of processes reading the logs')
+    parser.add_argument('--records', action='store_true',
+                        help='Print the selected records instead of '
+                             'their summary')
+    parser.add_argument('--detect-shifts', action='store_true',
+                        help='Print the statistically significant shifts '
+                             'of the selected records instead of '
+                             'their summary')
+    parser.add_argument('--window', metavar='NUM', type=int, default=10,
+                        help='Number of preceding values to compare each '
+                             'value with when detecting shifts '
+                             '(default: 10)')
+    parser.add_argument('-k', metavar='NUM', type=float, default=3.0,
+                        help='Number of scaled MADs that a value may '
+                             'deviate from the median of its preceding '
+                             'values when detecting shifts (default: 3)')
+    options = parser.parse_args(argv)
+    data = load(options.paths, options.delimiter, options.workers)
+    filters = {
+        'test': options.name,
+        'system': options.system,
+        'partition': options.partition,
+        'environ': options.prgenv,
+        'perfvar': options.perfvar
+    }
+    data = data.filter(**{c: p for c, p in filters.items() if p})
+    if options.detect_shifts:
+        if options.window <= 0:
+            parser.error(f'invalid window size: {options.window}')
+
+        header = ('test', 'system', 'environ', 'perfvar', 'timestamp',
+                  'value', 'median', 'diff', 'score')
+        rows = [header]
+        for r in shifts(data, options.window, options.k):
+            rows.append((
+                r['test'], f"{r['system']}:{r['partition']}", r['environ'],
+                r['perfvar'], str(r['timestamp']),
+                f"{r['value']:.6g} {r['unit']}".rstrip(),
+                f"{r['median']:.6g} {r['unit']}".rstrip(),
+                'n/a' if math.isnan(r['diff']) else f"{r['diff']:+.2f}%",
+                f"{r['score']:.2f}"
+            ))
+
+        print(_format_table(rows))
+        print(f'Found {len(rows) - 1} shift(s)')
+        return 0
+
+    if options.records:
+        rows = [COLUMNS]
+        for i in range(len(data)):
+            rows.append(tuple(str(data[c][i]) for c in COLUMNS))
+    else:
+        header = ('test', 'system', 'environ', 'perfvar', 'count',
+                  'min', 'median', 'mean', 'max', 'last', 'unit')
+        rows = [header]
+        for r in summary(data):
+            rows.append((
+                r['test'], f"{r['system']}:{r['partition']}", r['environ'],
+                r['perfvar'], str(r['count']),
+                *(f'{r[s]:.6g}'
+                  for s in ('min', 'median', 'mean', 'max', 'last')),
+                r['unit']
+            ))
+
+    what = 'record' if options.records else 'performance variable'
+    print(_format_table(rows))
+    print(f'Found {len(rows) - 1} {what}(s)')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
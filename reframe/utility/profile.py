@@ -38,6 +38,8 @@ class TimeProfiler:
         else:
             self._region_times = {}
 
+        self._counters = {}
+
     @property
     def current_region(self):
         return self._region_stack[-1]
@@ -74,6 +76,21 @@ class TimeProfiler:
 
         raise ProfilerError(f'unknown region: {region_name!r}')
 
+    def register_counters(self, name, counters_fn):
+        '''Register a set of counters to be included in the report.
+
+        :arg name: The name of the set of counters.
+        :arg counters_fn: A callable returning a dictionary of counter names
+            and their values. It is called when the report is printed.
+        '''
+        self._counters[name] = counters_fn
+
+    def counters(self, name):
+        try:
+            return self._counters[name]()
+        except KeyError:
+            raise ProfilerError(f'unknown counters: {name!r}') from None
+
     def time_region(self, region):
         return globals()['time_region'](region, self)
 
@@ -93,4 +110,9 @@ class TimeProfiler:
 
             print_fn(msg)
 
+        for name in self._counters:
+            values = ', '.join(f'{k}={v}'
+                               for k, v in self.counters(name).items())
+            print_fn(f'{name}: {values}')
+
         print_fn('>>> profiler report [ end ] <<<')
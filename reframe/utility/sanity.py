@@ -6,8 +6,13 @@
 import builtins
 import collections.abc
 import contextlib
+import csv
+import functools
 import glob as pyglob
+import io
 import itertools
+import json
+import mmap
 import os
 import re
 import sys
@@ -30,16 +35,196 @@ def _format(s, *args, **kwargs):
         return s
 
 
+# The type of the compiled regular expressions; `re.Pattern` is not available
+# in Python 3.6
+_Pattern = type(re.compile(''))
+
+# The maximum number of compiled patterns kept in the regex cache
+_REGEX_CACHE_SIZE = 4096
+
+
+@functools.lru_cache(maxsize=_REGEX_CACHE_SIZE)
+def _compile_cached(patt, flags):
+    return re.compile(patt, flags)
+
+
+def _compile(patt, flags=re.MULTILINE):
+    '''Compile the regex ``patt`` using the regex cache.
+
+    Python's own cache of compiled patterns is small and it is easily
+    thrashed in large sessions, where the patterns of parameterized tests
+    are generated from their parameters. We keep instead our own cache, which
+    is shared by all the tests of the session. Compiled patterns are returned
+    unchanged.
+    '''
+    if isinstance(patt, _Pattern):
+        return patt
+
+    return _compile_cached(patt, flags)
+
+
+def _compile_bytes(patt, encoding):
+    '''Compile the regex ``patt`` for searching bytes encoded with
+    ``encoding``.'''
+    if isinstance(patt, _Pattern):
+        if isinstance(patt.pattern, bytes):
+            return patt
+
+        # The `re.UNICODE` flag is implied for string patterns, but it is not
+        # allowed for bytes patterns
+        return _compile(patt.pattern.encode(encoding),
+                        patt.flags & ~re.UNICODE)
+
+    return _compile(patt.encode(encoding))
+
+
+def _regex_cache_stats():
+    '''Return the statistics of the regex cache.'''
+    info = _compile_cached.cache_info()
+    return {
+        'hits': info.hits,
+        'misses': info.misses,
+        'size': info.currsize,
+        'maxsize': info.maxsize
+    }
+
+
+# The directory that relative paths are resolved against; `None` for the
+# current working directory
+_workdir = None
+
+
+@contextlib.contextmanager
+def _working_dir(path):
+    '''Resolve the relative paths passed to the sanity functions inside this
+    context against ``path``.
+
+    Unlike :func:`reframe.utility.osext.change_dir`, the working directory of
+    the process is not changed, so that sanity functions may be evaluated
+    concurrently, e.g., from multiple threads.
+    '''
+    global _workdir
+
+    prev, _workdir = _workdir, os.path.abspath(path)
+    try:
+        yield
+    finally:
+        _workdir = prev
+
+
+def _path(filename):
+    '''Resolve ``filename`` against the current working directory of the
+    sanity functions.'''
+
+    if _workdir is None or isinstance(filename, int):
+        return filename
+
+    return os.path.join(_workdir, filename)
+
+
 @contextlib.contextmanager
 def _open(filename, *args, **kwargs):
     try:
-        with open(filename, *args, **kwargs) as fp:
+        with open(_path(filename), *args, **kwargs) as fp:
             yield fp
     except OSError as e:
         # Re-raise it as sanity error
         raise SanityError(f'{filename}: {e.strerror}')
 
 
+class _FileCache:
+    '''Cache of decoded file contents.
+
+    Entries are keyed by the absolute path of the file, its inode, its
+    modification time and its size, as well as the requested encoding, so
+    that a file that changes while the cache is active will be read again.
+    Results derived from the contents of a file, e.g., the result of a
+    single-pass extraction, may also be memoized under the same key.
+
+    The cache may be used from multiple threads. Threads that request the
+    same file concurrently may read it more than once, but they will get the
+    same contents.
+    '''
+
+    def __init__(self):
+        self._contents = {}
+        self._derived = {}
+
+    def _key(self, filename, encoding):
+        path = _path(filename)
+        try:
+            st = os.stat(path)
+        except OSError as e:
+            raise SanityError(f'{filename}: {e.strerror}')
+
+        return (os.path.abspath(path), st.st_ino,
+                st.st_mtime_ns, st.st_size, encoding)
+
+    def read(self, filename, encoding):
+        if isinstance(filename, int):
+            # Never cache file descriptors
+            with _open(filename, 'rt', encoding=encoding) as fp:
+                return fp.read()
+
+        key = self._key(filename, encoding)
+        try:
+            return self._contents[key]
+        except KeyError:
+            with _open(filename, 'rt', encoding=encoding) as fp:
+                ret = self._contents[key] = fp.read()
+
+            return ret
+
+    def memoize(self, filename, encoding, name, fn):
+        '''Return ``fn(contents)`` memoizing its result under ``name``.'''
+
+        if isinstance(filename, int):
+            return fn(self.read(filename, encoding))
+
+        key = (self._key(filename, encoding), name)
+        try:
+            return self._derived[key]
+        except KeyError:
+            ret = self._derived[key] = fn(self.read(filename, encoding))
+            return ret
+
+
+# The file cache of the current evaluation; `None` if caching is disabled
+_file_cache_active = None
+
+
+@contextlib.contextmanager
+def _file_cache():
+    '''Cache the contents of any file read by the sanity functions inside
+    this context.
+
+    Each file is read and decoded only once, regardless of how many sanity
+    functions examine it. Nested contexts share the outermost cache.
+    '''
+    global _file_cache_active
+
+    if _file_cache_active is not None:
+        yield _file_cache_active
+        return
+
+    _file_cache_active = _FileCache()
+    try:
+        yield _file_cache_active
+    finally:
+        _file_cache_active = None
+
+
+def _read(filename, encoding):
+    '''Return the contents of ``filename``, using the current file cache if
+    any.'''
+
+    if _file_cache_active is not None:
+        return _file_cache_active.read(filename, encoding)
+
+    with _open(filename, 'rt', encoding=encoding) as fp:
+        return fp.read()
+
+
 def make_performance_function(func, unit, *args, **kwargs):
     '''Convert a callable or deferred expression into a performance function.
 
@@ -132,13 +317,29 @@ def map(function, *iterables):
 
 @deferrable
 def max(*args):
-    '''Replacement for the built-in :func:`max() <python:max>` function.'''
+    '''Replacement for the built-in :func:`max() <python:max>` function.
+
+    .. versionchanged:: 4.6
+       A single NumPy array argument is reduced without iterating over its
+       elements.
+    '''
+    if builtins.len(args) == 1 and _is_vector(args[0]) and args[0].size:
+        return args[0].max().item()
+
     return builtins.max(*args)
 
 
 @deferrable
 def min(*args):
-    '''Replacement for the built-in :func:`min() <python:min>` function.'''
+    '''Replacement for the built-in :func:`min() <python:min>` function.
+
+    .. versionchanged:: 4.6
+       A single NumPy array argument is reduced without iterating over its
+       elements.
+    '''
+    if builtins.len(args) == 1 and _is_vector(args[0]) and args[0].size:
+        return args[0].min().item()
+
     return builtins.min(*args)
 
 
@@ -210,7 +411,14 @@ def sorted(iterable, *args):
 
 @deferrable
 def sum(iterable, *args):
-    '''Replacement for the built-in :func:`sum() <python:sum>` function.'''
+    '''Replacement for the built-in :func:`sum() <python:sum>` function.
+
+    .. versionchanged:: 4.6
+       NumPy arrays are summed without iterating over their elements.
+    '''
+    if _is_vector(iterable):
+        return builtins.sum(args, iterable.sum().item())
+
     return builtins.sum(iterable, *args)
 
 
@@ -418,7 +626,8 @@ def assert_le(a, b, msg=None):
 
 
 @deferrable
-def assert_found(patt, filename, msg=None, encoding='utf-8'):
+def assert_found(patt, filename, msg=None, encoding='utf-8',
+                 mode='text', tail=None):
     '''Assert that regex pattern ``patt`` is found in the file ``filename``.
 
     :arg patt: The regex pattern to search.
@@ -428,20 +637,33 @@ def assert_found(patt, filename, msg=None, encoding='utf-8'):
         The `re.MULTILINE
         <https://docs.python.org/3/library/re.html#re.MULTILINE>`_ flag
         is set for the pattern search.
+        A pattern compiled with :func:`re.compile` is also accepted, in
+        which case it is used with its own flags.
     :arg filename: The name of the file to examine or a file descriptor as in
         :py:func:`open`. Any :class:`OSError` raised while processing the file
         will be propagated as a :class:`reframe.core.exceptions.SanityError`.
     :arg msg: The error message to use if the assertion fails. You may use
         ``{0}`` ... ``{N}`` as placeholders for the function arguments.
     :arg encoding: The name of the encoding used to decode the file.
+    :arg mode: The mode for searching the file as in :func:`finditer`.
+        The search stops at the first match in all modes but ``'text'``.
+    :arg tail: Search only the last ``tail`` bytes of the file as in
+        :func:`finditer`.
     :returns: ``True`` on success.
     :raises reframe.core.exceptions.SanityError: if assertion fails.
+
+    .. versionchanged:: 4.6
+       The ``mode`` and ``tail`` arguments are added and compiled patterns
+       are accepted.
     '''
-    with _open(filename, 'rt', encoding=encoding) as fp:
-        return assert_found_s(
-            patt, fp.read(),
-            msg or f'pattern {patt!r} not found in {filename!r}'
-        )
+    msg = msg or f'pattern {patt!r} not found in {filename!r}'
+    if mode == 'text' and tail is None:
+        return assert_found_s(patt, _read(filename, encoding), msg)
+
+    for _ in _finditer_file(patt, filename, encoding, mode, tail):
+        return True
+
+    raise SanityError(_format(msg, patt, filename))
 
 
 @deferrable
@@ -457,18 +679,16 @@ def assert_found_s(patt, string, msg=None):
 
     .. versionadded:: 3.4.1
     '''
-    num_matches = count(finditer_s(patt, string))
-    try:
-        evaluate(assert_true(num_matches))
-    except SanityError:
+    if _compile(patt).search(string) is None:
         error_msg = msg or "pattern `{0}' not found in given string"
         raise SanityError(_format(error_msg, patt, string))
-    else:
-        return True
+
+    return True
 
 
 @deferrable
-def assert_not_found(patt, filename, msg=None, encoding='utf-8'):
+def assert_not_found(patt, filename, msg=None, encoding='utf-8',
+                     mode='text', tail=None):
     '''Assert that regex pattern ``patt`` is not found in the file
     ``filename``.
 
@@ -476,11 +696,18 @@ def assert_not_found(patt, filename, msg=None, encoding='utf-8'):
 
     :returns: ``True`` on success.
     :raises reframe.core.exceptions.SanityError: if assertion fails.
+
+    .. versionchanged:: 4.6
+       The ``mode`` and ``tail`` arguments are added.
     '''
-    with _open(filename, 'rt', encoding=encoding) as fp:
-        return assert_not_found_s(
-            patt, fp.read(), msg or f'pattern {patt!r} found in {filename!r}'
-        )
+    msg = msg or f'pattern {patt!r} found in {filename!r}'
+    if mode == 'text' and tail is None:
+        return assert_not_found_s(patt, _read(filename, encoding), msg)
+
+    for _ in _finditer_file(patt, filename, encoding, mode, tail):
+        raise SanityError(_format(msg, patt, filename))
+
+    return True
 
 
 @deferrable
@@ -548,23 +775,36 @@ def assert_reference(val, ref, lower_thres=None, upper_thres=None, msg=None):
     :raises reframe.core.exceptions.SanityError: if assertion fails or if the
         lower and upper thresholds do not have appropriate values.
     '''
+    lower, upper = _reference_bounds(ref, lower_thres, upper_thres)
+    try:
+        evaluate(assert_bounded(val, lower, upper))
+    except SanityError:
+        error_msg = msg or '{0} is beyond reference value {1} (l={2}, u={3})'
+        raise SanityError(_format(error_msg, val, ref, lower, upper)) from None
+    else:
+        return True
+
+
+def _reference_bounds(ref, lower_thres=None, upper_thres=None):
+    '''Return the lower and upper bounds of reference value ``ref`` given its
+    thresholds.
+
+    The arguments are as in :func:`assert_reference`.
+
+    :raises reframe.core.exceptions.SanityError: if the thresholds do not have
+        appropriate values.
+    '''
+    # The thresholds are checked with plain comparisons, since this is called
+    # for every performance variable of a test
     if lower_thres is not None:
-        lower_thres_limit = -1 if ref >= 0 else None
-        try:
-            evaluate(assert_bounded(lower_thres, lower_thres_limit, 0))
-        except SanityError:
-            raise SanityError(
-                f'invalid low threshold value: {lower_thres}'
-            ) from None
+        lower_thres_limit = -1 if ref >= 0 else float('-inf')
+        if not (lower_thres >= lower_thres_limit and lower_thres <= 0):
+            raise SanityError(f'invalid low threshold value: {lower_thres}')
 
     if upper_thres is not None:
-        upper_thres_limit = None if ref >= 0 else 1
-        try:
-            evaluate(assert_bounded(upper_thres, 0, upper_thres_limit))
-        except SanityError:
-            raise SanityError(
-                f'invalid high threshold value: {upper_thres}'
-            ) from None
+        upper_thres_limit = float('inf') if ref >= 0 else 1
+        if not (upper_thres >= 0 and upper_thres <= upper_thres_limit):
+            raise SanityError(f'invalid high threshold value: {upper_thres}')
 
     def calc_bound(thres):
         if thres is None:
@@ -578,27 +818,161 @@ def assert_reference(val, ref, lower_thres=None, upper_thres=None, msg=None):
 
     lower = calc_bound(lower_thres) or float('-inf')
     upper = calc_bound(upper_thres) or float('inf')
-    try:
-        evaluate(assert_bounded(val, lower, upper))
-    except SanityError:
-        error_msg = msg or '{0} is beyond reference value {1} (l={2}, u={3})'
-        raise SanityError(_format(error_msg, val, ref, lower, upper)) from None
-    else:
-        return True
+    return lower, upper
 
 
 # Pattern matching functions
 
+# Size of the chunks read from a file in the ``'stream'`` mode
+_STREAM_CHUNK_SIZE = 1 << 20
+
+# Number of lines of a chunk that are searched again along with the next one
+# in the ``'stream'`` mode; this is the maximum number of lines that a match
+# may span
+_STREAM_OVERLAP = 64
+
+
+def _tail_offset(fp, tail):
+    '''Return the offset of the first full line within the last ``tail``
+    bytes of the binary file ``fp``.'''
+
+    size = os.fstat(fp.fileno()).st_size
+    if tail is None or tail >= size:
+        return 0
+
+    # Start one byte earlier, so that we don't skip a full line if we land
+    # exactly at its beginning
+    fp.seek(size - tail - 1)
+    fp.readline()
+    return fp.tell()
+
+
+def _line_offset(text, nlines):
+    '''Return the offset of the start of the ``nlines``-th line from the end
+    of ``text``, which must end with a newline.'''
+
+    pos = builtins.len(text) - 1
+    for _ in range(nlines):
+        pos = text.rfind('\n', 0, pos)
+        if pos < 0:
+            return 0
+
+    return pos + 1
+
+
+def _finditer_stream(regex, fp):
+    # The text is searched in windows of full lines. Each window overlaps
+    # with the last `_STREAM_OVERLAP` lines of the previous one and it is
+    # responsible for the matches starting before the next window, so that
+    # any match spanning up to `_STREAM_OVERLAP` lines is found exactly once.
+    carry = ''
+    offset = 0
+    last_end = 0
+    while True:
+        data = fp.read(_STREAM_CHUNK_SIZE)
+        text = carry + data
+        if data:
+            cut = text.rfind('\n') + 1
+            if cut == 0:
+                # No full line yet; keep reading
+                carry = text
+                continue
+
+            window = text[:cut]
+            next_start = _line_offset(window, _STREAM_OVERLAP)
+        else:
+            window = text
+            next_start = builtins.len(window)
+
+        for m in regex.finditer(window):
+            if m.start() >= next_start:
+                break
+
+            if offset + m.start() < last_end:
+                # The match overlaps with one we have already found
+                continue
+
+            last_end = offset + m.end()
+            yield m
+
+        if not data:
+            return
+
+        carry = text[next_start:]
+        offset += next_start
+
+
+def _finditer_file(patt, filename, encoding, mode, tail):
+    if mode not in ('text', 'mmap', 'stream'):
+        raise SanityError(f'invalid search mode: {mode!r}')
+
+    if mode == 'text' and tail is None:
+        yield from _compile(patt).finditer(_read(filename, encoding))
+        return
+
+    if (mode == 'mmap' or tail is not None) and '\n'.encode(encoding) != b'\n':
+        raise SanityError(
+            f'encoding {encoding!r} is not supported when searching '
+            f'in {mode!r} mode or with tail'
+        )
+
+    with _open(filename, 'rb') as fp:
+        start = _tail_offset(fp, tail)
+        if mode == 'mmap':
+            if os.fstat(fp.fileno()).st_size == 0:
+                return
+
+            # The map remains valid after the file is closed and lives for as
+            # long as the match objects that refer to it
+            regex = _compile_bytes(patt, encoding)
+            contents = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            fp.seek(start)
+            text = io.TextIOWrapper(fp, encoding=encoding)
+            regex = _compile(patt)
+            if mode == 'stream':
+                yield from _finditer_stream(regex, text)
+                return
+
+            contents = text.read()
+            start = 0
+
+    yield from regex.finditer(contents, start)
+
+
 @deferrable
-def finditer(patt, filename, encoding='utf-8'):
+def finditer(patt, filename, encoding='utf-8', mode='text', tail=None):
     '''Get an iterator over the matches of the regex ``patt`` in ``filename``.
 
     This function is equivalent to :func:`findall()` except that it returns
     a generator object instead of a list, which you can use to iterate over
     the raw matches.
+
+    The file may be searched in one of the following modes:
+
+    - ``'text'``: The whole file is read and decoded in memory before it is
+      searched. This is the default.
+    - ``'mmap'``: The file is memory-mapped and searched as bytes without
+      being read in memory. The pattern is encoded using ``encoding`` and
+      the returned match objects refer to bytes. Only encodings that are
+      compatible with ASCII, such as UTF-8, are supported.
+    - ``'stream'``: The file is read and searched in chunks of lines, so that
+      the memory needed is bounded, regardless of the file size. This mode is
+      meant for patterns that match within a line, but matches that span up
+      to 64 lines are also found. The positions of the returned match objects
+      are relative to the chunk that they were found in and the ``\\A`` and
+      ``\\Z`` anchors refer to the chunk boundaries.
+
+    If ``tail`` is not :obj:`None`, only the lines contained in the last
+    ``tail`` bytes of the file will be searched. This is useful for large
+    outputs where the relevant information, e.g., a performance summary,
+    is printed at the end. Only encodings that are compatible with ASCII are
+    supported with this option.
+
+    .. versionchanged:: 4.6
+       The ``mode`` and ``tail`` arguments are added.
     '''
-    with _open(filename, 'rt', encoding=encoding) as fp:
-        yield from re.finditer(patt, fp.read(), re.MULTILINE)
+    yield from _finditer_file(patt, filename, encoding, mode, tail)
 
 
 @deferrable
@@ -611,11 +985,11 @@ def finditer_s(patt, string):
 
     .. versionadded:: 3.4.1
     '''
-    yield from re.finditer(patt, string, re.MULTILINE)
+    yield from _compile(patt).finditer(string)
 
 
 @deferrable
-def findall(patt, filename, encoding='utf-8'):
+def findall(patt, filename, encoding='utf-8', mode='text', tail=None):
     '''Get all matches of regex ``patt`` in ``filename``.
 
     :arg patt: The regex pattern to search.
@@ -625,14 +999,23 @@ def findall(patt, filename, encoding='utf-8'):
         The `re.MULTILINE
         <https://docs.python.org/3/library/re.html#re.MULTILINE>`_ flag
         is set for the pattern search.
+        A pattern compiled with :func:`re.compile` is also accepted, in
+        which case it is used with its own flags.
     :arg filename: The name of the file to examine.
     :arg encoding: The name of the encoding used to decode the file.
+    :arg mode: The mode for searching the file as in :func:`finditer`.
+    :arg tail: Search only the last ``tail`` bytes of the file as in
+        :func:`finditer`.
     :returns: A list of raw `regex match objects
         <https://docs.python.org/3/library/re.html#match-objects>`_.
     :raises reframe.core.exceptions.SanityError: In case an :class:`OSError` is
         raised while processing ``filename``.
+
+    .. versionchanged:: 4.6
+       The ``mode`` and ``tail`` arguments are added.
     '''
-    return list(evaluate(x) for x in finditer(patt, filename, encoding))
+    return list(evaluate(x)
+                for x in finditer(patt, filename, encoding, mode, tail))
 
 
 @deferrable
@@ -663,17 +1046,20 @@ def _callable_name(fn):
     return fn_name
 
 
-def _extractiter_singletag(patt, string, tag, conv):
+def _extractiter_singletag(patt, matches, tag, conv, decode=None):
     if isinstance(conv, collections.abc.Iterable):
         raise SanityError(f'multiple conversion functions given for the '
                           f'single capturing group {tag!r}')
 
-    for m in finditer_s(patt, string):
+    for m in matches:
         try:
             val = m.group(tag)
         except (IndexError, KeyError):
             raise SanityError(f'no such group in pattern {patt!r}: {tag}')
 
+        if decode and val is not None:
+            val = decode(val)
+
         try:
             yield conv(val) if callable(conv) else val
         except ValueError:
@@ -683,15 +1069,17 @@ def _extractiter_singletag(patt, string, tag, conv):
             )
 
 
-def _extractiter_multitag(patt, string, tags, conv):
-    for m in finditer_s(patt, string):
+def _extractiter_multitag(patt, matches, tags, conv, decode=None):
+    for m in matches:
         val = []
         for t in tags:
             try:
-                val.append(m.group(t))
+                v = m.group(t)
             except (IndexError, KeyError):
                 raise SanityError(f'no such group in pattern {patt!r}: {t}')
 
+            val.append(decode(v) if decode and v is not None else v)
+
         converted_vals = []
         if not isinstance(conv, collections.abc.Iterable):
             conv = [conv] * builtins.len(val)
@@ -712,17 +1100,36 @@ def _extractiter_multitag(patt, string, tags, conv):
         yield tuple(converted_vals)
 
 
+def _extractiter(patt, matches, tag, conv, decode=None):
+    if isinstance(tag, collections.abc.Iterable) and not isinstance(tag, str):
+        yield from _extractiter_multitag(patt, matches, tag, conv, decode)
+    else:
+        yield from _extractiter_singletag(patt, matches, tag, conv, decode)
+
+
 @deferrable
-def extractiter(patt, filename, tag=0, conv=None, encoding='utf-8'):
+def extractiter(patt, filename, tag=0, conv=None, encoding='utf-8',
+                mode='text', tail=None):
     '''Get an iterator over the values extracted from the capturing group
     ``tag`` of a matching regex ``patt`` in the file ``filename``.
 
     This function is equivalent to :func:`extractall` except that it returns
     a generator object, instead of a list, which you can use to iterate over
     the extracted values.
+
+    .. versionchanged:: 4.6
+       The ``mode`` and ``tail`` arguments are added.
     '''
-    with _open(filename, 'rt', encoding=encoding) as fp:
-        yield from extractiter_s(patt, fp.read(), tag, conv)
+    if mode == 'mmap':
+        def decode(v):
+            return v.decode(encoding)
+    else:
+        decode = None
+
+    yield from _extractiter(
+        patt, _finditer_file(patt, filename, encoding, mode, tail),
+        tag, conv, decode
+    )
 
 
 @deferrable
@@ -736,14 +1143,12 @@ def extractiter_s(patt, string, tag=0, conv=None):
 
     .. versionadded:: 3.4.1
     '''
-    if isinstance(tag, collections.abc.Iterable) and not isinstance(tag, str):
-        yield from _extractiter_multitag(patt, string, tag, conv)
-    else:
-        yield from _extractiter_singletag(patt, string, tag, conv)
+    yield from _extractiter(patt, finditer_s(patt, string), tag, conv)
 
 
 @deferrable
-def extractall(patt, filename, tag=0, conv=None, encoding='utf-8'):
+def extractall(patt, filename, tag=0, conv=None, encoding='utf-8',
+               mode='text', tail=None):
     '''Extract all values from the capturing group ``tag`` of a matching regex
     ``patt`` in the file ``filename``.
 
@@ -754,6 +1159,8 @@ def extractall(patt, filename, tag=0, conv=None, encoding='utf-8'):
         The `re.MULTILINE
         <https://docs.python.org/3/library/re.html#re.MULTILINE>`_ flag
         is set for the pattern search.
+        A pattern compiled with :func:`re.compile` is also accepted, in
+        which case it is used with its own flags.
     :arg filename: The name of the file to examine or a file descriptor as in
         :py:func:`open`.
     :arg encoding: The name of the encoding used to decode the file.
@@ -770,6 +1177,9 @@ def extractall(patt, filename, tag=0, conv=None, encoding='utf-8'):
         If more conversion functions are supplied than the corresponding
         capturing groups in ``tag``, the last conversion function will be used
         for the additional capturing groups.
+    :arg mode: The mode for searching the file as in :func:`finditer`.
+    :arg tail: Search only the last ``tail`` bytes of the file as in
+        :func:`finditer`.
     :returns: A list of tuples of converted values extracted from the
          capturing groups specified in ``tag``, if ``tag`` is an iterable.
          Otherwise, a list of the converted values extracted from the single
@@ -779,9 +1189,13 @@ def extractall(patt, filename, tag=0, conv=None, encoding='utf-8'):
     .. versionchanged:: 3.1
         Multiple regex capturing groups are now supporetd via ``tag`` and
         multiple conversion functions can be used in ``conv``.
+
+    .. versionchanged:: 4.6
+       The ``mode`` and ``tail`` arguments are added.
     '''
     return list(evaluate(x)
-                for x in extractiter(patt, filename, tag, conv, encoding))
+                for x in extractiter(patt, filename, tag, conv,
+                                     encoding, mode, tail))
 
 
 @deferrable
@@ -801,7 +1215,8 @@ def extractall_s(patt, string, tag=0, conv=None):
 
 
 @deferrable
-def extractsingle(patt, filename, tag=0, conv=None, item=0, encoding='utf-8'):
+def extractsingle(patt, filename, tag=0, conv=None, item=0, encoding='utf-8',
+                  mode='text', tail=None):
     '''Extract a single value from the capturing group ``tag`` of a matching
     regex ``patt`` in the file ``filename``.
 
@@ -815,15 +1230,20 @@ def extractsingle(patt, filename, tag=0, conv=None, item=0, encoding='utf-8'):
     :arg tag: as in :func:`extractall`.
     :arg conv: as in :func:`extractall`.
     :arg item: the specific element to extract.
+    :arg mode: as in :func:`extractall`.
+    :arg tail: as in :func:`extractall`.
     :returns: The extracted value.
     :raises reframe.core.exceptions.SanityError: In case of errors.
 
+    .. versionchanged:: 4.6
+       The ``mode`` and ``tail`` arguments are added.
     '''
     try:
         # Explicitly evaluate the expression here, so as to force any exception
         # to be thrown in this context and not during the evaluation of an
         # expression containing this one.
-        return evaluate(extractall(patt, filename, tag, conv, encoding)[item])
+        return evaluate(extractall(patt, filename, tag, conv,
+                                   encoding, mode, tail)[item])
     except IndexError:
         raise SanityError(
             f'not enough matches of pattern {patt!r} in file {filename!r} '
@@ -862,11 +1282,528 @@ def extractsingle_s(patt, string, tag=0, conv=None, item=0):
         )
 
 
+def _numpy():
+    try:
+        import numpy
+    except ImportError as err:
+        raise SanityError(f'could not import numpy: {err}') from None
+
+    return numpy
+
+
+def _is_vector(x):
+    '''Check if ``x`` is a one-dimensional NumPy array.
+
+    There is no need to import NumPy for this check; if it is not already
+    imported, ``x`` cannot be an array.
+    '''
+    np = sys.modules.get('numpy')
+    return np is not None and isinstance(x, np.ndarray) and x.ndim == 1
+
+
+def _group_values(patt, matches, tag):
+    multitag = (isinstance(tag, collections.abc.Iterable) and
+                not isinstance(tag, str))
+    tags = tuple(tag) if multitag else (tag,)
+    try:
+        return [m.group(*tags) for m in matches]
+    except (IndexError, KeyError):
+        raise SanityError(f'no such group in pattern {patt!r}: {tag}')
+
+
+def _group_values_s(patt, string, tag):
+    regex = _compile(patt)
+    multitag = (isinstance(tag, collections.abc.Iterable) and
+                not isinstance(tag, str))
+    tags = tuple(tag) if multitag else (tag,)
+    try:
+        groups = [regex.groupindex[t] if isinstance(t, str) else t
+                  for t in tags]
+    except KeyError:
+        groups = None
+
+    if (groups is not None and
+        groups == builtins.list(range(1, regex.groups + 1))):
+        # The requested groups are exactly the groups of the pattern, so we
+        # can let `findall()` collect the values without creating any match
+        # objects
+        return regex.findall(string)
+    elif groups == [0] and regex.groups == 0:
+        return regex.findall(string)
+
+    return _group_values(patt, regex.finditer(string), tag)
+
+
+def _to_array(patt, values, dtype):
+    np = _numpy()
+    try:
+        return np.array(values, dtype=dtype)
+    except (TypeError, ValueError) as err:
+        raise SanityError(
+            f'could not convert the values extracted by pattern {patt!r}: '
+            f'{err}'
+        ) from None
+
+
+@deferrable
+def extractall_array(patt, filename, tag=0, dtype=float, encoding='utf-8',
+                     mode='text', tail=None):
+    '''Extract all values from the capturing group ``tag`` of a matching
+    regex ``patt`` in the file ``filename`` into a NumPy array.
+
+    This function is equivalent to :func:`extractall`, except that the
+    extracted values are converted to ``dtype`` in bulk and are returned as
+    a NumPy array. This is much faster than converting each value with a
+    conversion function, when a large number of values is extracted. The
+    reduction functions of this module, such as :func:`avg`, :func:`max`,
+    :func:`sum`, :func:`median` and :func:`percentile`, operate directly on
+    the returned array.
+
+    :arg patt: as in :func:`extractall`.
+    :arg filename: as in :func:`extractall`.
+    :arg tag: as in :func:`extractall`. If multiple capturing groups are
+        specified, a two-dimensional array will be returned with one row
+        per match.
+    :arg dtype: The NumPy data type of the returned array.
+    :arg encoding: as in :func:`extractall`.
+    :arg mode: as in :func:`extractall`.
+    :arg tail: as in :func:`extractall`.
+    :returns: A NumPy array of the extracted values.
+    :raises reframe.core.exceptions.SanityError: In case of errors or if
+        NumPy is not available.
+
+    .. versionadded:: 4.6
+    '''
+    if mode == 'text' and tail is None:
+        values = _group_values_s(patt, _read(filename, encoding), tag)
+    else:
+        values = _group_values(
+            patt, _finditer_file(patt, filename, encoding, mode, tail), tag
+        )
+
+    return _to_array(patt, values, dtype)
+
+
+@deferrable
+def extractall_array_s(patt, string, tag=0, dtype=float):
+    '''Extract all values from the capturing group ``tag`` of a matching
+    regex ``patt`` in ``string`` into a NumPy array.
+
+    :arg patt: as in :func:`extractall_array`.
+    :arg string: The string to examine.
+    :arg tag: as in :func:`extractall_array`.
+    :arg dtype: as in :func:`extractall_array`.
+    :returns: same as :func:`extractall_array`.
+
+    .. versionadded:: 4.6
+    '''
+    return _to_array(patt, _group_values_s(patt, string, tag), dtype)
+
+
+# Patterns containing back references cannot be combined with others
+_BACKREF = re.compile(r'\\[1-9]|\(\?P=')
+
+
+def _parse_extract_spec(name, spec):
+    if isinstance(spec, (str, _Pattern)):
+        spec = (spec,)
+
+    spec = tuple(spec)
+    if builtins.len(spec) not in (1, 2, 3):
+        raise SanityError(f'invalid extraction spec for {name!r}: {spec!r}')
+
+    patt, tag, conv = spec + (0, None)[builtins.len(spec) - 1:]
+    if isinstance(conv, collections.abc.Iterable):
+        raise SanityError(f'multiple conversion functions given for the '
+                          f'single capturing group {tag!r}')
+
+    return patt, tag, conv
+
+
+def _first_matches(patterns, string):
+    '''Find the first match of every pattern in ``patterns``.
+
+    Returns a dictionary mapping each pattern that was found to a tuple of
+    its compiled version, the match object and the offset of its capturing
+    groups in the match object.
+    '''
+
+    compiled = [_compile(p) for p in patterns]
+    flags = compiled[0].flags if compiled else 0
+    scanner = None
+    if (builtins.len(compiled) > 1 and
+        builtins.all(isinstance(c.pattern, str) and c.flags == flags and
+                     not _BACKREF.search(c.pattern) for c in compiled)):
+        # Wrap each pattern in a capturing group, so that we can tell which
+        # alternative matched from the `lastindex` of the match object
+        alternatives, offsets = [], []
+        offset = 1
+        for c in compiled:
+            alternatives.append(f'({c.pattern})')
+            offsets.append(offset)
+            offset += c.groups + 1
+
+        try:
+            scanner = _compile_cached('|'.join(alternatives), flags)
+        except re.error:
+            # The patterns cannot be combined, e.g., due to duplicate group
+            # names; fall back to separate searches
+            pass
+
+    found = {}
+    start = 0
+    if scanner is not None:
+        # Find the earliest position where any of the patterns matches
+        m = scanner.search(string)
+        if m is None:
+            return {}
+
+        index = {off: i for i, off in builtins.enumerate(offsets)}
+        i = index[m.lastindex]
+        found[i] = (compiled[i], m, offsets[i])
+
+        # None of the patterns matches before this position, but the first
+        # match of another pattern may start inside the match we found, so
+        # we search for it separately; searching from `start` respects
+        # anchors and lookbehinds as if we searched the whole string
+        start = m.start()
+
+    for i, c in builtins.enumerate(compiled):
+        if i in found:
+            continue
+
+        m = c.search(string, start)
+        if m:
+            found[i] = (c, m, 0)
+
+    return {patterns[i]: v for i, v in found.items()}
+
+
+def _extract_many(patterns, string, where):
+    specs = {name: _parse_extract_spec(name, spec)
+             for name, spec in patterns.items()}
+    uniq_patterns = builtins.list(
+        dict.fromkeys(patt for patt, *_ in specs.values())
+    )
+    matches = _first_matches(uniq_patterns, string)
+    ret = {}
+    for name, (patt, tag, conv) in specs.items():
+        try:
+            regex, m, offset = matches[patt]
+        except KeyError:
+            raise SanityError(f'pattern {patt!r} not found in {where}')
+
+        try:
+            group = regex.groupindex[tag] if isinstance(tag, str) else tag
+            if group < 0 or group > regex.groups:
+                raise IndexError
+        except (IndexError, KeyError, TypeError):
+            raise SanityError(f'no such group in pattern {patt!r}: {tag}')
+
+        val = m.group(offset + group)
+        try:
+            ret[name] = conv(val) if callable(conv) else val
+        except ValueError:
+            fn_name = _callable_name(conv)
+            raise SanityError(
+                f'could not convert value {val!r} using {fn_name}()'
+            )
+
+    return ret
+
+
+@deferrable
+def extract_many(patterns, filename, encoding='utf-8'):
+    '''Extract multiple values from the file ``filename`` at once.
+
+    This function is equivalent to calling :func:`extractsingle` for every
+    entry in ``patterns``, except that the file is read only once for all
+    the patterns and the text preceding their first matches is scanned only
+    once. For example:
+
+    .. code-block:: python
+
+        @performance_function('GB/s')
+        def bandwidth(self):
+            return sn.extract_many({
+                'copy': (r'Copy:\\s+(\\S+)', 1, float),
+                'triad': (r'Triad:\\s+(\\S+)', 1, float)
+            }, self.stdout)['triad']
+
+    The result of this function may also be indexed to build multiple
+    performance variables with :func:`make_performance_function`. Within the
+    same performance stage, the file will be read only once for all of
+    them.
+
+    :arg patterns: A dictionary mapping names to extraction specs. Each spec
+        is a tuple ``(patt, tag, conv)`` with the same meaning as the
+        corresponding arguments of :func:`extractsingle`. The ``tag`` and
+        ``conv`` elements may be omitted, in which case they default to ``0``
+        and ``None``, respectively.
+        A single pattern string may also be passed as a spec.
+        Only the first match of each pattern is considered.
+    :arg filename: as in :func:`extractall`.
+    :arg encoding: as in :func:`extractall`.
+    :returns: A dictionary mapping the names in ``patterns`` to the
+        extracted values.
+    :raises reframe.core.exceptions.SanityError: In case of errors.
+
+    .. versionadded:: 4.6
+    '''
+
+    def _extract(string):
+        return _extract_many(patterns, string, f'file {filename!r}')
+
+    if _file_cache_active is None:
+        return _extract(_read(filename, encoding))
+
+    try:
+        name = ('extract_many', tuple(patterns.items()))
+        hash(name)
+    except TypeError:
+        # Unhashable specs; we can't memoize the result
+        return _extract(_read(filename, encoding))
+
+    return dict(
+        _file_cache_active.memoize(filename, encoding, name, _extract)
+    )
+
+
+@deferrable
+def extract_many_s(patterns, string):
+    '''Extract multiple values from ``string`` at once.
+
+    :arg patterns: as in :func:`extract_many`.
+    :arg string: The string to examine.
+    :returns: same as :func:`extract_many`.
+
+    .. versionadded:: 4.6
+    '''
+    return _extract_many(patterns, string, 'the given string')
+
+
+def _convert(val, conv):
+    if not callable(conv):
+        return val
+
+    try:
+        return conv(val)
+    except ValueError:
+        fn_name = _callable_name(conv)
+        raise SanityError(
+            f'could not convert value {val!r} using {fn_name}()'
+        ) from None
+
+
+def _parse_json(string, where):
+    try:
+        return json.loads(string)
+    except ValueError as err:
+        raise SanityError(f'could not parse JSON in {where}: {err}') from None
+
+
+def _extract_json(doc, path, conv, where):
+    keys = path.split('.') if isinstance(path, str) else path
+    val = doc
+    for key in keys:
+        try:
+            if isinstance(val, builtins.list):
+                val = val[int(key)]
+            else:
+                val = val[key]
+        except (IndexError, KeyError, TypeError, ValueError):
+            raise SanityError(f'path {path!r} not found in {where}') from None
+
+    return _convert(val, conv)
+
+
+@deferrable
+def extract_json(filename, path, conv=None, encoding='utf-8'):
+    '''Extract the value at ``path`` from the JSON file ``filename``.
+
+    For example, the following extracts the ``bandwidth`` of the first
+    element of the ``results`` list of a JSON document:
+
+    .. code-block:: python
+
+        @performance_function('GB/s')
+        def bandwidth(self):
+            return sn.extract_json('results.json', 'results.0.bandwidth')
+
+    The file is parsed only once during the sanity and performance stages
+    of a test, regardless of how many values are extracted from it.
+
+    :arg filename: The name of the JSON file.
+    :arg path: The path of the value to extract. This is either a string of
+        object keys and list indices separated by dots or a sequence of
+        them, if any key contains a dot. An empty sequence refers to the
+        whole document.
+    :arg conv: A callable to convert the extracted value.
+    :arg encoding: The name of the encoding used to decode the file.
+    :returns: The extracted value, converted by ``conv`` if given.
+    :raises reframe.core.exceptions.SanityError: If the file cannot be
+        parsed, if the path is not found or if the conversion fails.
+
+    .. versionadded:: 4.6
+    '''
+    where = f'file {filename!r}'
+    if _file_cache_active is None:
+        doc = _parse_json(_read(filename, encoding), where)
+    else:
+        doc = _file_cache_active.memoize(
+            filename, encoding, 'extract_json',
+            lambda string: _parse_json(string, where)
+        )
+
+    return _extract_json(doc, path, conv, where)
+
+
+@deferrable
+def extract_json_s(string, path, conv=None):
+    '''Extract the value at ``path`` from the JSON document ``string``.
+
+    :arg string: The JSON document.
+    :arg path: as in :func:`extract_json`.
+    :arg conv: as in :func:`extract_json`.
+    :returns: same as :func:`extract_json`.
+
+    .. versionadded:: 4.6
+    '''
+    return _extract_json(_parse_json(string, 'the given string'),
+                         path, conv, 'the given string')
+
+
+def _extract_csv(rows, column, where, conv, loc):
+    try:
+        header = next(rows)
+    except StopIteration:
+        raise SanityError(f'no header found in {loc}') from None
+
+    index = {name: i for i, name in builtins.enumerate(header)}
+
+    def _column_index(col):
+        if isinstance(col, int):
+            if col >= builtins.len(header) or col < -builtins.len(header):
+                raise SanityError(f'no such column in {loc}: {col}')
+
+            return col
+
+        try:
+            return index[col]
+        except KeyError:
+            raise SanityError(f'no such column in {loc}: {col!r}') from None
+
+    col = _column_index(column)
+    conditions = [(_column_index(c), v) for c, v in (where or {}).items()]
+    ret = []
+    for row in rows:
+        if not row:
+            continue
+
+        try:
+            if builtins.all(v(row[i]) if callable(v) else row[i] == str(v)
+                            for i, v in conditions):
+                ret.append(_convert(row[col], conv))
+        except IndexError:
+            raise SanityError(f'malformed row in {loc}: {row!r}') from None
+
+    return ret
+
+
+def _read_csv(string, delimiter):
+    return builtins.list(
+        csv.reader(io.StringIO(string, newline=''), delimiter=delimiter)
+    )
+
+
+@deferrable
+def extract_csv(filename, column, where=None, conv=None, delimiter=',',
+                encoding='utf-8'):
+    '''Extract the values of ``column`` from the CSV file ``filename``.
+
+    The first row of the file must be a header with the column names. For
+    example, the following extracts the ``time`` of the rows whose ``size``
+    is ``1024``:
+
+    .. code-block:: python
+
+        @performance_function('s')
+        def time_1k(self):
+            return sn.extract_csv('results.csv', 'time',
+                                  where={'size': 1024}, conv=float)[0]
+
+    If the file cache of the sanity and performance stages is active, the
+    file is parsed only once, regardless of how many values are extracted
+    from it. Otherwise, it is read row by row.
+
+    :arg filename: The name of the CSV file.
+    :arg column: The name of the column to extract or its index.
+    :arg where: A dictionary mapping column names or indices to the values
+        that the rows to extract must have in these columns. The values are
+        converted to strings before they are compared. A callable may be
+        passed instead of a value, in which case it is called with the value
+        of the column and it must return :obj:`True` for the rows to extract.
+        If :obj:`None`, all rows are extracted.
+    :arg conv: A callable to convert each extracted value.
+    :arg delimiter: The delimiter of the columns.
+    :arg encoding: The name of the encoding used to decode the file.
+    :returns: A list of the extracted values.
+    :raises reframe.core.exceptions.SanityError: In case of errors.
+
+    .. versionadded:: 4.6
+    '''
+    loc = f'file {filename!r}'
+    try:
+        if _file_cache_active is not None:
+            rows = _file_cache_active.memoize(
+                filename, encoding, ('extract_csv', delimiter),
+                lambda string: _read_csv(string, delimiter)
+            )
+            return _extract_csv(iter(rows), column, where, conv, loc)
+
+        with _open(filename, 'rt', encoding=encoding, newline='') as fp:
+            return _extract_csv(csv.reader(fp, delimiter=delimiter),
+                                column, where, conv, loc)
+    except csv.Error as err:
+        raise SanityError(f'could not parse CSV in {loc}: {err}') from None
+
+
+@deferrable
+def extract_csv_s(string, column, where=None, conv=None, delimiter=','):
+    '''Extract the values of ``column`` from the CSV data in ``string``.
+
+    :arg string: The CSV data.
+    :arg column: as in :func:`extract_csv`.
+    :arg where: as in :func:`extract_csv`.
+    :arg conv: as in :func:`extract_csv`.
+    :arg delimiter: as in :func:`extract_csv`.
+    :returns: same as :func:`extract_csv`.
+
+    .. versionadded:: 4.6
+    '''
+    loc = 'the given string'
+    try:
+        return _extract_csv(iter(_read_csv(string, delimiter)),
+                            column, where, conv, loc)
+    except csv.Error as err:
+        raise SanityError(f'could not parse CSV in {loc}: {err}') from None
+
+
 # Numeric functions
 
 @deferrable
 def avg(iterable):
-    '''Return the average of all the elements of ``iterable``.'''
+    '''Return the average of all the elements of ``iterable``.
+
+    .. versionchanged:: 4.6
+       NumPy arrays are averaged without iterating over their elements.
+    '''
+
+    if _is_vector(iterable):
+        if iterable.size == 0:
+            raise SanityError('attempt to get average on an empty container')
+
+        return iterable.mean().item()
 
     # We walk over the iterable manually in case this is a generator
     total = 0
@@ -880,6 +1817,61 @@ def avg(iterable):
     return total / num_vals
 
 
+def _percentile(values, q):
+    # Linear interpolation between the closest ranks; this is the default
+    # method of NumPy's `percentile()`
+    if not 0 <= q <= 100:
+        raise SanityError(f'percentile must be in [0, 100]: {q}')
+
+    values = builtins.sorted(values)
+    if not values:
+        raise SanityError('attempt to get percentile on an empty container')
+
+    pos = (builtins.len(values) - 1) * q / 100
+    lo = int(pos)
+    hi = builtins.min(lo + 1, builtins.len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (pos - lo)
+
+
+@deferrable
+def percentile(iterable, q):
+    '''Return the ``q``-th percentile of the elements of ``iterable``.
+
+    The percentile is computed by linear interpolation between the closest
+    ranks, as with the default method of :func:`numpy.percentile`. If
+    ``iterable`` is a NumPy array, the computation is delegated to NumPy.
+
+    :arg iterable: The values to compute the percentile of.
+    :arg q: The percentile to compute; must be in ``[0, 100]``.
+    :returns: The percentile of the values.
+    :raises reframe.core.exceptions.SanityError: If ``iterable`` is empty or
+        ``q`` is out of range.
+
+    .. versionadded:: 4.6
+    '''
+    if _is_vector(iterable) and iterable.size:
+        if not 0 <= q <= 100:
+            raise SanityError(f'percentile must be in [0, 100]: {q}')
+
+        return _numpy().percentile(iterable, q).item()
+
+    return _percentile(iterable, q)
+
+
+@deferrable
+def median(iterable):
+    '''Return the median of the elements of ``iterable``.
+
+    This is equivalent to ``percentile(iterable, 50)``.
+
+    .. versionadded:: 4.6
+    '''
+    if _is_vector(iterable) and iterable.size:
+        return _numpy().median(iterable).item()
+
+    return _percentile(iterable, 50)
+
+
 # Other utility functions
 
 @deferrable
@@ -973,17 +1965,29 @@ def count_uniq(iterable):
     return builtins.len(builtins.set(iterable))
 
 
+def _iglob(pathname, recursive):
+    workdir = _workdir
+    if workdir is None or os.path.isabs(pathname):
+        return pyglob.iglob(pathname, recursive=recursive)
+
+    # Return the matched paths relative to the working directory, as if we
+    # had changed to it
+    pathname = os.path.join(pyglob.escape(workdir), pathname)
+    return (os.path.relpath(path, workdir)
+            for path in pyglob.iglob(pathname, recursive=recursive))
+
+
 @deferrable
 def glob(pathname, *, recursive=False):
     '''Replacement for the :func:`glob.glob() <python:glob.glob>` function.'''
-    return pyglob.glob(pathname, recursive=recursive)
+    return builtins.list(_iglob(pathname, recursive))
 
 
 @deferrable
 def iglob(pathname, recursive=False):
     '''Replacement for the :func:`glob.iglob() <python:glob.iglob>`
     function.'''
-    return pyglob.iglob(pathname, recursive=recursive)
+    return _iglob(pathname, recursive)
 
 
 @deferrable
@@ -992,7 +1996,7 @@ def path_exists(path):
 
     .. versionadded:: 3.4
     '''
-    return os.path.exists(path)
+    return os.path.exists(_path(path))
 
 
 @deferrable
@@ -1001,7 +2005,7 @@ def path_isdir(path):
 
     .. versionadded:: 3.4
     '''
-    return os.path.isdir(path)
+    return os.path.isdir(_path(path))
 
 
 @deferrable
@@ -1010,7 +2014,7 @@ def path_isfile(path):
 
     .. versionadded:: 3.4
     '''
-    return os.path.isfile(path)
+    return os.path.isfile(_path(path))
 
 
 @deferrable
@@ -1019,4 +2023,4 @@ def path_islink(path):
 
     .. versionadded:: 3.4
     '''
-    return os.path.islink(path)
+    return os.path.islink(_path(path))
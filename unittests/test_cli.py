@@ -12,7 +12,10 @@ import os
 import pytest
 import re
 import sys
+import textwrap
 import time
+from datetime import datetime
+from xml.etree import ElementTree
 
 import reframe.core.environments as env
 import reframe.core.logging as logging
@@ -159,6 +162,10 @@ def test_check_success(run_reframe, tmp_path, run_action):
     assert os.path.exists(tmp_path / '.reframe' /
                           'reports' / 'run-report-0.json')
 
+    # The report journal is removed after the report is written
+    assert not os.path.exists(tmp_path / '.reframe' /
+                              'reports' / 'run-report-0.json.journal')
+
 
 def test_check_restore_session_failed(run_reframe, tmp_path):
     run_reframe(
@@ -240,6 +247,66 @@ def test_report_ends_with_newline(run_reframe, tmp_path, run_action):
         assert fp.read()[-1] == '\n'
 
 
+@pytest.fixture
+def slow_cleanup_check(tmp_path):
+    checkfile = tmp_path / 'slow_cleanup_check.py'
+    checkfile.write_text(textwrap.dedent('''
+        import time
+
+        import reframe as rfm
+        import reframe.utility.sanity as sn
+        from reframe.core.builtins import run_before
+
+
+        @rfm.simple_test
+        class SlowCleanupCheck(rfm.RunOnlyRegressionTest):
+            valid_systems = ['*']
+            valid_prog_environs = ['*']
+            executable = 'echo'
+            sanity_patterns = sn.assert_true(1)
+
+            @run_before('cleanup')
+            def slow_cleanup(self):
+                time.sleep(0.5)
+    '''))
+    return str(checkfile)
+
+
+def test_report_time_total(run_reframe, tmp_path, slow_cleanup_check):
+    returncode, *_ = run_reframe(
+        checkpath=[slow_cleanup_check],
+        more_options=['--report-file=report.json']
+    )
+    assert returncode == 0
+    with open(tmp_path / 'report.json') as fp:
+        testcase = json.load(fp)['runs'][0]['testcases'][0]
+
+    # The total time includes the cleanup of the test
+    stage_times = sum(testcase[f'time_{stage}'] or 0
+                      for stage in ('setup', 'compile', 'run',
+                                    'sanity', 'performance'))
+    assert testcase['time_total'] >= stage_times + 0.5
+
+
+def test_report_junit_time(run_reframe, tmp_path, slow_cleanup_check):
+    returncode, *_ = run_reframe(
+        checkpath=[slow_cleanup_check],
+        more_options=['--report-file=report.json',
+                      '--report-junit=report.xml']
+    )
+    assert returncode == 0
+    with open(tmp_path / 'report.json') as fp:
+        testcase = json.load(fp)['runs'][0]['testcases'][0]
+
+    # The JUnit times agree with the statistics of the session, which
+    # include the cleanup of the test
+    xml_testcase = ElementTree.parse(str(tmp_path / 'report.xml')).find(
+        'testsuite/testcase'
+    )
+    assert float(xml_testcase.get('time')) == testcase['time_total']
+    assert float(xml_testcase.get('time')) >= 0.5
+
+
 def test_report_file_symlink_latest(run_reframe, tmp_path, run_action):
     returncode, stdout, _ = run_reframe(action=run_action)
     assert returncode == 0
@@ -338,6 +405,35 @@ def test_check_sanity_failure(run_reframe, tmp_path, run_action):
         assert returncode != 0
 
 
+def test_live_sanity_skip_sanity_check(run_reframe, tmp_path):
+    checkfile = tmp_path / 'live_sanity_check.py'
+    checkfile.write_text(textwrap.dedent('''
+        import reframe as rfm
+        import reframe.utility.sanity as sn
+
+
+        @rfm.simple_test
+        class LiveSanityCheck(rfm.RunOnlyRegressionTest):
+            valid_systems = ['*']
+            valid_prog_environs = ['*']
+            executable = 'echo'
+            executable_opts = ['Segmentation fault']
+            live_sanity_patterns = [r'Segmentation fault']
+            sanity_patterns = sn.assert_true(1)
+    '''))
+
+    # Skipping the sanity stage must not hide the live sanity failures
+    returncode, stdout, stderr = run_reframe(
+        checkpath=[str(checkfile)],
+        more_options=['--skip-sanity-check']
+    )
+    assert 'Traceback' not in stdout
+    assert 'Traceback' not in stderr
+    assert 'FAILED' in stdout
+    assert "pattern 'Segmentation fault' found in" in stdout
+    assert returncode != 0
+
+
 def test_dont_restage(run_reframe, tmp_path):
     run_reframe(
         checkpath=['unittests/resources/checks/frontend_checks.py'],
@@ -433,6 +529,157 @@ def test_performance_report(run_reframe, run_action):
         assert r'PERFORMANCE REPORT' not in stdout
 
 
+@pytest.fixture
+def results_db(tmp_path, monkeypatch):
+    dbfile = tmp_path / 'results.db'
+    monkeypatch.setenv('RFM_RESULTS_DATABASE', str(dbfile))
+    return dbfile
+
+
+def test_results_database(run_reframe, results_db, run_action):
+    run_reframe(
+        checkpath=['unittests/resources/checks/frontend_checks.py'],
+        more_options=['-n', 'PerformanceFailureCheck'],
+        action=run_action
+    )
+    if run_action == 'dry_run':
+        assert not os.path.exists(results_db)
+        return
+
+    returncode, stdout, _ = run_reframe(
+        action=None, more_options=['--list-stored-sessions']
+    )
+    assert 'Found 1 session(s)' in stdout
+    assert returncode == 0
+
+    returncode, stdout, _ = run_reframe(
+        action=None,
+        more_options=[
+            '--list-stored-testcases=name=PerformanceFailureCheck,period=1d'
+        ]
+    )
+    assert 'PerformanceFailureCheck @generic:default+builtin' in stdout
+    assert 'perf: 10.0 Gflop/s (ref=20.0)' in stdout
+    assert 'Found 1 test case(s)' in stdout
+    assert returncode == 0
+
+    # Periods with ISO 8601 times on both sides
+    returncode, stdout, _ = run_reframe(
+        action=None,
+        more_options=['--list-stored-sessions=2000-01-01T12:00..'
+                      '2100-01-01T12:00:30']
+    )
+    assert 'Found 1 session(s)' in stdout
+    assert returncode == 0
+
+    returncode, stdout, _ = run_reframe(
+        action=None,
+        more_options=['--list-stored-testcases=period=1999-01-01T00:00..'
+                      '2000-01-01T00:00']
+    )
+    assert 'Found 0 test case(s)' in stdout
+    assert returncode == 0
+
+    returncode, stdout, _ = run_reframe(
+        action=None, more_options=['--list-stored-testcases=foo=bar']
+    )
+    assert 'invalid test case query' in stdout
+    assert returncode == 1
+
+
+def test_parse_period():
+    import reframe.frontend.cli as cli
+
+    t_from, t_to = cli._parse_period('2023-06-01T12:00..2023-06-02T08:30:15')
+    assert t_from == datetime(2023, 6, 1, 12, 0).timestamp()
+    assert t_to == datetime(2023, 6, 2, 8, 30, 15).timestamp()
+    assert cli._parse_period('2023-06-01T12:00')[1] is None
+    assert cli._parse_period('..2023-06-01')[0] is None
+    assert cli._parse_period('') == (None, None)
+    with pytest.raises(ValueError):
+        cli._parse_period('2023-06-01:2023-06-02')
+
+
+def test_results_database_disabled(run_reframe, tmp_path):
+    # No results database is used by default
+    returncode, *_ = run_reframe()
+    assert returncode == 0
+    assert not os.path.exists(tmp_path / '.reframe' /
+                              'reports' / 'results.db')
+
+    returncode, stdout, _ = run_reframe(
+        action=None, more_options=['--list-stored-sessions']
+    )
+    assert 'no results database is configured' in stdout
+    assert returncode == 1
+
+    returncode, *_ = run_reframe(more_options=['--results-database='])
+    assert returncode == 0
+
+
+def test_performance_compare(run_reframe, results_db):
+    def run_perf_check(spec):
+        return run_reframe(
+            checkpath=['unittests/resources/checks/frontend_checks.py'],
+            more_options=['-n', 'PerformanceFailureCheck',
+                          f'--performance-compare={spec}']
+        )
+
+    _, stdout, _ = run_perf_check('last=5/mean')
+    assert ('PERFORMANCE COMPARISON (baseline: mean of the last 5 run(s))'
+            in stdout)
+    assert re.search(r'PerformanceFailureCheck\s+generic:default\s+builtin'
+                     r'\s+perf\s+10 Gflop/s\s+n/a\s+n/a\s+0', stdout)
+
+    _, stdout, _ = run_perf_check('7d')
+    assert 'PERFORMANCE COMPARISON (baseline: median of period' in stdout
+    assert re.search(r'perf\s+10 Gflop/s\s+10 Gflop/s\s+\+0.00%\s+1',
+                     stdout)
+
+    # Compare stored sessions
+    returncode, stdout, _ = run_reframe(
+        action=None, more_options=['--performance-compare=session=1/p90/'
+                                   'session=2']
+    )
+    assert 'PERFORMANCE COMPARISON (baseline: p90 of session 1)' in stdout
+    assert 'Found 0 regression(s)' in stdout
+    assert returncode == 0
+
+    returncode, stdout, _ = run_reframe(
+        action=None, more_options=['--performance-compare=7d/foo']
+    )
+    assert 'invalid aggregation' in stdout
+    assert returncode == 1
+
+
+def test_detect_perf_shifts(run_reframe, results_db):
+    for _ in range(3):
+        returncode, stdout, _ = run_reframe(
+            checkpath=['unittests/resources/checks/frontend_checks.py'],
+            more_options=['-n', 'PerformanceFailureCheck',
+                          '--detect-perf-shifts=window=2']
+        )
+        assert ('PERFORMANCE SHIFTS (rolling median of 2 value(s) '
+                '\u00b1 3 MAD)') in stdout
+        assert 'Found 0 shift(s)' in stdout
+
+    # Examine the stored results
+    returncode, stdout, _ = run_reframe(
+        action=None,
+        more_options=['--detect-perf-shifts=name=PerformanceFailureCheck,'
+                      'window=1,k=2']
+    )
+    assert 'PERFORMANCE SHIFTS (rolling median of 1 value(s)' in stdout
+    assert 'Found 0 shift(s)' in stdout
+    assert returncode == 0
+
+    returncode, stdout, _ = run_reframe(
+        action=None, more_options=['--detect-perf-shifts=window=0']
+    )
+    assert 'invalid window size' in stdout
+    assert returncode == 1
+
+
 def test_skip_system_check_option(run_reframe, run_action):
     returncode, stdout, _ = run_reframe(
         checkpath=['unittests/resources/checks/frontend_checks.py'],
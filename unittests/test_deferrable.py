@@ -444,3 +444,78 @@ def test_ior():
     dv |= V(5)
     sn.evaluate(dv)
     assert 7 == v._value
+
+
+def test_evaluation_context():
+    from reframe.core.deferrable import (_EvaluationMemo,
+                                         _evaluation_context)
+
+    num_calls = 0
+
+    @sn.deferrable
+    def shared():
+        nonlocal num_calls
+        num_calls += 1
+        return 2
+
+    @sn.deferrable
+    def gen():
+        nonlocal num_calls
+        num_calls += 1
+        yield from range(3)
+
+    s = shared()
+    g = gen()
+    expr1 = s + 1
+    expr2 = s * 3
+    memo = _EvaluationMemo()
+    with _evaluation_context(memo):
+        assert 3 == expr1.evaluate()
+        assert 6 == expr2.evaluate()
+        assert 1 == num_calls
+
+        # Iterators are never memoized
+        assert 3 == sn.count(g).evaluate()
+        assert 3 == sn.count(g).evaluate()
+        assert 3 == num_calls
+
+    # The memo may be reused by another context
+    with _evaluation_context(memo):
+        assert 3 == expr1.evaluate()
+        assert 3 == num_calls
+
+    # Without a context, expressions are always evaluated
+    assert 3 == expr1.evaluate()
+    assert 6 == expr2.evaluate()
+    assert 5 == num_calls
+
+
+def test_evaluate_deep_expression():
+    expr = sn.defer(0)
+    for _ in range(100000):
+        expr = expr + 1
+
+    assert 100000 == expr.evaluate()
+
+    expr = sn.defer(True)
+    for _ in range(100000):
+        expr = sn.and_(expr, True)
+
+    assert expr.evaluate()
+
+
+def test_evaluate_order():
+    order = []
+
+    @sn.deferrable
+    def record(x):
+        order.append(x)
+        return x
+
+    @sn.deferrable
+    def collect(*args, **kwargs):
+        return args, kwargs
+
+    expr = collect(record(1), 2, record(3), a=record(4))
+    assert ((1, 2, 3), {'a': 4}) == expr.evaluate()
+    assert [1, 3, 4] == order
@@ -3,12 +3,16 @@
 #
 # SPDX-License-Identifier: BSD-3-Clause
 
+import http.server
+import json
 import logging
 import logging.handlers
 import os
 import pytest
 import re
+import socket
 import sys
+import threading
 import time
 from datetime import datetime
 
@@ -167,6 +171,40 @@ def test_logger_loggable_attributes(logfile, logger_with_check):
     )
 
 
+def test_formatter_used_fields(logfile, logger_with_check, monkeypatch):
+    converted = []
+
+    def _xfmt(val):
+        converted.append(val)
+        return str(val)
+
+    monkeypatch.setattr(rlog, '_xfmt', _xfmt)
+    formatter = rlog.RFC3339Formatter(
+        '%(check_custom)s|%(check_foo)s|%(levelname)s: %(message)s'
+    )
+    logger_with_check.logger.handlers[0].setFormatter(formatter)
+    logger_with_check.info('xxx')
+    assert _pattern_in_logfile(r'hello extras\|None\|info: xxx', logfile)
+    assert sorted(converted, key=str) == [None, 'hello extras']
+
+
+def test_logger_loggable_attributes_cached(logfile, logger, fake_check,
+                                           logger_with_check):
+    formatter = rlog.RFC3339Formatter('%(check_custom)s: %(message)s')
+    logger.handlers[0].setFormatter(formatter)
+    logger_with_check.info('foo')
+    num_attrs = len(logger_with_check.extra['__rfm_loggable_attrs__'])
+
+    # The check attributes are not evaluated again for the same adapter
+    fake_check.custom = 'hello again'
+    logger_with_check.info('bar')
+    assert _pattern_in_logfile('hello extras: bar', logfile)
+    assert len(logger_with_check.extra['__rfm_loggable_attrs__']) == num_attrs
+
+    rlog.LoggerAdapter(logger, fake_check).info('baz')
+    assert _pattern_in_logfile('hello again: baz', logfile)
+
+
 def test_rfc3339_timezone_extension(logfile, logger_with_check,
                                     logger_without_check):
     formatter = rlog.RFC3339Formatter(
@@ -395,6 +433,84 @@ def test_multiple_handlers(make_exec_ctx, config_file,
     assert len(rlog.getlogger().logger.handlers) == 3
 
 
+def test_async_handlers(make_exec_ctx, config_file,
+                        logfile, logging_sandbox):
+    make_exec_ctx(
+        config_file({
+            'level': 'info',
+            'async_handlers': True,
+            'handlers$': [{'type': 'stream', 'name': 'stderr'}],
+            'handlers': [{'type': 'file', 'name': str(logfile)}],
+            'handlers_perflog': []
+        })
+    )
+    rlog.configure_logging(rt.runtime().site_config)
+    handlers = rlog.getlogger().logger.handlers
+    assert len(handlers) == 2
+    assert isinstance(handlers[0], logging.StreamHandler)
+    assert isinstance(handlers[1], rlog._AsyncHandler)
+    assert rlog.log_files() == [str(logfile)]
+
+    rlog.getlogger().info('foo %s', 'bar')
+    rlog.flush_logs()
+    assert _found_in_logfile('foo bar', logfile)
+
+
+class _BlockingHandler(logging.Handler):
+    def __init__(self, error=False):
+        super().__init__()
+        self.records = []
+        self.error = error
+        self.unblocked = threading.Event()
+
+    def emit(self, record):
+        self.unblocked.wait()
+        if self.error:
+            raise ReframeError('emit failed')
+
+        self.records.append(record.getMessage())
+
+
+def _make_record(msg):
+    return logging.LogRecord('reframe', rlog.INFO, __file__, 0,
+                             msg, None, None)
+
+
+def test_async_handler_block():
+    slow, failing = _BlockingHandler(), _BlockingHandler(error=True)
+    failing.handleError = lambda record: None
+    handler = rlog._AsyncHandler([failing, slow], queue_size=1)
+    handler.handle(_make_record('foo'))
+    slow.unblocked.set()
+    failing.unblocked.set()
+    for i in range(5):
+        handler.handle(_make_record(f'bar{i}'))
+
+    # The records are emitted even if a handler fails
+    handler.stop()
+    assert slow.records == ['foo', 'bar0', 'bar1', 'bar2', 'bar3', 'bar4']
+    assert handler.num_dropped == 0
+
+
+def test_async_handler_drop(capsys):
+    slow = _BlockingHandler()
+    handler = rlog._AsyncHandler([slow], queue_size=1, overflow='drop')
+    handler.handle(_make_record('foo'))
+
+    # Wait for the record to be picked up by the listener
+    while not handler.queue.empty():
+        time.sleep(0.01)
+
+    for i in range(5):
+        handler.handle(_make_record(f'bar{i}'))
+
+    slow.unblocked.set()
+    handler.stop()
+    assert slow.records == ['foo', 'bar0']
+    assert handler.num_dropped == 4
+    assert '4 log record(s) were dropped' in capsys.readouterr().err
+
+
 def test_file_handler_timestamp(make_exec_ctx, config_file,
                                 logfile, logging_sandbox):
     make_exec_ctx(
@@ -555,3 +671,134 @@ def test_httpjson_handler_no_port(make_exec_ctx, config_file,
         })
     )
     rlog.configure_logging(rt.runtime().site_config)
+
+
+@pytest.fixture
+def httpjson_server():
+    class _RequestHandler(http.server.BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers['Content-Length'])
+            body = self.rfile.read(length).decode()
+            status = server.statuses.pop(0) if server.statuses else 200
+            if status == 200:
+                server.requests.append((self.headers['Content-type'], body))
+
+            self.send_response(status)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.HTTPServer(('127.0.0.1', 0), _RequestHandler)
+    server.requests = []
+    server.statuses = []
+    server.url = f'http://127.0.0.1:{server.server_port}/rfm'
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _httpjson_record(msg):
+    record = _make_record(msg)
+    record.check_tags = set()
+    return record
+
+
+def _json_formatter(record, extras, ignore_keys):
+    return json.dumps({'msg': record.getMessage()})
+
+
+def test_httpjson_handler_batch(httpjson_server):
+    handler = rlog.HTTPJSONHandler(httpjson_server.url,
+                                   json_formatter=_json_formatter,
+                                   batch_size=2)
+    for i in range(3):
+        handler.handle(_httpjson_record(f'foo{i}'))
+
+    assert httpjson_server.requests == [
+        ('application/x-ndjson', '{"msg": "foo0"}\n{"msg": "foo1"}\n')
+    ]
+    handler.close()
+    assert httpjson_server.requests[1] == ('application/x-ndjson',
+                                           '{"msg": "foo2"}\n')
+
+
+def test_httpjson_handler_batch_timeout(httpjson_server):
+    handler = rlog.HTTPJSONHandler(httpjson_server.url,
+                                   json_formatter=_json_formatter,
+                                   batch_size=10, batch_timeout=0.1)
+    handler.handle(_httpjson_record('foo'))
+    timeout = time.time() + 10
+    while not httpjson_server.requests and time.time() < timeout:
+        time.sleep(0.05)
+
+    assert httpjson_server.requests == [('application/x-ndjson',
+                                         '{"msg": "foo"}\n')]
+    handler.close()
+
+
+def test_httpjson_handler_retry(httpjson_server):
+    httpjson_server.statuses = [503, 429]
+    handler = rlog.HTTPJSONHandler(httpjson_server.url,
+                                   json_formatter=_json_formatter,
+                                   retries=2, retry_backoff=0.01)
+    handler.handle(_httpjson_record('foo'))
+    assert httpjson_server.requests == [('application/json',
+                                         '{"msg": "foo"}')]
+
+    httpjson_server.statuses = [503, 503]
+    handler = rlog.HTTPJSONHandler(httpjson_server.url,
+                                   json_formatter=_json_formatter,
+                                   retries=1, retry_backoff=0.01)
+    with pytest.raises(rlog.LoggingError):
+        handler.handle(_httpjson_record('bar'))
+
+    assert len(httpjson_server.requests) == 1
+
+
+def test_httpjson_handler_spool(httpjson_server, tmp_path):
+    spool_file = tmp_path / 'spool.ndjson'
+    handler = rlog.HTTPJSONHandler(httpjson_server.url,
+                                   json_formatter=_json_formatter,
+                                   spool_file=str(spool_file))
+    httpjson_server.statuses = [503, 503]
+    handler.handle(_httpjson_record('foo'))
+    handler.handle(_httpjson_record('bar'))
+    assert httpjson_server.requests == []
+    assert spool_file.read_text() == '{"msg": "foo"}\n{"msg": "bar"}\n'
+
+    # The spooled records are sent first, once the server is back
+    handler.handle(_httpjson_record('baz'))
+    assert [body for _, body in httpjson_server.requests] == [
+        '{"msg": "foo"}', '{"msg": "bar"}', '{"msg": "baz"}'
+    ]
+    assert not spool_file.exists()
+
+
+def test_httpjson_handler_spool_no_server(make_exec_ctx, config_file,
+                                          logging_sandbox, tmp_path):
+    spool_file = tmp_path / 'spool.ndjson'
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+
+    make_exec_ctx(
+        config_file({
+            'level': 'info',
+            'handlers_perflog': [{
+                'type': 'httpjson',
+                'url': f'http://127.0.0.1:{port}/rfm',
+                'spool_file': str(spool_file)
+            }],
+        })
+    )
+    rlog.configure_logging(rt.runtime().site_config)
+    handler = rlog._perf_logger.handlers[0]
+    assert isinstance(handler, rlog.HTTPJSONHandler)
+    handler.handle(_httpjson_record('foo'))
+    records = spool_file.read_text().splitlines()
+    assert len(records) == 1
+    assert json.loads(records[0])['check_tags'] == []
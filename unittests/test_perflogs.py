@@ -0,0 +1,198 @@
+# Copyright 2016-2023 Swiss National Supercomputing Centre (CSCS/ETH Zurich)
+# ReFrame Project Developers. See the top-level LICENSE file for details.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+import math
+import pytest
+
+import reframe.frontend.resultsdb as resultsdb
+import reframe.utility.osext as osext
+import reframe.utility.perflogs as perflogs
+
+
+def _write_perflog(filename, header, records):
+    filename.parent.mkdir(parents=True, exist_ok=True)
+    with osext.open_compressed(filename, 'w') as fp:
+        fp.write('|'.join(header) + '\n')
+        for r in records:
+            fp.write('|'.join(str(x) for x in r) + '\n')
+
+
+@pytest.fixture
+def perflog_dir(tmp_path):
+    header = ['result', 'job_completion_time', 'job_completion_time_unix',
+              'environ', 'name', 'bw_value', 'bw_unit', 'bw_ref',
+              'lat_value', 'lat_unit', 'lat_ref']
+    _write_perflog(
+        tmp_path / 'sys0' / 'part0' / 'T0.log',
+        header,
+        [('pass', '2024-01-01T00:00:03', 3.0, 'gnu', 'T0', 12.5, 'GB/s', 0,
+          3.0, 's', 0),
+         ('fail', '2024-01-01T00:00:04', 4.0, 'gnu', 'T0', None, 'GB/s', 0,
+          5.0, 's', 0)]
+    )
+
+    # A previous log format of the same test
+    _write_perflog(
+        tmp_path / 'sys0' / 'part0' / 'T0.log.h0.gz',
+        ['result', 'job_completion_time', 'environ', 'name', 'bw_value'],
+        [('pass', '1970-01-01T00:00:01+00:00', 'gnu', 'T0', 10.0),
+         ('pass', 'garbage', 'gnu', 'T0', 11.0)]
+    )
+
+    # A log file without the name, system and partition columns
+    _write_perflog(
+        tmp_path / 'sys0' / 'part1' / 'T1.log.xz',
+        ['result', 'job_completion_time_unix', 'environ', 'bw_value'],
+        [('pass', 2.0, 'clang', 7.0),
+         ('pass', 'invalid', 'clang')]
+    )
+
+    # Files that are not performance logs
+    (tmp_path / 'sys0' / 'part1' / 'notes.txt').write_text('bw_value\n1\n')
+    return tmp_path
+
+
+@pytest.fixture(params=[1, 2])
+def workers(request):
+    return request.param
+
+
+def test_find_perflogs(perflog_dir):
+    assert perflogs.find_perflogs(perflog_dir) == [
+        str(perflog_dir / 'sys0' / 'part0' / 'T0.log'),
+        str(perflog_dir / 'sys0' / 'part0' / 'T0.log.h0.gz'),
+        str(perflog_dir / 'sys0' / 'part1' / 'T1.log.xz')
+    ]
+
+
+def test_load(perflog_dir, workers):
+    data = perflogs.load(perflog_dir, workers=workers)
+    assert data.columns == perflogs.COLUMNS
+    assert len(data) == 7
+    assert list(data['test']) == ['T0', 'T1', 'T0', 'T0', 'T0', 'T0', 'T0']
+    assert list(data['system'])[:2] == ['sys0', 'sys0']
+    assert list(data['partition'])[:2] == ['part0', 'part1']
+    assert list(data['perfvar']) == ['bw', 'bw', 'bw', 'lat',
+                                     'bw', 'lat', 'bw']
+    values = list(data['value'])
+    assert values[:4] == [10.0, 7.0, 12.5, 3.0]
+    assert math.isnan(values[4])
+    assert values[5] == 5.0
+    assert list(data['unit'])[2:4] == ['GB/s', 's']
+    assert list(data['result'])[4] == 'fail'
+
+    # The record with the invalid time is placed last
+    assert list(data['value'])[-1] == 11.0
+    assert str(data['timestamp'][0]).startswith('1970-01-01')
+    assert str(data['timestamp'][-1]) in ('NaT', 'None')
+
+
+def test_load_columnar(perflog_dir):
+    np = pytest.importorskip('numpy')
+    data = perflogs.load(perflog_dir, workers=1)
+    assert data['value'].dtype == np.float64
+    assert data['timestamp'].dtype == np.dtype('datetime64[us]')
+    assert data['timestamp'][1] == np.datetime64('1970-01-01T00:00:02')
+
+
+def test_groups(perflog_dir):
+    data = perflogs.load(perflog_dir, workers=1)
+    groups = data.groups()
+    assert sorted(groups.keys()) == [
+        ('T0', 'sys0', 'part0', 'gnu', 'bw'),
+        ('T0', 'sys0', 'part0', 'gnu', 'lat'),
+        ('T1', 'sys0', 'part1', 'clang', 'bw')
+    ]
+    assert list(groups['T0', 'sys0', 'part0', 'gnu', 'bw']) == [0, 2, 4, 6]
+    assert list(groups['T1', 'sys0', 'part1', 'clang', 'bw']) == [1]
+
+
+def test_filter(perflog_dir):
+    data = perflogs.load(perflog_dir, workers=1)
+    selected = data.filter(test='T0', perfvar='lat')
+    assert len(selected) == 2
+    assert list(selected['value']) == [3.0, 5.0]
+    assert len(data.filter(environ='^nvhpc$')) == 0
+    assert selected.groups() != {}
+    assert data.filter(environ='^nvhpc$').groups() == {}
+
+
+def test_summary(perflog_dir):
+    data = perflogs.load(perflog_dir, workers=1)
+    rows = perflogs.summary(data)
+    assert [r['perfvar'] for r in rows] == ['bw', 'lat', 'bw']
+    bw = rows[0]
+    assert bw['count'] == 3
+    assert bw['min'] == 10.0
+    assert bw['median'] == 11.0
+    assert bw['max'] == 12.5
+    assert bw['last'] == 11.0
+    assert bw['unit'] == ''
+
+
+@pytest.fixture
+def shifted_perflog_dir(tmp_path):
+    values = [10.0, 10.2, 9.8, 10.1, 9.9, 10.0, 25.0, 10.1, 'nan', 4.0]
+    _write_perflog(
+        tmp_path / 'sys0' / 'part0' / 'T0.log',
+        ['result', 'job_completion_time_unix', 'environ', 'name',
+         'bw_value', 'bw_unit', 'bw_ref'],
+        [('pass', float(t), 'gnu', 'T0', v, 'GB/s', 0)
+         for t, v in enumerate(values)]
+    )
+    return tmp_path
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def shifts_impl(request, monkeypatch):
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(perflogs, '_numpy', lambda: None)
+        monkeypatch.setattr(resultsdb, '_numpy', lambda: None)
+
+
+def test_shifts(shifted_perflog_dir, shifts_impl):
+    data = perflogs.load(shifted_perflog_dir, workers=1)
+    assert perflogs.shifts(data, window=20) == []
+    rows = perflogs.shifts(data, window=5)
+    assert [r['value'] for r in rows] == [25.0, 4.0]
+    assert [r['test'] for r in rows] == ['T0', 'T0']
+    assert rows[0]['perfvar'] == 'bw'
+    assert rows[0]['unit'] == 'GB/s'
+    assert rows[0]['median'] == 10.0
+    assert rows[0]['diff'] == 150.0
+    assert rows[0]['score'] > 3
+
+    # The shifts are detected as in the results database
+    values = [v for v in data['value'] if not math.isnan(v)]
+    assert [(r['median'], r['score']) for r in rows] == [
+        (median, score)
+        for _, median, score in resultsdb.detect_shifts(values, window=5)
+    ]
+
+
+def test_main_detect_shifts(shifted_perflog_dir, capsys):
+    assert perflogs.main([str(shifted_perflog_dir), '--workers=1',
+                          '--detect-shifts', '--window=5']) == 0
+    out = capsys.readouterr().out
+    assert '25 GB/s' in out
+    assert '+150.00%' in out
+    assert 'Found 2 shift(s)' in out
+
+    perflogs.main([str(shifted_perflog_dir), '--detect-shifts', '-n', 'T1'])
+    assert 'Found 0 shift(s)' in capsys.readouterr().out
+
+
+def test_main(perflog_dir, capsys):
+    assert perflogs.main([str(perflog_dir), '--workers=1']) == 0
+    out = capsys.readouterr().out
+    assert 'sys0:part0' in out
+    assert 'Found 3 performance variable(s)' in out
+
+    perflogs.main([str(perflog_dir), '-n', 'T0', '--perfvar=lat',
+                   '--records'])
+    out = capsys.readouterr().out
+    assert 'Found 2 record(s)' in out
@@ -7,6 +7,7 @@ import os
 import pytest
 import re
 import sys
+import time
 
 import reframe as rfm
 import reframe.core.builtins as builtins
@@ -288,6 +289,61 @@ def test_run_only_srcdir_set_to_none(local_exec_ctx):
     _run(test, *local_exec_ctx)
 
 
+@pytest.fixture
+def live_sanity_test(local_exec_ctx):
+    @test_util.custom_prefix('foo/bar/')
+    class MyTest(rfm.RunOnlyRegressionTest):
+        valid_prog_environs = ['*']
+        valid_systems = ['*']
+        sourcesdir = None
+        executable = 'echo'
+        live_sanity_patterns = [r'ERROR|Segmentation fault']
+        sanity_patterns = sn.assert_true(1)
+
+    yield MyTest()
+
+
+def test_live_sanity(live_sanity_test, local_exec_ctx):
+    live_sanity_test.prerun_cmds = ['echo "ERROR: bad input"']
+    live_sanity_test.executable = 'sleep'
+    live_sanity_test.executable_opts = ['30']
+    live_sanity_test.setup(*local_exec_ctx)
+    live_sanity_test.compile()
+    live_sanity_test.compile_wait()
+    live_sanity_test.run()
+    job = live_sanity_test.job
+    t_start = time.time()
+    while True:
+        job.scheduler.poll(job)
+        if live_sanity_test.run_complete():
+            break
+
+        assert time.time() - t_start < 20
+        time.sleep(0.1)
+
+    # The failure is raised as soon as the job finishes, so that it cannot
+    # be bypassed by skipping the sanity stage
+    with pytest.raises(SanityError,
+                       match=r"'ERROR\|Segmentation fault' found in"):
+        live_sanity_test.run_wait()
+
+
+def test_live_sanity_final_check(live_sanity_test, local_exec_ctx):
+    # Output that is not seen while polling is checked once the job finishes
+    live_sanity_test.executable_opts = ['Segmentation fault']
+    live_sanity_test.setup(*local_exec_ctx)
+    live_sanity_test.compile()
+    live_sanity_test.compile_wait()
+    live_sanity_test.run()
+    with pytest.raises(SanityError):
+        live_sanity_test.run_wait()
+
+
+def test_live_sanity_success(live_sanity_test, local_exec_ctx):
+    live_sanity_test.executable_opts = ['ok']
+    _run(live_sanity_test, *local_exec_ctx)
+
+
 def test_executable_is_required(local_exec_ctx):
     class MyTest(rfm.RunOnlyRegressionTest):
         valid_prog_environs = ['*']
@@ -1504,6 +1560,24 @@ def test_performance_failure(dummytest, sanity_file,
         _run_sanity(dummytest, *dummy_gpu_exec_ctx)
 
 
+def test_performance_failure_all_reported(dummytest, sanity_file,
+                                          perf_file, dummy_gpu_exec_ctx):
+    sanity_file.write_text('result = success\n')
+    perf_file.write_text('perf1 = 1.0\n'
+                         'perf2 = 1.8\n'
+                         'perf3 = 4.0\n')
+    with pytest.raises(PerformanceError) as exc_info:
+        _run_sanity(dummytest, *dummy_gpu_exec_ctx)
+
+    msg = str(exc_info.value)
+    assert 'value1=1.0, expected 1.4' in msg
+    assert 'value2' not in msg
+    assert 'value3=4.0, expected 3.1' in msg
+
+    # All the performance values must have been recorded
+    assert len(dummytest.perfvalues) == 3
+
+
 def test_reference_unknown_tag(dummytest, sanity_file,
                                perf_file, dummy_gpu_exec_ctx):
     sanity_file.write_text('result = success\n')
@@ -1668,6 +1742,67 @@ def test_perf_patterns_evaluation(dummytest, sanity_file,
     assert 'v3' in log_output
 
 
+def test_shared_expressions_evaluation(dummytest, sanity_file,
+                                       perf_file, dummy_gpu_exec_ctx):
+    # Expressions shared between the sanity and the performance functions
+    # must be evaluated only once
+    num_evals = 0
+
+    @sn.deferrable
+    def extract_values(filename):
+        nonlocal num_evals
+        num_evals += 1
+        return sn.evaluate(
+            sn.extractall(r'perf\d = (\S+)', filename, 1, float)
+        )
+
+    values = extract_values(perf_file)
+    sanity_file.write_text('result = success\n')
+    perf_file.write_text('perf1 = 1.4\n'
+                         'perf2 = 1.7\n')
+    dummytest.sanity_patterns = sn.assert_eq(sn.count(values), 2)
+    dummytest.perf_patterns = {
+        'value1': values[0],
+        'value2': values[1]
+    }
+    _run_sanity(dummytest, *dummy_gpu_exec_ctx)
+    assert num_evals == 1
+    assert dummytest.perfvalues['testsys:gpu:value1'][0] == 1.4
+    assert dummytest.perfvalues['testsys:gpu:value2'][0] == 1.7
+
+
+def test_concurrent_perf_evaluation(dummytest, dummy_gpu_exec_ctx):
+    cwds = []
+
+    @sn.deferrable
+    def record_cwd(value):
+        cwds.append(os.getcwd())
+        return value
+
+    dummytest.perf_eval_workers = 4
+    dummytest.sanity_patterns = sn.assert_found(r'perf1', 'perf.out')
+    dummytest.perf_patterns = {
+        f'value{i}': record_cwd(
+            sn.extractsingle(rf'perf{i} = (\S+)', 'perf.out', 1, float)
+        )
+        for i in range(1, 4)
+    }
+    dummytest.setup(*dummy_gpu_exec_ctx)
+    with open(os.path.join(dummytest.stagedir, 'perf.out'), 'w') as fp:
+        fp.write('perf1 = 1.3\n'
+                 'perf2 = 1.8\n'
+                 'perf3 = 3.3\n')
+
+    dummytest.check_sanity()
+    dummytest.check_performance()
+    assert dummytest.perfvalues['testsys:gpu:value1'][0] == 1.3
+    assert dummytest.perfvalues['testsys:gpu:value2'][0] == 1.8
+    assert dummytest.perfvalues['testsys:gpu:value3'][0] == 3.3
+
+    # The working directory must not change during the concurrent evaluation
+    assert cwds == [os.getcwd()] * 3
+
+
 @pytest.fixture
 def perftest(testsys_exec_ctx, perf_file, sanity_file):
     class MyTest(rfm.RunOnlyRegressionTest):
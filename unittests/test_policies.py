@@ -19,6 +19,7 @@ import reframe.frontend.dependencies as dependencies
 import reframe.frontend.executors as executors
 import reframe.frontend.executors.policies as policies
 import reframe.frontend.runreport as runreport
+import reframe.frontend.statistics as statistics
 import reframe.utility.jsonext as jsonext
 import reframe.utility.osext as osext
 import reframe.utility.sanity as sn
@@ -30,6 +31,7 @@ from reframe.core.exceptions import (AbortTaskError,
                                      ForceExitError,
                                      ReframeError,
                                      RunSessionTimeout,
+                                     StatisticsError,
                                      TaskDependencyError)
 from reframe.frontend.loader import RegressionCheckLoader
 from unittests.resources.checks.hellocheck import HelloTest
@@ -294,6 +296,118 @@ def test_runall(make_runner, make_cases, common_exec_ctx, tmp_path):
         runreport.load_report(tmp_path / 'invalid-version.json')
 
 
+@pytest.fixture(params=['report.xml', 'report.xml.gz'])
+def junit_report_file(request, tmp_path):
+    return tmp_path / request.param
+
+
+def test_junit_write(make_runner, make_cases, common_exec_ctx, tmp_path,
+                     junit_report_file):
+    runner = make_runner()
+    with timer() as tm:
+        runner.runall(make_cases())
+
+    report = _generate_runreport(runner.stats.json(), *tm.timestamps())
+    runreport.junit_write(report, junit_report_file)
+    with osext.open_compressed(junit_report_file, 'rb') as fp:
+        xml_report = etree.parse(fp).getroot()
+
+    _validate_junit_report(xml_report)
+    assert len(xml_report.findall('testsuite/testcase')) == 9
+    assert len(xml_report.findall('testsuite/testcase/failure')) == 5
+    assert xml_report.find('testsuite/testcase/system-out') is None
+
+    # Include the standard output of the test cases
+    outputdir = tmp_path / 'junit_output'
+    outputdir.mkdir()
+    with open(outputdir / 'rfm_job.out', 'w') as fp:
+        fp.write('line 1\nline 2\x1b\nline 3\n')
+
+    tc = report['runs'][0]['testcases'][0]
+    tc['outputdir'] = str(outputdir)
+    tc['job_stdout'] = 'rfm_job.out'
+    runreport.junit_write(report, junit_report_file, stdout_lines=2)
+    with osext.open_compressed(junit_report_file, 'rb') as fp:
+        xml_report = etree.parse(fp).getroot()
+
+    stdout = xml_report.find('testsuite/testcase/system-out')
+    assert stdout.text == 'line 2\nline 3\n'
+
+
+def test_stats_incremental(make_runner, make_cases, common_exec_ctx,
+                           monkeypatch):
+    num_entries = 0
+    testcase_entry = statistics.testcase_entry
+
+    def _testcase_entry(t):
+        nonlocal num_entries
+        num_entries += 1
+        return testcase_entry(t)
+
+    monkeypatch.setattr(statistics, 'testcase_entry', _testcase_entry)
+    runner = make_runner()
+    runner.runall(make_cases())
+    stats = runner.stats
+
+    # The entries are generated as the test cases finish; the test that
+    # failed during cleanup after it had succeeded is generated twice
+    assert num_entries == 10
+    assert stats.num_results('failure') == len(stats.failed()) == 5
+    assert stats.num_results('skipped') == len(stats.skipped())
+    assert stats.num_results('aborted') == len(stats.aborted())
+    assert (stats.num_results('success') + stats.num_results('failure') ==
+            len(stats.completed()))
+
+    run_stats = stats.json()
+    stats.performance_report()
+    assert num_entries == 10
+    assert run_stats[0]['num_cases'] == 9
+    assert run_stats[0]['num_failures'] == 5
+    assert stats.json() is run_stats
+
+    # Regenerate all the entries
+    run_stats = stats.json(force=True)
+    assert num_entries == 19
+    assert run_stats[0]['num_failures'] == 5
+    with pytest.raises(StatisticsError):
+        stats.num_results('failure', run=1)
+
+
+def test_runall_journal(make_runner, make_cases, common_exec_ctx, tmp_path):
+    runner = make_runner()
+    report_file = tmp_path / 'report.json'
+    journal = runreport.RunReportJournal(
+        runreport.journal_filename(report_file)
+    )
+    runner.policy.task_listeners.insert(0, journal)
+    journal.write_session_info({'data_version': runreport.DATA_VERSION})
+    runner.runall(make_cases())
+    journal.close()
+
+    def _results(run):
+        return {
+            (tc['unique_name'], tc['system'], tc['environment']):
+            (tc['result'], tc['fail_phase']) for tc in run['testcases']
+        }
+
+    # The report assembled from the journal must agree with the statistics,
+    # including the test that failed during cleanup after it had succeeded
+    report = runreport.load_journal(journal.filename)
+    run_stats = runner.stats.json()
+    assert report['runs'][0]['num_cases'] == 9
+    assert report['runs'][0]['num_failures'] == 5
+    assert report['session_info']['num_cases'] == 9
+    assert _results(report['runs'][0]) == _results(run_stats[0])
+
+    # Emulate a session that was killed while writing a record; its report
+    # must be restored from the journal
+    with open(journal.filename, 'a') as fp:
+        fp.write('{"runid": 0, "testc')
+
+    report = runreport.load_report(report_file)
+    assert report['runs'][0]['num_cases'] == 9
+
+
 def test_runall_skip_system_check(make_runner, make_cases, common_exec_ctx):
     runner = make_runner()
     runner.runall(make_cases(skip_system_check=True))
@@ -570,6 +684,41 @@ def test_dependencies_with_retries(make_runner, dep_cases, common_exec_ctx):
     assert_dependency_run(runner)
 
 
+def test_testcase_snapshots(make_runner, dep_cases, common_exec_ctx):
+    runner = make_runner()
+    runner.runall(dep_cases)
+
+    # Only the test cases that others depend on are snapshotted
+    for t in runner.stats.tasks():
+        if t.testcase.num_dependents:
+            assert t._snapshot == 'json'
+        else:
+            assert t._snapshot is None
+
+    for t in runner.stats.tasks():
+        if not t.succeeded:
+            continue
+
+        dump_file = os.path.join(t.check.stagedir, '.rfm_testcase.json')
+        if os.path.exists(dump_file):
+            assert t._snapshot == 'json'
+            with open(dump_file) as fp:
+                assert '\n' not in fp.read()
+
+
+def test_testcase_snapshots_disabled(make_runner, dep_cases,
+                                     common_exec_ctx):
+    runner = make_runner()
+    runner.policy.keep_stage_files = True
+    runner.policy.testcase_snapshot = None
+    runner.runall(dep_cases)
+    for t in runner.stats.tasks():
+        if t.succeeded:
+            assert not os.path.exists(
+                os.path.join(t.check.stagedir, '.rfm_testcase.json')
+            )
+
+
 class _TaskEventMonitor(executors.TaskEventListener):
     '''Event listener for monitoring the execution of the asynchronous
     execution policy.
@@ -971,6 +1120,106 @@ def test_restore_session(report_file, make_runner,
         report.restore_dangling(testgraph)
 
 
+def test_restore_session_indexed(report_file, dep_cases):
+    def _cases(report):
+        return [tc for run in report['runs'] for tc in run['testcases']]
+
+    report = runreport.load_report(report_file)
+    assert os.path.exists(runreport.index_filename(report_file))
+
+    # The report is now loaded through its index
+    indexed = runreport.load_report(report_file)
+    assert isinstance(indexed, runreport._IndexedRunReport)
+    assert indexed._full_report is None
+    for tc in _cases(report):
+        key = (tc['unique_name'], tc['system'], tc['environment'])
+        assert indexed._lookup(key) == json.loads(jsonext.dumps(tc))
+
+    assert list(indexed.slice('name')) == list(report.slice('name'))
+    assert (list(indexed.slice('name', when=('result', 'failure'))) ==
+            list(report.slice('name', when=('result', 'failure'))))
+    assert (set(indexed.slice('filename', unique=True)) ==
+            set(report.slice('filename', unique=True)))
+    assert indexed._full_report is None
+
+    # Slicing on properties that are not indexed reads the test cases
+    assert list(indexed.slice('hash')) == list(report.slice('hash'))
+    assert indexed._full_report is None
+
+    # Only the test cases needed for the restore are read
+    indexed = runreport.load_report(report_file)
+    selected = [tc for tc in dep_cases if tc.check.name == 'T1']
+    testgraph = dependencies.prune_deps(
+        dependencies.build_deps(dep_cases)[0], selected, max_depth=1
+    )
+    _, restored_cases = indexed.restore_dangling(testgraph)
+    assert {tc.check.name for tc in restored_cases} == {'T4', 'T5'}
+    assert len(indexed._cases) == 2
+    assert indexed._full_report is None
+
+    # Accessing the report directly loads it fully
+    assert indexed['session_info'] == report['session_info']
+
+    # Modifying the report invalidates its index
+    with open(report_file) as fp:
+        data = json.load(fp)
+
+    data['runs'][0]['testcases'][0]['description'] = 'caf\u00e9 \u2615'
+    with open(report_file, 'w') as fp:
+        json.dump(data, fp, ensure_ascii=False, indent=2)
+
+    report = runreport.load_report(report_file)
+    assert not isinstance(report, runreport._IndexedRunReport)
+    indexed = runreport.load_report(report_file)
+    assert isinstance(indexed, runreport._IndexedRunReport)
+    for tc in _cases(report):
+        key = (tc['unique_name'], tc['system'], tc['environment'])
+        assert indexed._lookup(key) == tc
+
+    # Invalid reports are not indexed
+    del data['session_info']['data_version']
+    with open(report_file, 'w') as fp:
+        json.dump(data, fp)
+
+    for _ in range(2):
+        with pytest.raises(ReframeError, match=r'invalid report'):
+            runreport.load_report(report_file)
+
+
+@pytest.mark.parametrize('suffix', ['.gz', '.xz'])
+def test_restore_session_compressed(report_file, tmp_path, suffix):
+    with open(report_file) as fp:
+        report = json.load(fp)
+
+    compressed_file = str(tmp_path / 'reports' / f'report.json{suffix}')
+    os.mkdir(tmp_path / 'reports')
+    runreport.write_report(report, compressed_file, link_to_last=True)
+    assert os.readlink(tmp_path / 'reports' / f'latest.json{suffix}') == (
+        f'report.json{suffix}'
+    )
+    with open(compressed_file, 'rb') as fp:
+        assert fp.read(1) != b'{'
+
+    for _ in range(2):
+        compressed = runreport.load_report(compressed_file)
+        for tc in report['runs'][0]['testcases']:
+            key = (tc['unique_name'], tc['system'], tc['environment'])
+            assert compressed._lookup(key) == tc
+
+    assert isinstance(compressed, runreport._IndexedRunReport)
+    assert compressed['session_info'] == report['session_info']
+
+    # Truncated reports cannot be loaded
+    with open(compressed_file, 'rb') as fp:
+        data = fp.read()
+
+    with open(compressed_file, 'wb') as fp:
+        fp.write(data[:len(data) // 2])
+
+    with pytest.raises(ReframeError, match=r'failed to load report file'):
+        runreport.load_report(compressed_file)
+
+
 def test_config_params(make_runner, make_exec_ctx):
     '''Test that configuration parameters are properly retrieved with the
     various execution policies.
@@ -1101,7 +1350,8 @@ def simple_test():
 
 @pytest.fixture
 def config_perflog(make_config_file):
-    def _config_perflog(fmt, perffmt=None, logging_opts=None):
+    def _config_perflog(fmt, perffmt=None, logging_opts=None,
+                        handler_opts=None):
         logging_config = {
             'level': 'debug2',
             'handlers': [{
@@ -1120,6 +1370,9 @@ def config_perflog(make_config_file):
         if logging_opts:
             logging_config.update(logging_opts)
 
+        if handler_opts:
+            logging_config['handlers_perflog'][0].update(handler_opts)
+
         if perffmt is not None:
             logging_config['handlers_perflog'][0]['format_perfvars'] = perffmt
 
@@ -1222,6 +1475,147 @@ def test_perf_logging(make_runner, make_exec_ctx, perf_test,
         _count_lines(f) == num_lines
 
 
+@pytest.fixture(params=['gzip', 'xz'])
+def perflog_compression(request):
+    return request.param
+
+
+def test_perf_logging_compressed(make_runner, make_exec_ctx, perf_test,
+                                 config_perflog, perflog_compression,
+                                 tmp_path):
+    def _run(fmt):
+        make_exec_ctx(
+            config_perflog(fmt=fmt, perffmt='%(check_perf_value)s,',
+                           handler_opts={'compress': perflog_compression})
+        )
+        logging.configure_logging(rt.runtime().site_config)
+        runner = make_runner()
+        runner.runall(executors.generate_testcases([perf_test]))
+
+        # Close the log files to complete their compressed streams
+        for hdlr in logging._perf_logger.handlers:
+            hdlr.close()
+
+    def _read_lines(filename):
+        with osext.open_compressed(filename) as fp:
+            return fp.read().splitlines()
+
+    suffix = osext.compression_suffix(perflog_compression)
+    logdir = tmp_path / 'perflogs' / 'generic' / 'default'
+    logfile = logdir / f'_MyTest.log{suffix}'
+    _run('%(check_display_name)s,%(check_perfvalues)s')
+    _run('%(check_display_name)s,%(check_perfvalues)s')
+    with open(logfile, 'rb') as fp:
+        assert fp.read(2) in (b'\x1f\x8b', b'\xfd7')
+
+    lines = _read_lines(logfile)
+    assert lines == ['display_name,perf0_value,perf1_value',
+                     '_MyTest,100.0,50.0', '_MyTest,100.0,50.0']
+
+    # Change the format and check that the old file is moved
+    _run('%(check_perfvalues)s')
+    assert _read_lines(logfile) == ['perf0_value,perf1_value', '100.0,50.0']
+    assert _read_lines(logdir / f'_MyTest.log.h0{suffix}') == lines
+
+
+def test_perf_logging_max_open_files(make_runner, make_exec_ctx, perf_test,
+                                     config_perflog, perflog_compression,
+                                     tmp_path):
+    class _MyOtherTest(type(perf_test)):
+        pass
+
+    make_exec_ctx(
+        config_perflog(fmt='%(check_result)s,%(check_perfvalues)s',
+                       perffmt='%(check_perf_value)s,',
+                       handler_opts={'compress': perflog_compression,
+                                     'max_open_files': 1})
+    )
+    logging.configure_logging(rt.runtime().site_config)
+    handler = logging._perf_logger.handlers[0]
+    for _ in range(2):
+        runner = make_runner()
+        runner.runall(
+            executors.generate_testcases([perf_test, _MyOtherTest()])
+        )
+        assert len(handler._MultiFileHandler__streams) == 1
+
+    handler.close()
+
+    def _read_lines(filename):
+        with osext.open_compressed(filename) as fp:
+            return fp.read().splitlines()
+
+    suffix = osext.compression_suffix(perflog_compression)
+    logdir = tmp_path / 'perflogs' / 'generic' / 'default'
+    assert _read_lines(logdir / f'_MyTest.log{suffix}') == [
+        'result,perf0_value,perf1_value', 'pass,100.0,50.0', 'pass,100.0,50.0'
+    ]
+    assert _read_lines(logdir / f'_MyOtherTest.log{suffix}') == [
+        'result,perf0_value,perf1_value', 'pass,100.0,50.0', 'pass,100.0,50.0'
+    ]
+
+
+@pytest.fixture(params=[None, 'gzip', 'xz'])
+def perflog_compression_opt(request):
+    return request.param
+
+
+def test_perf_logging_close(make_runner, make_exec_ctx, perf_test,
+                            config_perflog, perflog_compression_opt,
+                            tmp_path):
+    class _MyOtherTest(type(perf_test)):
+        pass
+
+    class _MyThirdTest(type(perf_test)):
+        pass
+
+    make_exec_ctx(
+        config_perflog(fmt='%(check_result)s,%(check_perfvalues)s',
+                       perffmt='%(check_perf_value)s,',
+                       handler_opts={'compress': perflog_compression_opt})
+    )
+    logging.configure_logging(rt.runtime().site_config)
+    runner = make_runner()
+    runner.runall(executors.generate_testcases(
+        [perf_test, _MyOtherTest(), _MyThirdTest()]
+    ))
+
+    # Close the handler with all the log files open
+    handler = logging._perf_logger.handlers[0]
+    assert len(handler._MultiFileHandler__streams) == 3
+    handler.close()
+    assert len(handler._MultiFileHandler__streams) == 0
+
+    suffix = osext.compression_suffix(perflog_compression_opt)
+    logdir = tmp_path / 'perflogs' / 'generic' / 'default'
+    for name in ('_MyTest', '_MyOtherTest', '_MyThirdTest'):
+        with osext.open_compressed(logdir / f'{name}.log{suffix}') as fp:
+            assert fp.read().splitlines() == [
+                'result,perf0_value,perf1_value', 'pass,100.0,50.0'
+            ]
+
+
+def test_perf_logging_async(make_runner, make_exec_ctx, perf_test,
+                            config_perflog, tmp_path):
+    make_exec_ctx(
+        config_perflog(fmt='%(check_display_name)s,%(check_perfvalues)s',
+                       perffmt='%(check_perf_value)s,',
+                       logging_opts={'async_handlers': True})
+    )
+    logging.configure_logging(rt.runtime().site_config)
+    assert isinstance(logging._perf_logger.handlers[0],
+                      logging._AsyncHandler)
+
+    runner = make_runner()
+    runner.runall(executors.generate_testcases([perf_test]))
+    logging.flush_logs()
+    logfile = tmp_path / 'perflogs' / 'generic' / 'default' / '_MyTest.log'
+    with open(logfile) as fp:
+        assert fp.read().splitlines() == [
+            'display_name,perf0_value,perf1_value', '_MyTest,100.0,50.0'
+        ]
+
+
 def test_perf_logging_no_end_delim(make_runner, make_exec_ctx, perf_test,
                                    config_perflog, tmp_path):
     make_exec_ctx(
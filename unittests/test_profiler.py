@@ -56,3 +56,17 @@ def test_time_region_profiler_ctxmgr():
     t_forloop = profiler.total_time('forloop')
     assert t_sleep >= 1
     assert t_forloop > t_sleep
+
+
+def test_counters():
+    profiler = prof.TimeProfiler()
+    stats = {'hits': 0}
+    profiler.register_counters('cache', lambda: stats)
+    stats['hits'] += 1
+    assert profiler.counters('cache') == {'hits': 1}
+    with pytest.raises(prof.ProfilerError):
+        profiler.counters('foo')
+
+    lines = []
+    profiler.print_report(lines.append)
+    assert 'cache: hits=1' in lines
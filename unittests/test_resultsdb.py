@@ -0,0 +1,307 @@
+# Copyright 2016-2023 Swiss National Supercomputing Centre (CSCS/ETH Zurich)
+# ReFrame Project Developers. See the top-level LICENSE file for details.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+import pytest
+import sqlite3
+import time
+
+import reframe.core.exceptions as errors
+import reframe.frontend.resultsdb as resultsdb
+
+
+def _testcase(name, system, environ, result='success', perfvars=None):
+    return {
+        'environment': environ,
+        'fail_phase': None if result == 'success' else 'sanity',
+        'fail_reason': None if result == 'success' else 'sanity error',
+        'jobid': '42',
+        'name': name,
+        'perfvars': perfvars,
+        'result': result,
+        'system': system,
+        'time_total': 1.5,
+        'unique_name': name
+    }
+
+
+def _report(time_start, testcases):
+    timestr = time.strftime('%FT%T%z', time.localtime(time_start))
+    return {
+        'session_info': {
+            'cmdline': 'reframe -r',
+            'data_version': '3.1',
+            'hostname': 'localhost',
+            'num_cases': len(testcases),
+            'num_failures': sum(tc['result'] == 'failure'
+                                for tc in testcases),
+            'time_end': timestr,
+            'time_start': timestr,
+            'user': 'user',
+            'version': '4.6.0'
+        },
+        'restored_cases': [],
+        'runs': [{'runid': 0, 'testcases': testcases}]
+    }
+
+
+def _perfvar(name, value):
+    return {
+        'name': name,
+        'reference': 100,
+        'thres_lower': -0.1,
+        'thres_upper': None,
+        'unit': 'GB/s',
+        'value': value
+    }
+
+
+@pytest.fixture
+def db(tmp_path):
+    now = time.time()
+    with resultsdb.ResultsDB(str(tmp_path / 'db' / 'results.db')) as db:
+        db.store(_report(now - 10*86400, [
+            _testcase('T0', 'sys:gpu', 'gnu',
+                      perfvars=[_perfvar('bw', 90), _perfvar('lat', 1)]),
+            _testcase('T1', 'sys:cpu', 'gnu', result='failure')
+        ]), 'report-0.json')
+        db.store(_report(now - 3600, [
+            _testcase('T0', 'sys:gpu', 'gnu', perfvars=[_perfvar('bw', 95)]),
+            _testcase('T0', 'sys:cpu', 'cray', perfvars=[_perfvar('bw', 50)]),
+            _testcase('T1', 'other', 'gnu')
+        ]), 'report-1.json')
+        yield db
+
+
+def test_sessions(db):
+    sessions = db.sessions()
+    assert [s['id'] for s in sessions] == [1, 2]
+    assert sessions[0]['report_file'] == 'report-0.json'
+    assert sessions[0]['num_cases'] == 2
+    assert sessions[0]['num_failures'] == 1
+    assert sessions[0]['time_start'] < sessions[1]['time_start']
+
+    recent = db.sessions(time_from=resultsdb.parse_time('1d'))
+    assert [s['id'] for s in recent] == [2]
+
+    old = db.sessions(time_to=resultsdb.parse_time('1d'))
+    assert [s['id'] for s in old] == [1]
+
+
+def test_testcases(db):
+    testcases = db.testcases(name='T0')
+    assert len(testcases) == 3
+    assert testcases[0]['session_id'] == 1
+    assert testcases[0]['system'] == 'sys'
+    assert testcases[0]['partition'] == 'gpu'
+    assert [pv['name'] for pv in testcases[0]['perfvars']] == ['bw', 'lat']
+
+    testcases = db.testcases(name='T0', partition='gpu',
+                             time_from=resultsdb.parse_time('1d'))
+    assert len(testcases) == 1
+    assert testcases[0]['perfvars'] == [
+        {'name': 'bw', 'reference': 100, 'thres_lower': -0.1,
+         'thres_upper': None, 'unit': 'GB/s', 'value': 95}
+    ]
+
+    testcases = db.testcases(system='other')
+    assert len(testcases) == 1
+    assert testcases[0]['partition'] is None
+    assert testcases[0]['perfvars'] == []
+
+    failures = db.testcases(result='failure')
+    assert len(failures) == 1
+    assert failures[0]['fail_phase'] == 'sanity'
+    assert failures[0]['fail_reason'] == 'sanity error'
+
+    assert len(db.testcases(session_id=2)) == 3
+    assert db.testcases(environment='intel') == []
+
+
+def test_perfvars(db):
+    values = db.perfvars('T0', 'bw', system='sys', environment='gnu')
+    assert [v['value'] for v in values] == [90, 95]
+    assert [v['session_id'] for v in values] == [1, 2]
+    assert all(v['partition'] == 'gpu' for v in values)
+    assert len(db.perfvars('T0')) == 4
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def aggr_impl(request, monkeypatch):
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(resultsdb, '_numpy', lambda: None)
+
+
+@pytest.fixture
+def history_db(tmp_path):
+    now = time.time()
+    with resultsdb.ResultsDB(str(tmp_path / 'results.db')) as db:
+        for i, bw in enumerate([80, 100, 90, 70, 60]):
+            db.store(_report(now - (5 - i)*86400, [
+                _testcase('T0', 'sys:gpu', 'gnu',
+                          perfvars=[_perfvar('bw', bw), _perfvar('lat', i)]),
+                _testcase('T1', 'sys:gpu', 'gnu',
+                          perfvars=[_perfvar('bw', 2*bw)])
+            ]))
+
+        yield db
+
+
+def test_aggregate_perfvars(history_db, aggr_impl):
+    def aggregate(*args, **kwargs):
+        return history_db.aggregate_perfvars(*args, name='T0', **kwargs)
+
+    key = ('T0', 'sys', 'gpu', 'gnu', 'bw', 'GB/s')
+    assert aggregate('mean')[key] == (80, 5)
+    assert aggregate('median')[key] == (80, 5)
+    assert aggregate('min')[key] == (60, 5)
+    assert aggregate('max')[key] == (100, 5)
+    assert aggregate('p0')[key] == (60, 5)
+    assert aggregate('p100')[key] == (100, 5)
+    assert aggregate('p75')[key] == (90, 5)
+    assert aggregate('p90')[key] == pytest.approx((96, 5))
+
+    # The most recent values are 60, 70 and 90
+    assert aggregate('mean', last=3)[key] == pytest.approx((220/3, 3))
+    assert aggregate('median', last=2)[key] == (65, 2)
+    assert aggregate('max', last=10)[key] == (100, 5)
+    assert aggregate('median', session_id=2)[key] == (100, 1)
+
+    lat_key = ('T0', 'sys', 'gpu', 'gnu', 'lat', 'GB/s')
+    assert aggregate('max', last=2) == {key: (70, 2), lat_key: (4, 2)}
+    assert history_db.aggregate_perfvars(
+        'min', last=2
+    )[('T1', 'sys', 'gpu', 'gnu', 'bw', 'GB/s')] == (120, 2)
+    assert history_db.aggregate_perfvars('mean', name='T2') == {}
+
+
+def test_aggregate_perfvars_invalid(history_db):
+    with pytest.raises(ValueError):
+        history_db.aggregate_perfvars('foo')
+
+    with pytest.raises(ValueError):
+        history_db.aggregate_perfvars('p101')
+
+    with pytest.raises(ValueError):
+        history_db.aggregate_perfvars('mean', last=0)
+
+
+def test_compare(history_db, aggr_impl):
+    session_id = history_db.store(_report(time.time(), [
+        _testcase('T0', 'sys:gpu', 'gnu',
+                  perfvars=[_perfvar('bw', 70), _perfvar('new', 1)]),
+        _testcase('T1', 'sys:gpu', 'gnu', perfvars=[_perfvar('bw', 160)])
+    ]))
+    comparison = history_db.compare(session_id, 'max', last=2)
+    assert len(comparison) == 3
+    t0_bw, t0_new, t1_bw = comparison
+    assert t0_bw['perfvar'] == 'bw'
+    assert t0_bw['baseline'] == 70
+    assert t0_bw['count'] == 2
+    assert t0_bw['diff'] == 0
+    assert not t0_bw['regression']
+
+    # No baseline for new performance variables
+    assert t0_new['baseline'] is None
+    assert t0_new['count'] == 0
+    assert t0_new['diff'] is None
+    assert not t0_new['regression']
+
+    # The baseline of T1 is 140 and the lower threshold is -10%
+    assert t1_bw['baseline'] == 140
+    assert t1_bw['diff'] == pytest.approx(100*20/140)
+    assert not t1_bw['regression']
+
+    comparison = history_db.compare(session_id, 'max')
+    assert comparison[0]['baseline'] == 100
+    assert comparison[0]['diff'] == -30
+    assert comparison[0]['regression']
+    assert comparison[2]['regression']
+
+
+def test_detect_shifts(aggr_impl):
+    values = [10, 11, 9, 10, 10, 11, 9, 10, 14, 10, 10]
+    shifts = resultsdb.detect_shifts(values, window=4, k=3)
+    assert len(shifts) == 1
+    i, median, score = shifts[0]
+    assert i == 8
+    assert median == 10
+    assert score == pytest.approx(4 / (0.5*1.4826))
+
+    assert resultsdb.detect_shifts(values, window=4, k=6) == []
+    assert resultsdb.detect_shifts(values, window=20) == []
+
+    # A shift from constant values is always significant
+    shifts = resultsdb.detect_shifts([1, 1, 1, 2], window=3)
+    assert shifts == [(3, 1, float('inf'))]
+
+    with pytest.raises(ValueError):
+        resultsdb.detect_shifts(values, window=0)
+
+
+def test_performance_shifts(tmp_path, aggr_impl):
+    now = time.time()
+    with resultsdb.ResultsDB(str(tmp_path / 'results.db')) as db:
+        history = [100, 102, 98, 101, 99, 100, 50, 100]
+        for i, bw in enumerate(history):
+            db.store(_report(now - (len(history) - i)*86400, [
+                _testcase('T0', 'sys:gpu', 'gnu',
+                          perfvars=[_perfvar('bw', bw)]),
+                _testcase('T1', 'sys:gpu', 'gnu',
+                          perfvars=[_perfvar('bw', bw + i)])
+            ]))
+
+        shifts = db.performance_shifts(window=5)
+        assert [(s['name'], s['session_id']) for s in shifts] == [
+            ('T0', 7), ('T1', 7)
+        ]
+        assert shifts[0]['value'] == 50
+        assert shifts[0]['median'] == 100
+        assert shifts[0]['diff'] == -50
+        assert shifts[0]['perfvar'] == 'bw'
+        assert shifts[0]['partition'] == 'gpu'
+
+        assert len(db.performance_shifts(window=5, name='T0')) == 1
+        assert db.performance_shifts(window=5, target_id=8) == []
+        assert len(db.performance_shifts(window=5, target_id=7)) == 2
+        assert db.performance_shifts(window=10) == []
+
+
+def test_reopen(db):
+    db.close()
+    with resultsdb.ResultsDB(db.filename) as reopened:
+        assert len(reopened.sessions()) == 2
+
+
+def test_incompatible_schema(tmp_path):
+    filename = str(tmp_path / 'results.db')
+    resultsdb.ResultsDB(filename).close()
+    conn = sqlite3.connect(filename)
+    with conn:
+        conn.execute("UPDATE metadata SET value = '0' "
+                     "WHERE key = 'schema_version'")
+
+    conn.close()
+    with pytest.raises(errors.ReframeError, match='incompatible'):
+        resultsdb.ResultsDB(filename)
+
+
+def test_parse_time():
+    assert resultsdb.parse_time('2d', now=10*86400) == 8*86400
+    assert resultsdb.parse_time('1.5h', now=7200) == 1800
+    assert resultsdb.parse_time('30m', now=3600) == 1800
+    assert resultsdb.parse_time('1w', now=604800) == 0
+    assert resultsdb.parse_time('2023-06-01') == time.mktime(
+        time.strptime('2023-06-01', '%Y-%m-%d')
+    )
+    assert resultsdb.parse_time('2023-06-01T12:30') == time.mktime(
+        time.strptime('2023-06-01T12:30', '%Y-%m-%dT%H:%M')
+    )
+    with pytest.raises(ValueError):
+        resultsdb.parse_time('foo')
+
+    with pytest.raises(ValueError):
+        resultsdb.parse_time('2y')
@@ -8,6 +8,7 @@ import io
 import itertools
 import os
 import pytest
+import re
 import sys
 
 
@@ -542,6 +543,61 @@ def test_assert_found(_assert_found):
         sn.evaluate(assert_found(r'foo: \d+', where))
 
 
+def test_compiled_patterns(_assert_found, _assert_not_found,
+                           _extractall, _extract_many):
+    assert_found, where = _assert_found
+    assert assert_found(re.compile(r'step: \d+', re.IGNORECASE), where)
+    with pytest.raises(SanityError, match=r"re.compile\('foo'\)"):
+        sn.evaluate(assert_found(re.compile(r'foo'), where))
+
+    assert_not_found, where = _assert_not_found
+    assert assert_not_found(re.compile(r'step: \d+'), where)
+
+    extractall, where = _extractall
+    assert [1, 2, 3] == sn.evaluate(
+        extractall(re.compile(r'Step: (\d+)'), where, 1, int)
+    )
+
+    # Patterns with different flags are not combined in a single scanner
+    extract_many, where = _extract_many
+    assert {'a': 1, 'b': '2', 'c': 1} == sn.evaluate(extract_many({
+        'a': (re.compile(r'step: (\d+)', re.I), 1, int),
+        'b': (r'Number: \d+ (\d+)', 1),
+        'c': (re.compile(r'^Step: (?P<no>\d+)$', re.M), 'no', int)
+    }, where))
+
+
+def test_compiled_patterns_modes(tempfile):
+    patt = re.compile(r'step: (\d+)', re.IGNORECASE)
+    for mode in ('text', 'mmap', 'stream'):
+        assert [1, 2, 3] == sn.evaluate(
+            sn.extractall(patt, tempfile, 1, int, mode=mode)
+        )
+
+    assert [1, 2, 3] == sn.evaluate(
+        sn.extractall(re.compile(rb'Step: (\d+)'), tempfile, 1, int,
+                      mode='mmap')
+    )
+
+
+def test_regex_cache():
+    sn._compile_cached.cache_clear()
+    patt = r'Regex cache: (\d+)'
+    sn.evaluate(sn.findall_s(patt, 'Regex cache: 1'))
+    sn.evaluate(sn.extractall_s(patt, 'Regex cache: 1', 1))
+    stats = sn._regex_cache_stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+    assert stats['size'] == 1
+    assert stats['maxsize'] == sn._REGEX_CACHE_SIZE
+    assert sn._compile(patt) is sn._compile(patt)
+
+    # Compiled patterns bypass the cache
+    compiled = re.compile(patt)
+    assert sn._compile(compiled) is compiled
+    assert sn._regex_cache_stats()['size'] == 1
+
+
 def test_assert_found_encoding(utf16_file):
     assert sn.assert_found('Odyssey', utf16_file, encoding='utf-16')
 
@@ -811,6 +867,285 @@ def test_extractall_multiple_tags(_extractall):
         )
 
 
+@pytest.fixture(params=['text', 'mmap', 'stream'])
+def search_mode(request):
+    return request.param
+
+
+def test_extractall_modes(tempfile, search_mode):
+    assert [1, 2, 3] == sn.evaluate(
+        sn.extractall(r'Step: (\d+)', tempfile, 1, int, mode=search_mode)
+    )
+    assert [('2', '4'), ('3', '6')] == sn.evaluate(
+        sn.extractall(r'Number: (\d+) (\d+)', tempfile, (1, 2),
+                      mode=search_mode, tail=24)
+    )
+    assert 'Step: 2' == sn.evaluate(
+        sn.extractsingle(r'Step: \d+', tempfile, item=1, mode=search_mode)
+    )
+    assert 3 == sn.count(
+        sn.finditer(r'^Number', tempfile, mode=search_mode)
+    )
+
+
+def test_assert_found_modes(tempfile, search_mode):
+    assert sn.assert_found(r'Step: \d+', tempfile, mode=search_mode)
+    assert sn.assert_not_found(r'Step: \d+', tempfile,
+                               mode=search_mode, tail=30)
+    with pytest.raises(SanityError, match=r'not found'):
+        sn.evaluate(sn.assert_found(r'Step: \d+', tempfile,
+                                    mode=search_mode, tail=30))
+
+    with pytest.raises(SanityError, match=r'found'):
+        sn.evaluate(sn.assert_not_found(r'Number: 3', tempfile,
+                                        mode=search_mode, tail=12))
+
+
+def test_stream_mode_chunks(tempfile, monkeypatch):
+    monkeypatch.setattr(sn, '_STREAM_CHUNK_SIZE', 5)
+    monkeypatch.setattr(sn, '_STREAM_OVERLAP', 1)
+    for patt in (r'Step: \d+', r'\d', r'\d+\n\w+', r'^\w+: (\d)$'):
+        assert (sn.evaluate(sn.extractall(patt, tempfile)) ==
+                sn.evaluate(sn.extractall(patt, tempfile, mode='stream')))
+
+
+def test_search_mode_errors(tempfile, utf16_file):
+    with pytest.raises(SanityError, match=r'invalid search mode'):
+        sn.evaluate(sn.findall(r'Step', tempfile, mode='foo'))
+
+    with pytest.raises(SanityError, match=r'not supported'):
+        sn.evaluate(sn.findall('Odyssey', utf16_file,
+                               encoding='utf-16', mode='mmap'))
+
+    with pytest.raises(SanityError):
+        sn.evaluate(sn.findall(r'Step', 'foo.txt', mode='stream'))
+
+    assert sn.evaluate(sn.findall('Odyssey', utf16_file,
+                                  encoding='utf-16', mode='stream'))
+
+
+def test_mmap_empty_file(tmp_path):
+    empty_file = tmp_path / 'empty'
+    empty_file.touch()
+    assert [] == sn.evaluate(sn.findall(r'.*', str(empty_file), mode='mmap'))
+
+
+_extract_many = make_fixture([sn.extract_many, sn.extract_many_s])
+
+
+def test_extract_many(_extract_many):
+    extract_many, where = _extract_many
+    res = sn.evaluate(extract_many({
+        'step': (r'Step: (?P<no>\d+)', 'no', int),
+        'num1': (r'Number: (\d+) (\d+)', 1, int),
+        'num2': (r'Number: (\d+) (\d+)', 2, float),
+        'line': r'Number: \d+ 4',
+        'last': (r'Step: 3',)
+    }, where))
+    assert res == {
+        'step': 1, 'num1': 1, 'num2': 2.0,
+        'line': 'Number: 2 4', 'last': 'Step: 3'
+    }
+    assert isinstance(res['num2'], float)
+
+    # Patterns that cannot be combined in a single scanner
+    res = sn.evaluate(extract_many({
+        'a': (r'Step: (?P<no>\d+)', 'no', int),
+        'b': (r'Number: (?P<no>\d+) (\d+)', 'no', int),
+        'c': (r'(Step): \d\n\1: (\d)', 2, int)
+    }, where))
+    assert res == {'a': 1, 'b': 1, 'c': 2}
+
+    with pytest.raises(SanityError, match=r'not found'):
+        sn.evaluate(extract_many({'a': (r'foo: (\d+)', 1)}, where))
+
+    with pytest.raises(SanityError, match=r'no such group'):
+        sn.evaluate(extract_many({'a': (r'Step: (\d+)', 2)}, where))
+
+    with pytest.raises(SanityError, match=r'no such group'):
+        sn.evaluate(extract_many({'a': (r'Step: (\d+)', 'no')}, where))
+
+    with pytest.raises(SanityError, match=r'could not convert'):
+        sn.evaluate(extract_many({'a': (r'Step: \d+', 0, int)}, where))
+
+    with pytest.raises(SanityError, match=r'multiple conversion'):
+        sn.evaluate(extract_many({'a': (r'Step: (\d+)', 1, [int])}, where))
+
+
+def test_extract_many_overlapping():
+    # The first match of a pattern lies inside the first match of another
+    patterns = {
+        't': (r'Time:\s+(\S+)', 1, float),
+        'tt': (r'Total Time:\s+(\S+)', 1, float),
+        'x': (r'(?<=Total )Time', 0),
+        'n': (r'\bfoo', 0)
+    }
+    text = 'Total Time: 5\nfoo\nTime: 9\n'
+    res = sn.evaluate(sn.extract_many_s(patterns, text))
+    assert res == {
+        name: sn.evaluate(sn.extractsingle_s(spec[0], text, *spec[1:]))
+        for name, spec in patterns.items()
+    }
+    assert res == {'t': 5.0, 'tt': 5.0, 'x': 'Time', 'n': 'foo'}
+
+
+def test_extract_many_perf_variables(tempfile):
+    metrics = sn.extract_many({
+        'step': (r'Step: (\d+)', 1, int),
+        'num': (r'Number: \d+ (\d+)', 1, int)
+    }, tempfile)
+    perf_vars = {
+        name: sn.make_performance_function(metrics[name], 'unit')
+        for name in ('step', 'num')
+    }
+    with sn._file_cache():
+        assert 1 == perf_vars['step'].evaluate()
+        assert 2 == perf_vars['num'].evaluate()
+
+
+@pytest.fixture
+def json_file(tmp_path):
+    json_file = tmp_path / 'results.json'
+    json_file.write_text(
+        '{"results": [{"size": 1024, "bw": 10.5}, {"size": 2048, "bw": 20}],'
+        ' "a.b": {"c": "12"}}'
+    )
+    return str(json_file)
+
+
+def test_extract_json(json_file):
+    assert 10.5 == sn.evaluate(sn.extract_json(json_file, 'results.0.bw'))
+    assert 20 == sn.evaluate(sn.extract_json(json_file, 'results.-1.bw'))
+    assert 12 == sn.evaluate(sn.extract_json(json_file, ['a.b', 'c'], int))
+    assert 2 == sn.len(sn.extract_json(json_file, 'results'))
+    assert 2 == sn.evaluate(sn.extract_json_s('[1, 2]', '1'))
+    assert [1, 2] == sn.evaluate(sn.extract_json_s('[1, 2]', []))
+    with sn._file_cache():
+        vals = sn.evaluate(sn.map(
+            lambda i: sn.extract_json(json_file, f'results.{i}.size'),
+            range(2)
+        ))
+        assert [1024, 2048] == [sn.evaluate(v) for v in vals]
+
+    for path in ('results.2.bw', 'results.x', 'foo', 'results.0.bw.x'):
+        with pytest.raises(SanityError, match=r'not found'):
+            sn.evaluate(sn.extract_json(json_file, path))
+
+    with pytest.raises(SanityError, match=r'could not convert'):
+        sn.evaluate(sn.extract_json_s('{"a": "x"}', 'a', int))
+
+    with pytest.raises(SanityError, match=r'could not parse JSON'):
+        sn.evaluate(sn.extract_json_s('{"a": ', 'a'))
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    csv_file = tmp_path / 'results.csv'
+    csv_file.write_text('size,time,kind\n'
+                        '1024,1.5,"a,b"\n'
+                        '2048,2.5,c\n'
+                        '\n'
+                        '4096,4.5,c\n')
+    return str(csv_file)
+
+
+def test_extract_csv(csv_file):
+    with open(csv_file) as fp:
+        contents = fp.read()
+
+    for extract_csv, where in ((sn.extract_csv, csv_file),
+                               (sn.extract_csv_s, contents)):
+        assert [1.5, 2.5, 4.5] == sn.evaluate(
+            extract_csv(where, 'time', conv=float)
+        )
+        assert ['2.5'] == sn.evaluate(
+            extract_csv(where, 1, where={'size': 2048})
+        )
+        assert [2048, 4096] == sn.evaluate(
+            extract_csv(where, 'size', where={2: 'c'}, conv=int)
+        )
+        assert ['a,b'] == sn.evaluate(
+            extract_csv(where, -1, where={'size': lambda x: int(x) < 2048})
+        )
+        with pytest.raises(SanityError, match=r'no such column'):
+            sn.evaluate(extract_csv(where, 'foo'))
+
+        with pytest.raises(SanityError, match=r'no such column'):
+            sn.evaluate(extract_csv(where, 3))
+
+        with pytest.raises(SanityError, match=r'could not convert'):
+            sn.evaluate(extract_csv(where, 'kind', conv=int))
+
+    with sn._file_cache():
+        assert ['1.5'] == sn.evaluate(
+            sn.extract_csv(csv_file, 'time', where={'size': 1024})
+        )
+        assert ['a,b', 'c'] == sn.evaluate(
+            sn.extract_csv(csv_file, 'kind', where={'size': '1024'}) +
+            sn.extract_csv(csv_file, 'kind', where={'time': 4.5})
+        )
+
+    with pytest.raises(SanityError, match=r'no header'):
+        sn.evaluate(sn.extract_csv_s('', 'time'))
+
+    with pytest.raises(SanityError, match=r'malformed row'):
+        sn.evaluate(sn.extract_csv_s('a,b\n1\n', 'b'))
+
+
+def test_file_cache(tempfile):
+    expr = sn.extractall(r'Step: (\d+)', tempfile, 1, int)
+    with sn._file_cache():
+        assert [1, 2, 3] == sn.evaluate(expr)
+
+        # Rewrite the file in-place preserving its size and modification
+        # time; the cached contents must be returned
+        st = os.stat(tempfile)
+        with open(tempfile, 'r+') as fp:
+            fp.write('Step: 5\n')
+
+        os.utime(tempfile, ns=(st.st_atime_ns, st.st_mtime_ns))
+        assert [1, 2, 3] == sn.evaluate(expr)
+
+        # Change the file size; the file must be read again
+        with open(tempfile, 'a') as fp:
+            fp.write('Step: 4\n')
+
+        assert [5, 2, 3, 4] == sn.evaluate(expr)
+
+    # Outside the cache scope the file is always read
+    with open(tempfile, 'w') as fp:
+        fp.write('Step: 7\n')
+
+    assert [7] == sn.evaluate(expr)
+    assert sn._file_cache_active is None
+
+
+def test_working_dir(tempfile):
+    dirname, basename = os.path.split(tempfile)
+    with sn._working_dir(dirname):
+        assert sn.assert_found(r'Step: \d+', basename)
+        assert [1, 2, 3] == sn.evaluate(
+            sn.extractall(r'Step: (\d+)', basename, 1, int, mode='stream')
+        )
+        with sn._file_cache():
+            assert 3 == sn.count(sn.findall(r'Number', basename))
+
+        assert sn.path_isfile(basename)
+        assert [basename] == sn.evaluate(sn.glob('temp*'))
+        assert [tempfile] == sn.evaluate(sn.glob(tempfile))
+        files = sn.evaluate(sn.iglob('temp*'))
+
+    # Paths are resolved when `iglob()` is called
+    assert [basename] == list(files)
+    assert not sn.path_exists(basename)
+
+
+def test_file_cache_invalid_file():
+    with sn._file_cache():
+        with pytest.raises(SanityError):
+            sn.evaluate(sn.extractall(r'Step: (\d+)', 'foo.txt', 1))
+
+
 def test_safe_format():
     from reframe.utility.sanity import _format
 
@@ -879,3 +1214,67 @@ def test_path_islink(tmp_path):
 
     assert sn.evaluate(sn.path_islink(test_link))
     assert not sn.evaluate(sn.path_islink(test_file))
+
+
+def test_percentile():
+    assert 2.5 == sn.percentile([4, 1, 3, 2], 50)
+    assert 1 == sn.percentile([4, 1, 3, 2], 0)
+    assert 4 == sn.percentile(range(1, 5), 100)
+    assert 1.75 == sn.percentile(sn.defer([4, 1, 3, 2]), 25)
+    assert 3 == sn.median([5, 1, 3])
+    assert 2.5 == sn.median(x for x in [4, 1, 3, 2])
+    with pytest.raises(SanityError, match=r'empty'):
+        sn.evaluate(sn.median([]))
+
+    with pytest.raises(SanityError, match=r'must be in'):
+        sn.evaluate(sn.percentile([1, 2], 101))
+
+
+def test_extractall_array(tempfile, contents, search_mode):
+    np = pytest.importorskip('numpy')
+
+    res = sn.evaluate(sn.extractall_array(r'Step: (\d+)', tempfile, 1,
+                                          mode=search_mode))
+    assert isinstance(res, np.ndarray)
+    assert res.dtype == np.float64
+    assert [1.0, 2.0, 3.0] == res.tolist()
+
+    res = sn.evaluate(sn.extractall_array(r'Number: (?P<a>\d+) (?P<b>\d+)',
+                                          tempfile, ('a', 'b'), int,
+                                          mode=search_mode))
+    assert (3, 2) == res.shape
+    assert [[1, 2], [2, 4], [3, 6]] == res.tolist()
+
+    res = sn.evaluate(sn.extractall_array_s(r'(\w+): (\d+)', contents, 2,
+                                            int))
+    assert [1, 2, 3, 1, 2, 3] == res.tolist()
+
+    with pytest.raises(SanityError, match=r'no such group'):
+        sn.evaluate(sn.extractall_array(r'Step: (\d+)', tempfile, 2,
+                                        mode=search_mode))
+
+    with pytest.raises(SanityError, match=r'could not convert'):
+        sn.evaluate(sn.extractall_array(r'Step: \d+', tempfile,
+                                        mode=search_mode))
+
+
+def test_reductions_on_arrays():
+    np = pytest.importorskip('numpy')
+
+    a = np.array([4, 1, 3, 2])
+    for fn in (sn.avg, sn.max, sn.min, sn.sum, sn.median):
+        res = sn.evaluate(fn(a))
+        assert not isinstance(res, np.generic)
+        assert res == sn.evaluate(fn(a.tolist()))
+
+    assert 12 == sn.sum(a, 2)
+    assert 1.75 == sn.percentile(a, 25)
+    assert not isinstance(sn.evaluate(sn.percentile(a, 25)), np.generic)
+    with pytest.raises(SanityError):
+        sn.evaluate(sn.avg(np.array([])))
+
+    with pytest.raises(SanityError):
+        sn.evaluate(sn.percentile(a, -1))
+
+    with pytest.raises(ValueError):
+        sn.evaluate(sn.max(np.array([])))
@@ -475,6 +475,40 @@ def test_git_repo_exists(git_only):
                                      timeout=10)
 
 
+@pytest.mark.parametrize('compression', [None, 'gzip', 'xz'])
+def test_open_compressed(tmp_path, compression):
+    filename = tmp_path / f'file.txt{osext.compression_suffix(compression)}'
+    with osext.open_compressed(filename, 'w') as fp:
+        fp.write('hello\n')
+
+    with osext.open_compressed(filename, 'a+') as fp:
+        fp.write('world\n')
+
+    with open(filename, 'rb') as fp:
+        data = fp.read()
+
+    assert (data == b'hello\nworld\n') == (compression is None)
+    with osext.open_compressed(filename) as fp:
+        assert fp.read() == 'hello\nworld\n'
+
+    with osext.open_compressed(filename, 'rb') as fp:
+        assert fp.read() == b'hello\nworld\n'
+
+    # Compressed files are read transparently regardless of their name
+    renamed = tmp_path / 'renamed.txt'
+    os.rename(filename, renamed)
+    with osext.open_compressed(renamed) as fp:
+        assert fp.readline() == 'hello\n'
+
+
+def test_compression_suffix():
+    assert osext.compression_suffix(None) == ''
+    assert osext.compression_suffix('gzip') == '.gz'
+    assert osext.compression_suffix('xz') == '.xz'
+    with pytest.raises(ValueError):
+        osext.compression_suffix('zip')
+
+
 def test_force_remove_file(tmp_path):
     fp = tmp_path / 'tmp_file'
     fp.touch()